@@ -0,0 +1,248 @@
+"""
+Recall vs latency benchmark of HNSW search.
+
+For every combination of index parameters (`m`, `ef_construct`, quantization)
+the dataset is uploaded into a fresh collection and indexed, then the queries
+are searched with every `hnsw_ef`. Results are compared to the exact top-k
+computed with NumPy to report recall@k along with QPS and latency percentiles.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+import dataset
+from ground_truth import exact_top_k, recall
+
+QUANTIZATION_CONFIGS = {
+    "none": None,
+    "int8": {"scalar": {"type": "int8", "always_ram": True}},
+    **{
+        compression: {"product": {"compression": compression, "always_ram": True}}
+        for compression in ("x4", "x8", "x16", "x32", "x64")
+    },
+}
+
+INDEXING_TIMEOUT_SEC = 3600
+
+
+@dataclass
+class BuildParams:
+    m: int
+    ef_construct: int
+    quantization: str
+
+
+@dataclass
+class SearchResult:
+    m: int
+    ef_construct: int
+    quantization: str
+    # `None` for exact search
+    hnsw_ef: Optional[int]
+    k: int
+    recall: float
+    qps: float
+    p50_ms: float
+    p99_ms: float
+    index_time_sec: float
+
+
+def parse_args() -> argparse.Namespace:
+    def int_list(value: str) -> List[int]:
+        return [int(v) for v in value.split(",")]
+
+    def str_list(value: str) -> List[str]:
+        return value.split(",")
+
+    parser = argparse.ArgumentParser("recall", description=__doc__)
+    parser.add_argument("--uri", default="http://localhost:6333")
+    parser.add_argument("--collection-name", default="recall_bench")
+    parser.add_argument("--dataset", default="synthetic",
+                        help="'synthetic' or a dataset file: ann-benchmarks .hdf5, .fvecs or .npy")
+    parser.add_argument("--queries", help="Queries file for .fvecs and .npy datasets")
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic dataset size")
+    parser.add_argument("--n-queries", type=int, default=1000, help="Synthetic queries")
+    parser.add_argument("--dim", type=int, default=128, help="Synthetic vector size")
+    parser.add_argument("--clusters", type=int, default=0, help="Synthetic gaussian clusters, 0 for uniform vectors")
+    parser.add_argument("--limit-queries", type=int, help="Use only the first queries of the dataset")
+    parser.add_argument("--distance", choices=("Cosine", "Euclid", "Dot"),
+                        help="Distance, defaults to the one of the dataset or Cosine")
+    parser.add_argument("--k", type=int, default=10, help="Number of neighbours to search")
+    parser.add_argument("--m", type=int_list, default=[16])
+    parser.add_argument("--ef-construct", type=int_list, default=[100])
+    parser.add_argument("--quantization", type=str_list, default=["none"],
+                        help=f"Comma separated, from {list(QUANTIZATION_CONFIGS)}")
+    parser.add_argument("--no-rescore", action="store_true", help="Do not rescore quantized results")
+    parser.add_argument("--hnsw-ef", type=int_list, default=[16, 32, 64, 128, 256])
+    parser.add_argument("--exact", action="store_true", help="Also measure exact search, as a baseline")
+    parser.add_argument("--concurrency", type=int, default=8, help="Searches in flight")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Points per upload request")
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+    for quantization in args.quantization:
+        if quantization not in QUANTIZATION_CONFIGS:
+            parser.error(f"Unknown quantization '{quantization}', expected one of {list(QUANTIZATION_CONFIGS)}")
+    return args
+
+
+def load_dataset(args: argparse.Namespace) -> dataset.Dataset:
+    if args.dataset == "synthetic":
+        data = dataset.synthetic(args.n, args.n_queries, args.dim, args.clusters)
+    else:
+        data = dataset.load(args.dataset, args.queries)
+    if args.limit_queries:
+        data.queries = data.queries[:args.limit_queries]
+    return data
+
+
+def create_collection(client: httpx.Client, name: str, dim: int, distance: str, params: BuildParams):
+    client.delete(f"/collections/{name}").raise_for_status()
+    client.put(f"/collections/{name}", json={
+        "vectors": {"size": dim, "distance": distance},
+        "hnsw_config": {
+            "m": params.m,
+            "ef_construct": params.ef_construct,
+            # always search with HNSW, however small the segments are
+            "full_scan_threshold": 10,
+        },
+        # index every segment
+        "optimizers_config": {"indexing_threshold": 10},
+        "quantization_config": QUANTIZATION_CONFIGS[params.quantization],
+    }).raise_for_status()
+
+
+def upload(client: httpx.Client, name: str, vectors: np.ndarray, batch_size: int):
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        client.put(f"/collections/{name}/points?wait=true", json={
+            "batch": {
+                "ids": list(range(start, start + len(batch))),
+                "vectors": batch.tolist(),
+            }
+        }).raise_for_status()
+
+
+def wait_indexed(client: httpx.Client, name: str):
+    start = time.time()
+    while time.time() - start < INDEXING_TIMEOUT_SEC:
+        info = client.get(f"/collections/{name}").raise_for_status().json()["result"]
+        if info["status"] == "green" and info["indexed_vectors_count"] >= info["vectors_count"]:
+            return
+        time.sleep(1)
+    raise Exception(f"Collection {name} was not indexed in {INDEXING_TIMEOUT_SEC} seconds")
+
+
+async def search_all(uri: str, name: str, queries: np.ndarray, k: int, search_params: dict, concurrency: int):
+    """
+    :return: found ids and latency in seconds of every query, and the total time
+    """
+    found = [None] * len(queries)
+    latencies = np.zeros(len(queries))
+    next_query = iter(range(len(queries)))
+
+    async with httpx.AsyncClient(base_url=uri, timeout=60, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def search_loop():
+            for i in next_query:
+                start = time.perf_counter()
+                r = await client.post(f"/collections/{name}/points/search", json={
+                    "vector": queries[i].tolist(),
+                    "limit": k,
+                    "params": search_params,
+                })
+                latencies[i] = time.perf_counter() - start
+                r.raise_for_status()
+                found[i] = [point["id"] for point in r.json()["result"]]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(search_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return found, latencies, elapsed
+
+
+def run_searches(args, data: dataset.Dataset, truth: np.ndarray, params: BuildParams,
+                 index_time: float) -> List[SearchResult]:
+    results = []
+    quantization = None
+    if params.quantization != "none":
+        quantization = {"rescore": not args.no_rescore}
+
+    # warm up caches, e.g. of on-disk data
+    asyncio.run(search_all(args.uri, args.collection_name, data.queries[:100], args.k, {}, args.concurrency))
+
+    runs = [(ef, {"hnsw_ef": ef, "quantization": quantization}) for ef in args.hnsw_ef]
+    if args.exact:
+        runs.append((None, {"exact": True}))
+
+    for hnsw_ef, search_params in runs:
+        found, latencies, elapsed = asyncio.run(search_all(
+            args.uri, args.collection_name, data.queries, args.k, search_params, args.concurrency))
+        result = SearchResult(
+            m=params.m,
+            ef_construct=params.ef_construct,
+            quantization=params.quantization,
+            hnsw_ef=hnsw_ef,
+            k=args.k,
+            recall=float(np.mean([recall(f, t) for f, t in zip(found, truth)])),
+            qps=len(data.queries) / elapsed,
+            p50_ms=float(np.percentile(latencies, 50) * 1000),
+            p99_ms=float(np.percentile(latencies, 99) * 1000),
+            index_time_sec=index_time,
+        )
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def print_header():
+    print(f"{'m':>4} {'ef_constr':>9} {'quant':>6} {'hnsw_ef':>7} {'recall':>7} {'qps':>9} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'index s':>8}")
+
+
+def print_result(r: SearchResult):
+    hnsw_ef = "exact" if r.hnsw_ef is None else r.hnsw_ef
+    print(f"{r.m:>4} {r.ef_construct:>9} {r.quantization:>6} {hnsw_ef:>7} {r.recall:>7.4f} {r.qps:>9.1f} "
+          f"{r.p50_ms:>8.2f} {r.p99_ms:>8.2f} {r.index_time_sec:>8.1f}")
+
+
+def main():
+    args = parse_args()
+    data = load_dataset(args)
+    distance = args.distance or data.distance or "Cosine"
+
+    print(f"Dataset {data.name}: {len(data.vectors)} vectors of {data.dim} dimensions, "
+          f"{len(data.queries)} queries, {distance} distance")
+    start = time.time()
+    truth = exact_top_k(data.queries, data.vectors, distance, args.k)
+    print(f"Exact top-{args.k} computed in {time.time() - start:.1f}s")
+
+    results = []
+    print_header()
+    with httpx.Client(base_url=args.uri, timeout=600) as client:
+        for m, ef_construct, quantization in itertools.product(args.m, args.ef_construct, args.quantization):
+            params = BuildParams(m, ef_construct, quantization)
+            create_collection(client, args.collection_name, data.dim, distance, params)
+            start = time.time()
+            upload(client, args.collection_name, data.vectors, args.batch_size)
+            wait_indexed(client, args.collection_name)
+            index_time = time.time() - start
+            results.extend(run_searches(args, data, truth, params, index_time))
+        client.delete(f"/collections/{args.collection_name}").raise_for_status()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "dataset": data.name,
+                "distance": distance,
+                "results": [asdict(r) for r in results],
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
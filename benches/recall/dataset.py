@@ -0,0 +1,72 @@
+"""
+Datasets for the recall benchmark: synthetic, or loaded from ANN-benchmark style files.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+# Names used by ann-benchmarks for the `distance` attribute of its HDF5 files
+ANN_BENCHMARKS_DISTANCES = {
+    "angular": "Cosine",
+    "euclidean": "Euclid",
+    "dot": "Dot",
+}
+
+
+@dataclass
+class Dataset:
+    name: str
+    vectors: np.ndarray
+    queries: np.ndarray
+    # `None` if the dataset does not define it
+    distance: str = None
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+
+def synthetic(n: int, n_queries: int, dim: int, clusters: int = 0, seed: int = 42) -> Dataset:
+    """
+    Uniform vectors, or a mixture of `clusters` gaussian blobs, closer to embeddings of real data
+    """
+    rng = np.random.default_rng(seed)
+    if clusters > 0:
+        centers = rng.normal(0, 1, (clusters, dim))
+        vectors = centers[rng.integers(0, clusters, n)] + rng.normal(0, 0.3, (n, dim))
+        queries = centers[rng.integers(0, clusters, n_queries)] + rng.normal(0, 0.3, (n_queries, dim))
+    else:
+        vectors = rng.uniform(-1, 1, (n, dim))
+        queries = rng.uniform(-1, 1, (n_queries, dim))
+    name = f"synthetic-{n}x{dim}" + (f"-{clusters}clusters" if clusters else "")
+    return Dataset(name, vectors.astype(np.float32), queries.astype(np.float32))
+
+
+def read_fvecs(path: str) -> np.ndarray:
+    """
+    TEXMEX format (SIFT, GIST): every vector is prefixed by its dimension as int32
+    """
+    raw = np.fromfile(path, dtype=np.int32)
+    dim = raw[0]
+    return raw.reshape(-1, dim + 1)[:, 1:].copy().view(np.float32)
+
+
+def load(path: str, queries_path: str = None) -> Dataset:
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith((".hdf5", ".h5")):
+        import h5py
+
+        with h5py.File(path, "r") as f:
+            distance = ANN_BENCHMARKS_DISTANCES.get(f.attrs.get("distance"))
+            return Dataset(name, np.asarray(f["train"], dtype=np.float32), np.asarray(f["test"], dtype=np.float32),
+                           distance)
+    if path.endswith(".fvecs"):
+        if queries_path is None:
+            raise ValueError("Queries of a .fvecs dataset must be given with a separate file")
+        return Dataset(name, read_fvecs(path), read_fvecs(queries_path))
+    if path.endswith(".npy"):
+        if queries_path is None:
+            raise ValueError("Queries of a .npy dataset must be given with a separate file")
+        return Dataset(name, np.load(path).astype(np.float32), np.load(queries_path).astype(np.float32))
+    raise ValueError(f"Unsupported dataset format {path}, expected .hdf5, .fvecs or .npy")
@@ -0,0 +1,60 @@
+"""
+Exact nearest neighbours with NumPy, using the same similarity as Qdrant for each `Distance`.
+"""
+import numpy as np
+
+# Number of dataset vectors scored at once, bounds the size of the score matrix
+CHUNK_SIZE = 65536
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def scores(queries: np.ndarray, vectors: np.ndarray, distance: str) -> np.ndarray:
+    """
+    :return: similarity of every query to every vector, higher is closer
+    """
+    if distance == "Dot":
+        return queries @ vectors.T
+    if distance == "Cosine":
+        # Qdrant normalizes vectors on insertion and uses the dot product
+        return normalize(queries) @ normalize(vectors).T
+    if distance == "Euclid":
+        # -|q - v|^2 without the constant |q|^2 term
+        return 2 * (queries @ vectors.T) - (vectors * vectors).sum(axis=1)
+    raise ValueError(f"Unknown distance {distance}")
+
+
+def exact_top_k(queries: np.ndarray, vectors: np.ndarray, distance: str, k: int) -> np.ndarray:
+    """
+    :return: indices of the `k` closest vectors to each query, closest first
+
+    >>> vectors = np.array([[0.0, 1.0], [1.0, 0.0], [1.0, 1.0]], dtype=np.float32)
+    >>> exact_top_k(np.array([[1.0, 0.1]], dtype=np.float32), vectors, "Euclid", 2).tolist()
+    [[1, 2]]
+    >>> exact_top_k(np.array([[1.0, 0.1]], dtype=np.float32), vectors, "Dot", 2).tolist()
+    [[2, 1]]
+    """
+    queries = queries.astype(np.float64)
+    best_scores = np.full((len(queries), 0), -np.inf)
+    best_indices = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), CHUNK_SIZE):
+        chunk = vectors[start:start + CHUNK_SIZE].astype(np.float64)
+        chunk_scores = scores(queries, chunk, distance)
+        top = min(k, chunk_scores.shape[1])
+        chunk_top = np.argpartition(-chunk_scores, top - 1, axis=1)[:, :top]
+        candidates_scores = np.concatenate([best_scores, np.take_along_axis(chunk_scores, chunk_top, axis=1)], axis=1)
+        candidates_indices = np.concatenate([best_indices, chunk_top + start], axis=1)
+        order = np.argsort(-candidates_scores, axis=1, kind="stable")[:, :k]
+        best_scores = np.take_along_axis(candidates_scores, order, axis=1)
+        best_indices = np.take_along_axis(candidates_indices, order, axis=1)
+    return best_indices
+
+
+def recall(found: list, expected: np.ndarray) -> float:
+    """
+    Fraction of the exact top-k found by the search
+    """
+    return len(set(found) & set(expected.tolist())) / len(expected)
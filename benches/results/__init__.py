@@ -0,0 +1,6 @@
+"""
+Versioned store of benchmark results, and comparison of runs with significance tests.
+"""
+from .compare import Comparison, compare_runs, mann_whitney_u
+from .ingest import Measurement, ingest
+from .store import ResultsStore, Run
@@ -0,0 +1,91 @@
+import argparse
+import json
+import sys
+import time
+
+from .compare import DEFAULT_ALPHA, DEFAULT_THRESHOLD, compare_runs, format_comparisons
+from .ingest import ingest
+from .store import DEFAULT_STORE, ResultsStore
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        "results",
+        description="Store benchmark results and compare runs, exits with 1 if a run regressed",
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Folder of the stored runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Ingest benchmark outputs as a new run")
+    add.add_argument("--label", help="Name of the run, e.g. a version")
+    add.add_argument("--commit", help="Git commit of the run, the current HEAD by default")
+    add.add_argument("--criterion", action="append", default=[], help="Criterion output folder, e.g. target/criterion")
+    add.add_argument("--k6", action="append", default=[], help="k6 JSON summary, or a folder of them")
+    add.add_argument("--loadgen", action="append", default=[], help="loadgen --output file, or a folder of them")
+    add.add_argument("--consensus", action="append", default=[],
+                     help="Result of tests/consensus_benchmarks, or a folder of them")
+
+    commands.add_parser("list", help="List the stored runs")
+
+    compare = commands.add_parser("compare", help="Compare a run to a baseline")
+    compare.add_argument("baseline", help="Run id, label, commit, or latest~N")
+    compare.add_argument("candidate", nargs="?", default="latest", help="Run id, label, commit, or latest~N")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD * 100,
+                         help="Relative change in percent above which a measurement regresses")
+    compare.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                         help="Significance level of the test, for measurements with samples")
+    compare.add_argument("--filter", help="Only compare measurements containing this string")
+    compare.add_argument("--only-changes", action="store_true", help="Only print regressions and improvements")
+    compare.add_argument("--output", help="Write the comparison to a JSON file")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    store = ResultsStore(args.store)
+
+    if args.command == "add":
+        measurements = ingest(args.criterion, args.k6, args.loadgen, args.consensus)
+        if not measurements:
+            print("No measurements found")
+            return 1
+        run = store.add(measurements, label=args.label, commit=args.commit)
+        print(f"Stored run {run.id} with {len(measurements)} measurements")
+        return 0
+
+    if args.command == "list":
+        for run in store.runs():
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(run.timestamp))
+            print(f"{run.id:<50} {started} {run.label or '':<20} {len(run.measurements):>6} measurements")
+        return 0
+
+    baseline, candidate = store.get(args.baseline), store.get(args.candidate)
+    if args.filter:
+        for run in (baseline, candidate):
+            run.measurements = {k: v for k, v in run.measurements.items() if args.filter in k}
+    comparisons = compare_runs(baseline, candidate, args.threshold / 100, args.alpha)
+    regressions = [c for c in comparisons if c.regression]
+
+    print(f"Baseline {baseline.id}, candidate {candidate.id}")
+    print(format_comparisons(comparisons, args.only_changes))
+    missing = sorted(set(baseline.measurements) - set(candidate.measurements))
+    if missing:
+        print(f"{len(missing)} measurements of the baseline are missing in the candidate")
+    print(f"{len(regressions)} regressions, "
+          f"{sum(1 for c in comparisons if c.improvement)} improvements out of {len(comparisons)} measurements")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "baseline": baseline.id,
+                "candidate": candidate.id,
+                "threshold": args.threshold / 100,
+                "alpha": args.alpha,
+                "comparisons": [c.to_json() for c in comparisons],
+                "missing": missing,
+            }, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Comparison of two runs of the results store.
+
+A measurement regresses if it got worse by more than the threshold and, when both runs
+have samples of it, the difference is statistically significant (two-sided Mann-Whitney U test).
+Without samples the threshold alone decides.
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .ingest import Measurement
+from .store import Run
+
+DEFAULT_THRESHOLD = 0.05
+DEFAULT_ALPHA = 0.05
+
+
+def rank(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks starting at 1, ties get the average of their ranks
+    """
+    order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+    # boundaries of the groups of equal values
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    ranks = np.empty(len(values))
+    for start, end in zip(starts, ends):
+        ranks[order[start:end]] = (start + end + 1) / 2
+    return ranks
+
+
+def mann_whitney_u(x: Sequence[float], y: Sequence[float]) -> float:
+    """
+    Two-sided p-value of the Mann-Whitney U test, normal approximation with tie correction.
+
+    >>> round(mann_whitney_u(range(20), range(20)), 3)
+    1.0
+    >>> mann_whitney_u(range(20), range(100, 120)) < 0.001
+    True
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    ranks = rank(np.concatenate([x, y]))
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+
+    n = n1 + n2
+    _, tie_counts = np.unique(np.concatenate([x, y]), return_counts=True)
+    tie_term = ((tie_counts ** 3 - tie_counts).sum()) / (n * (n - 1))
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        # all values are equal
+        return 1.0
+    # continuity correction
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+@dataclass
+class Comparison:
+    name: str
+    unit: str
+    baseline: float
+    candidate: float
+    # relative change, positive is worse
+    change: float
+    p_value: Optional[float]
+    regression: bool
+    improvement: bool
+
+    def to_json(self) -> dict:
+        return dict(self.__dict__)
+
+
+def compare_measurements(baseline: Measurement, candidate: Measurement, threshold: float,
+                         alpha: float) -> Comparison:
+    if baseline.value == 0:
+        change = 0.0 if candidate.value == 0 else math.copysign(math.inf, candidate.value)
+    else:
+        change = (candidate.value - baseline.value) / abs(baseline.value)
+    if baseline.higher_is_better:
+        change = -change
+
+    p_value = None
+    if baseline.samples and candidate.samples:
+        p_value = mann_whitney_u(baseline.samples, candidate.samples)
+    significant = p_value is None or p_value < alpha
+
+    return Comparison(
+        name=baseline.name,
+        unit=baseline.unit,
+        baseline=baseline.value,
+        candidate=candidate.value,
+        change=change,
+        p_value=p_value,
+        regression=change > threshold and significant,
+        improvement=change < -threshold and significant,
+    )
+
+
+def compare_runs(baseline: Run, candidate: Run, threshold: float = DEFAULT_THRESHOLD,
+                 alpha: float = DEFAULT_ALPHA) -> List[Comparison]:
+    """
+    Comparisons of the measurements of both runs
+    """
+    return [
+        compare_measurements(measurement, candidate.measurements[name], threshold, alpha)
+        for name, measurement in sorted(baseline.measurements.items())
+        if name in candidate.measurements
+    ]
+
+
+def format_comparisons(comparisons: List[Comparison], only_changes: bool = False) -> str:
+    lines = [f"{'measurement':<70} {'baseline':>12} {'candidate':>12} {'change':>8} {'p-value':>8} {'unit':<6}"]
+    for c in comparisons:
+        if only_changes and not (c.regression or c.improvement):
+            continue
+        status = "REGRESSION" if c.regression else "improved" if c.improvement else ""
+        p_value = "-" if c.p_value is None else f"{c.p_value:.3f}"
+        # shown as the change of the value, the sign of `change` is about better or worse
+        value_change = (c.candidate - c.baseline) / abs(c.baseline) * 100 if c.baseline else math.inf
+        lines.append(f"{c.name:<70} {c.baseline:>12.4g} {c.candidate:>12.4g} {value_change:>+7.1f}% "
+                     f"{p_value:>8} {c.unit:<6} {status}")
+    return "\n".join(lines)
@@ -0,0 +1,170 @@
+"""
+Parsers of the outputs of the different benchmarks into measurements.
+
+Supported inputs:
+
+* Criterion - `target/criterion` folder, `new/estimates.json` and `new/sample.json` of every benchmark
+* k6 - `--summary-export` files, or JSON written from `handleSummary`
+* loadgen - `--output` files of `benches/service/loadgen`, with HDR histograms of the latencies
+* consensus benchmarks - result files of `tests/consensus_benchmarks`
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from hdrh.histogram import HdrHistogram
+
+# Samples kept from a histogram, enough for significance tests without bloating the store
+MAX_HISTOGRAM_SAMPLES = 10_000
+
+K6_TREND_STATS = ("avg", "med", "p(90)", "p(95)", "max")
+
+# Metrics of the consensus benchmarks are lower-is-better, unless their name says otherwise
+HIGHER_IS_BETTER_SUFFIXES = ("_per_sec", "_ratio", "_points", "_count")
+# Units of the consensus benchmark metrics, from the end of their name
+UNIT_SUFFIXES = (("_per_sec", "1/s"), ("_sec", "s"), ("_ms", "ms"), ("_bytes", "B"), ("_ratio", "ratio"))
+
+
+@dataclass
+class Measurement:
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = False
+    # Individual observations behind the value, if known, used for significance tests
+    samples: Optional[List[float]] = None
+
+    def to_json(self) -> dict:
+        result = {"value": self.value, "unit": self.unit, "higher_is_better": self.higher_is_better}
+        if self.samples is not None:
+            result["samples"] = self.samples
+        return result
+
+    @classmethod
+    def from_json(cls, name: str, data: dict) -> "Measurement":
+        return cls(name, data["value"], data["unit"], data.get("higher_is_better", False), data.get("samples"))
+
+
+def read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def file_stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def criterion(criterion_dir: str) -> Iterator[Measurement]:
+    """
+    Mean time per iteration of every benchmark, with the per-iteration time of every sample
+    """
+    for root, dirs, files in os.walk(criterion_dir):
+        # `base` and `change` hold the previous run and its comparison, only the latest run is ingested
+        if os.path.basename(root) != "new" or "estimates.json" not in files:
+            continue
+        estimates = read_json(os.path.join(root, "estimates.json"))
+        if "benchmark.json" in files:
+            full_id = read_json(os.path.join(root, "benchmark.json"))["full_id"]
+        else:
+            full_id = os.path.relpath(os.path.dirname(root), criterion_dir).replace(os.sep, "/")
+
+        samples = None
+        if "sample.json" in files:
+            sample = read_json(os.path.join(root, "sample.json"))
+            samples = (np.array(sample["times"]) / np.array(sample["iters"])).tolist()
+        yield Measurement(f"criterion/{full_id}", estimates["mean"]["point_estimate"], "ns", samples=samples)
+
+
+def k6(path: str) -> Iterator[Measurement]:
+    """
+    Trend statistics of the durations, rates of the counters
+    """
+    prefix = f"k6/{file_stem(path)}"
+    for name, metric in read_json(path)["metrics"].items():
+        # `handleSummary` data nests the values, `--summary-export` does not
+        values = metric.get("values", metric)
+        if "avg" in values:
+            for stat in K6_TREND_STATS:
+                if stat in values:
+                    yield Measurement(f"{prefix}/{name}/{stat}", values[stat], "ms")
+        elif "count" in values and "rate" in values:
+            yield Measurement(f"{prefix}/{name}/rate", values["rate"], "1/s", higher_is_better=True)
+        elif "rate" in values or "value" in values:
+            # ratio of the checks passed, or of the failed requests
+            value = values.get("rate", values.get("value"))
+            yield Measurement(f"{prefix}/{name}/rate", value, "ratio", higher_is_better=name == "checks")
+
+
+def histogram_samples(encoded: str, max_samples: int = MAX_HISTOGRAM_SAMPLES) -> List[float]:
+    """
+    Values recorded in an encoded HDR histogram, downsampled proportionally to their counts
+    """
+    histogram = HdrHistogram.decode(encoded)
+    values, counts = [], []
+    for item in histogram.get_recorded_iterator():
+        values.append(item.value_iterated_to)
+        counts.append(item.count_at_value_iterated_to)
+    counts = np.array(counts, dtype=np.float64)
+    if counts.sum() > max_samples:
+        counts = np.round(counts * max_samples / counts.sum())
+    return np.repeat(np.array(values, dtype=np.float64), counts.astype(np.int64)).tolist()
+
+
+def loadgen(path: str) -> Iterator[Measurement]:
+    prefix = f"loadgen/{file_stem(path)}"
+    for operation, stats in read_json(path)["operations"].items():
+        name = f"{prefix}/{operation}"
+        yield Measurement(f"{name}/rps", stats["rps"], "1/s", higher_is_better=True)
+        yield Measurement(f"{name}/error_rate", stats["errors"] / max(stats["count"], 1), "ratio")
+        samples = None
+        if "histogram" in stats:
+            # recorded in microseconds
+            samples = [value / 1000 for value in histogram_samples(stats["histogram"])]
+        yield Measurement(f"{name}/mean", stats["mean_ms"], "ms", samples=samples)
+        for percentile, value in stats["percentiles_ms"].items():
+            yield Measurement(f"{name}/p{percentile}", value, "ms")
+
+
+def consensus_benchmark(path: str) -> Iterator[Measurement]:
+    result = read_json(path)
+    # one result file per run, the benchmark name identifies it
+    prefix = f"consensus/{result['benchmark']}"
+    for name, value in result["metrics"].items():
+        if value is None:
+            continue
+        unit = next((unit for suffix, unit in UNIT_SUFFIXES if name.endswith(suffix)), "")
+        higher_is_better = name.endswith(HIGHER_IS_BETTER_SUFFIXES)
+        yield Measurement(f"{prefix}/{name}", float(value), unit, higher_is_better=higher_is_better)
+
+
+def json_files(path: str) -> List[str]:
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json"))
+    return [path]
+
+
+def ingest(criterion_dirs=(), k6_files=(), loadgen_files=(), consensus_files=()) -> Dict[str, Measurement]:
+    """
+    All measurements of the given outputs, by name. Folders of JSON files are accepted for all but Criterion.
+    """
+    measurements = {}
+
+    def add(items: Iterator[Measurement]):
+        for measurement in items:
+            measurements[measurement.name] = measurement
+
+    for path in criterion_dirs:
+        add(criterion(path))
+    for path in k6_files:
+        for file in json_files(path):
+            add(k6(file))
+    for path in loadgen_files:
+        for file in json_files(path):
+            add(loadgen(file))
+    for path in consensus_files:
+        # files are sorted by time, the latest run of a benchmark wins
+        for file in json_files(path):
+            add(consensus_benchmark(file))
+    return measurements
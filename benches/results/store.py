@@ -0,0 +1,109 @@
+"""
+Results store: one JSON file per run in a folder, identified by time, git commit and an optional label.
+"""
+import json
+import os
+import socket
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .ingest import Measurement
+
+# Version of the run files, increased on incompatible changes
+FORMAT_VERSION = 1
+
+DEFAULT_STORE = "bench_results"
+
+
+@dataclass
+class Run:
+    id: str
+    timestamp: float
+    commit: Optional[str] = None
+    label: Optional[str] = None
+    host: Optional[str] = None
+    measurements: Dict[str, Measurement] = field(default_factory=dict)
+
+    def to_json(self) -> dict:
+        return {
+            "format": FORMAT_VERSION,
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "commit": self.commit,
+            "label": self.label,
+            "host": self.host,
+            "measurements": {name: m.to_json() for name, m in sorted(self.measurements.items())},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Run":
+        if data.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format {data.get('format')} of run {data.get('id')}")
+        return cls(
+            id=data["id"],
+            timestamp=data["timestamp"],
+            commit=data.get("commit"),
+            label=data.get("label"),
+            host=data.get("host"),
+            measurements={name: Measurement.from_json(name, m) for name, m in data["measurements"].items()},
+        )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ResultsStore:
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = path
+
+    def add(self, measurements: Dict[str, Measurement], label: Optional[str] = None,
+            commit: Optional[str] = None) -> Run:
+        timestamp = time.time()
+        commit = commit or git_commit()
+        run_id = time.strftime("%Y%m%d-%H%M%S", time.gmtime(timestamp))
+        if commit:
+            run_id += f"-{commit[:8]}"
+        if label:
+            run_id += f"-{label}"
+        run = Run(run_id, timestamp, commit, label, socket.gethostname(), measurements)
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, f"{run_id}.json"), "w") as f:
+            json.dump(run.to_json(), f)
+        return run
+
+    def runs(self) -> List[Run]:
+        """
+        All runs, oldest first
+        """
+        if not os.path.isdir(self.path):
+            return []
+        runs = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                with open(os.path.join(self.path, name)) as f:
+                    runs.append(Run.from_json(json.load(f)))
+        return sorted(runs, key=lambda run: run.timestamp)
+
+    def get(self, ref: str) -> Run:
+        """
+        :param ref: run id, label, commit prefix, `latest` or `latest~N` for the N-th run before the latest.
+            Labels and commits resolve to their latest run.
+        """
+        runs = self.runs()
+        if not runs:
+            raise KeyError(f"No runs in {self.path}")
+        if ref == "latest" or ref.startswith("latest~"):
+            back = int(ref.partition("~")[2] or 0)
+            if back >= len(runs):
+                raise KeyError(f"Only {len(runs)} runs in {self.path}")
+            return runs[-1 - back]
+        for run in reversed(runs):
+            if ref in (run.id, run.label) or (run.commit and len(ref) >= 7 and run.commit.startswith(ref)):
+                return run
+        raise KeyError(f"No run {ref} in {self.path}")
@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+
+# All arguments are passed to the results tool, see `--help`.
+# Paths are relative to the current directory.
+PYTHONPATH="$DIR${PYTHONPATH:+:$PYTHONPATH}" python3 -m results "$@"
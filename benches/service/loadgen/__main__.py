@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import tempfile
+
+from .clients import compile_protos, setup_collection, ssl_context
+from .runner import PERCENTILES, LoadConfig, run_load, summary
+from .workload import parse_mix
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        "loadgen",
+        description="Search/upsert load generator for the REST and gRPC API, reporting HDR latency percentiles",
+    )
+    parser.add_argument("--uri", default="http://localhost:6333", help="REST API uri")
+    parser.add_argument("--grpc-uri", default="localhost:6334", help="gRPC API host:port")
+    parser.add_argument("--protocol", choices=("rest", "grpc"), default="rest")
+    parser.add_argument("--collection-name", "--collection", default="loadgen_stress")
+    parser.add_argument("--mix", default="search=9,upsert=1", help="Weighted operations, e.g. search=9,upsert=1")
+    parser.add_argument("--mode", choices=("open", "closed"), default="closed",
+                        help="open: fixed arrival rate, closed: fixed number of requests in flight")
+    parser.add_argument("--rate", type=float, default=100.0, help="Total requests per second, open loop only")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per worker")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duration of the run in seconds")
+    parser.add_argument("--vector-size", type=int, default=128)
+    parser.add_argument("--upsert-batch", type=int, default=32, help="Points per upsert request")
+    parser.add_argument("--search-limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for deterministic runs")
+    parser.add_argument("--setup", action="store_true", help="Recreate the collection before the run")
+    parser.add_argument("--shard-number", type=int, default=1, help="Used with --setup")
+    parser.add_argument("--replication-factor", type=int, default=1, help="Used with --setup")
+    parser.add_argument("--tls-ca-cert", help="CA certificate of the server, enables TLS. Use an https --uri")
+    parser.add_argument("--tls-cert", help="Client certificate, if the server verifies clients")
+    parser.add_argument("--tls-key", help="Private key of the client certificate")
+    parser.add_argument("--new-connections", action="store_true",
+                        help="Open a new connection for every request, REST only, e.g. to measure TLS handshakes")
+    parser.add_argument("--output", help="Write the results, with encoded HDR histograms, to a JSON file")
+    return parser.parse_args()
+
+
+def print_summary(config: LoadConfig, report: dict):
+    print(f"{config.protocol} {config.mode} loop, {config.workers} workers, {report['elapsed_sec']:.1f}s")
+    header = ["operation", "count", "errors", "rps", "mean"] + [f"p{p:g}" for p in PERCENTILES] + ["max"]
+    print("".join(f"{h:>12}" for h in header))
+    for name, op in report["operations"].items():
+        row = [name, op["count"], op["errors"], f"{op['rps']:.1f}", f"{op['mean_ms']:.2f}"]
+        row += [f"{op['percentiles_ms'][str(p)]:.2f}" for p in PERCENTILES]
+        row += [f"{op['max_ms']:.2f}"]
+        print("".join(f"{str(v):>12}" for v in row))
+    print("latencies in ms")
+
+
+def main():
+    args = parse_args()
+
+    config = LoadConfig(
+        uri=args.uri,
+        grpc_uri=args.grpc_uri,
+        protocol=args.protocol,
+        collection_name=args.collection_name,
+        mix=parse_mix(args.mix),
+        mode=args.mode,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        duration=args.duration,
+        vector_size=args.vector_size,
+        upsert_batch=args.upsert_batch,
+        search_limit=args.search_limit,
+        seed=args.seed,
+        tls_ca_cert=args.tls_ca_cert,
+        tls_cert=args.tls_cert,
+        tls_key=args.tls_key,
+        new_connections=args.new_connections,
+    )
+
+    if args.setup:
+        setup_collection(args.uri, args.collection_name, args.vector_size, args.shard_number, args.replication_factor,
+                         ssl_context(args.tls_ca_cert, args.tls_cert, args.tls_key))
+
+    with tempfile.TemporaryDirectory() as stubs_dir:
+        if config.protocol == "grpc":
+            config.stubs_dir = compile_protos(stubs_dir)
+        result = run_load(config)
+
+    report = summary(result)
+    print_summary(config, report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(config).items() if k != "stubs_dir"}, **report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import importlib
+import os
+import ssl
+import sys
+from typing import List, Optional
+
+import httpx
+
+PROTO_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "lib", "api", "src", "grpc", "proto")
+PROTO_FILES = ["json_with_int.proto", "collections.proto", "points.proto", "points_service.proto"]
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip",
+}
+
+
+def read_file(path: Optional[str]) -> Optional[bytes]:
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def ssl_context(ca_cert: Optional[str], cert: Optional[str] = None,
+                key: Optional[str] = None) -> Optional[ssl.SSLContext]:
+    """
+    Context verifying the server against `ca_cert`, presenting the client certificate if given.
+    `None` without `ca_cert`, plain connections.
+    """
+    if ca_cert is None:
+        return None
+    context = ssl.create_default_context(cafile=ca_cert)
+    if cert is not None:
+        context.load_cert_chain(cert, key)
+    return context
+
+
+class RestClient:
+    def __init__(self, uri: str, collection_name: str, max_connections: int,
+                 tls: Optional[ssl.SSLContext] = None, keepalive: bool = True):
+        """
+        :param keepalive: if false, every request opens a new connection, e.g. to measure TLS handshakes
+        """
+        self.collection_name = collection_name
+        self.client = httpx.AsyncClient(
+            base_url=uri,
+            headers=HEADERS,
+            timeout=60,
+            verify=tls if tls is not None else True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections if keepalive else 0),
+        )
+
+    async def search(self, vector: List[float], city: str, limit: int):
+        r = await self.client.post(f"/collections/{self.collection_name}/points/search", json={
+            "vector": vector,
+            "filter": {"must": [{"key": "city", "match": {"value": city}}]},
+            "with_payload": True,
+            "limit": limit,
+        })
+        r.raise_for_status()
+
+    async def upsert(self, points: List[dict]):
+        r = await self.client.put(f"/collections/{self.collection_name}/points", json={"points": points})
+        r.raise_for_status()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def compile_protos(out_dir: str, proto_dir: str = PROTO_DIR) -> str:
+    """
+    Generate python gRPC stubs from the qdrant proto files into `out_dir`, once.
+    """
+    if not os.path.exists(os.path.join(out_dir, "points_service_pb2_grpc.py")):
+        from grpc_tools import protoc
+        import grpc_tools
+
+        os.makedirs(out_dir, exist_ok=True)
+        well_known_protos = os.path.join(os.path.dirname(grpc_tools.__file__), "_proto")
+        code = protoc.main([
+            "grpc_tools.protoc",
+            f"-I{proto_dir}",
+            f"-I{well_known_protos}",
+            f"--python_out={out_dir}",
+            f"--grpc_python_out={out_dir}",
+            *(os.path.join(proto_dir, proto_file) for proto_file in PROTO_FILES),
+        ])
+        if code != 0:
+            raise RuntimeError(f"Failed to compile proto files from {proto_dir}")
+    return out_dir
+
+
+class GrpcClient:
+    def __init__(self, uri: str, collection_name: str, stubs_dir: str, ca_cert: Optional[str] = None,
+                 cert: Optional[str] = None, key: Optional[str] = None):
+        import grpc
+
+        # generated modules import each other as top-level modules
+        if stubs_dir not in sys.path:
+            sys.path.append(stubs_dir)
+        self.points_pb2 = importlib.import_module("points_pb2")
+        self.json_with_int_pb2 = importlib.import_module("json_with_int_pb2")
+        points_service_pb2_grpc = importlib.import_module("points_service_pb2_grpc")
+
+        self.collection_name = collection_name
+        if ca_cert is None:
+            self.channel = grpc.aio.insecure_channel(uri)
+        else:
+            credentials = grpc.ssl_channel_credentials(read_file(ca_cert), read_file(key), read_file(cert))
+            self.channel = grpc.aio.secure_channel(uri, credentials)
+        self.stub = points_service_pb2_grpc.PointsStub(self.channel)
+
+    async def search(self, vector: List[float], city: str, limit: int):
+        pb = self.points_pb2
+        await self.stub.Search(pb.SearchPoints(
+            collection_name=self.collection_name,
+            vector=vector,
+            filter=pb.Filter(must=[
+                pb.Condition(field=pb.FieldCondition(key="city", match=pb.Match(keyword=city)))
+            ]),
+            with_payload=pb.WithPayloadSelector(enable=True),
+            limit=limit,
+        ))
+
+    async def upsert(self, points: List[dict]):
+        pb = self.points_pb2
+        value = self.json_with_int_pb2.Value
+        await self.stub.Upsert(pb.UpsertPoints(
+            collection_name=self.collection_name,
+            points=[
+                pb.PointStruct(
+                    id=pb.PointId(num=point["id"]),
+                    vectors=pb.Vectors(vector=pb.Vector(data=point["vector"])),
+                    payload={
+                        "city": value(string_value=point["payload"]["city"]),
+                        "count": value(integer_value=point["payload"]["count"]),
+                    },
+                ) for point in points
+            ],
+        ))
+
+    async def close(self):
+        await self.channel.close()
+
+
+def setup_collection(uri: str, collection_name: str, vector_size: int, shard_number: int, replication_factor: int,
+                     tls: Optional[ssl.SSLContext] = None):
+    """
+    Recreate the benchmark collection with a keyword index on `city`, same as `rest-upsert.js`.
+    """
+    with httpx.Client(base_url=uri, headers=HEADERS, timeout=60, verify=tls if tls is not None else True) as client:
+        client.delete(f"/collections/{collection_name}").raise_for_status()
+        client.put(f"/collections/{collection_name}", json={
+            "vectors": {"size": vector_size, "distance": "Cosine"},
+            "shard_number": shard_number,
+            "replication_factor": replication_factor,
+        }).raise_for_status()
+        client.put(f"/collections/{collection_name}/index?wait=true", json={
+            "field_name": "city",
+            "field_schema": "keyword",
+        }).raise_for_status()
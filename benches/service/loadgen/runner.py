@@ -0,0 +1,210 @@
+"""
+Load generation with a pool of processes, each running an asyncio event loop.
+
+Two modes are supported:
+
+* closed loop - every worker keeps `concurrency` requests in flight and sends
+  the next one as soon as the previous one finished. Latency is service time.
+* open loop - requests are scheduled at a fixed arrival rate, independently
+  of the responses. Latency is measured from the *intended* start time, so
+  queueing behind a slow request is accounted for and the percentiles are
+  not affected by coordinated omission.
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from hdrh.histogram import HdrHistogram
+
+from .clients import GrpcClient, RestClient, ssl_context
+from .workload import random_city, random_point, random_vector
+
+# Latencies are recorded in microseconds, from 1us to 1 hour with 3 significant digits
+LATENCY_MIN_US = 1
+LATENCY_MAX_US = 3_600_000_000
+LATENCY_SIGNIFICANT_DIGITS = 3
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def new_histogram() -> HdrHistogram:
+    return HdrHistogram(LATENCY_MIN_US, LATENCY_MAX_US, LATENCY_SIGNIFICANT_DIGITS)
+
+
+@dataclass
+class LoadConfig:
+    uri: str
+    grpc_uri: str
+    protocol: str
+    collection_name: str
+    mix: Dict[str, float]
+    mode: str = "closed"
+    # total requests per second over all workers, open loop only
+    rate: float = 100.0
+    # requests in flight per worker
+    concurrency: int = 8
+    workers: int = 1
+    duration: float = 60.0
+    vector_size: int = 128
+    upsert_batch: int = 32
+    search_limit: int = 100
+    seed: int = 42
+    stubs_dir: Optional[str] = None
+    # CA certificate of the server, enables TLS
+    tls_ca_cert: Optional[str] = None
+    # client certificate and key, if the server verifies clients
+    tls_cert: Optional[str] = None
+    tls_key: Optional[str] = None
+    # open a new connection for every request, REST only
+    new_connections: bool = False
+
+
+@dataclass
+class OperationStats:
+    histogram: HdrHistogram = field(default_factory=new_histogram)
+    errors: int = 0
+
+    @property
+    def count(self) -> int:
+        return self.histogram.get_total_count()
+
+
+@dataclass
+class WorkerResult:
+    # encoded HDR histograms, so they can be sent across processes
+    histograms: Dict[str, bytes]
+    errors: Dict[str, int]
+    elapsed: float
+
+
+class Worker:
+    def __init__(self, config: LoadConfig, worker_id: int):
+        self.config = config
+        self.rng = random.Random(config.seed + worker_id)
+        self.operations = list(config.mix.keys())
+        self.weights = list(config.mix.values())
+        self.stats = {name: OperationStats() for name in self.operations}
+        if config.protocol == "grpc":
+            self.client = GrpcClient(config.grpc_uri, config.collection_name, config.stubs_dir,
+                                     config.tls_ca_cert, config.tls_cert, config.tls_key)
+        else:
+            tls = ssl_context(config.tls_ca_cert, config.tls_cert, config.tls_key)
+            self.client = RestClient(config.uri, config.collection_name, config.concurrency, tls,
+                                     keepalive=not config.new_connections)
+
+    async def call(self, operation: str):
+        if operation == "search":
+            vector = random_vector(self.rng, self.config.vector_size)
+            await self.client.search(vector, random_city(self.rng), self.config.search_limit)
+        else:
+            points = [random_point(self.rng, self.config.vector_size) for _ in range(self.config.upsert_batch)]
+            await self.client.upsert(points)
+
+    async def timed_call(self, operation: str, start: float):
+        """
+        :param start: time the request is accounted from, `time.perf_counter()` based
+        """
+        stats = self.stats[operation]
+        try:
+            await self.call(operation)
+        except Exception:
+            stats.errors += 1
+            return
+        stats.histogram.record_value(max(int((time.perf_counter() - start) * 1_000_000), LATENCY_MIN_US))
+
+    def next_operation(self) -> str:
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    async def closed_loop(self, deadline: float):
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                await self.timed_call(self.next_operation(), time.perf_counter())
+
+        await asyncio.gather(*(client_loop() for _ in range(self.config.concurrency)))
+
+    async def open_loop(self, deadline: float):
+        interval = self.config.workers / self.config.rate
+        in_flight = asyncio.Semaphore(self.config.concurrency)
+
+        async def scheduled_call(operation: str, intended_start: float):
+            # waiting for a free slot is part of the latency
+            async with in_flight:
+                await self.timed_call(operation, intended_start)
+
+        tasks = []
+        start = time.perf_counter()
+        i = 0
+        while True:
+            intended_start = start + i * interval
+            if intended_start >= deadline:
+                break
+            delay = intended_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(scheduled_call(self.next_operation(), intended_start)))
+            i += 1
+        await asyncio.gather(*tasks)
+
+    async def run(self) -> WorkerResult:
+        start = time.perf_counter()
+        deadline = start + self.config.duration
+        try:
+            if self.config.mode == "open":
+                await self.open_loop(deadline)
+            else:
+                await self.closed_loop(deadline)
+        finally:
+            await self.client.close()
+        return WorkerResult(
+            histograms={name: stats.histogram.encode() for name, stats in self.stats.items()},
+            errors={name: stats.errors for name, stats in self.stats.items()},
+            elapsed=time.perf_counter() - start,
+        )
+
+
+def run_worker(config: LoadConfig, worker_id: int) -> WorkerResult:
+    async def run() -> WorkerResult:
+        # clients have to be created inside of the event loop they are used in
+        return await Worker(config, worker_id).run()
+
+    return asyncio.run(run())
+
+
+@dataclass
+class LoadResult:
+    stats: Dict[str, OperationStats]
+    elapsed: float
+
+
+def run_load(config: LoadConfig) -> LoadResult:
+    with ProcessPoolExecutor(max_workers=config.workers) as executor:
+        futures = [executor.submit(run_worker, config, worker_id) for worker_id in range(config.workers)]
+        results = [future.result() for future in futures]
+
+    stats = {name: OperationStats() for name in config.mix}
+    for result in results:
+        for name, encoded in result.histograms.items():
+            stats[name].histogram.decode_and_add(encoded)
+            stats[name].errors += result.errors[name]
+    return LoadResult(stats=stats, elapsed=max(result.elapsed for result in results))
+
+
+def summary(result: LoadResult) -> dict:
+    operations = {}
+    for name, stats in result.stats.items():
+        histogram = stats.histogram
+        operations[name] = {
+            "count": stats.count,
+            "errors": stats.errors,
+            "rps": stats.count / result.elapsed if result.elapsed else 0.0,
+            "mean_ms": histogram.get_mean_value() / 1000,
+            "max_ms": histogram.get_max_value() / 1000,
+            "percentiles_ms": {
+                str(p): histogram.get_value_at_percentile(p) / 1000 for p in PERCENTILES
+            },
+            "histogram": histogram.encode().decode(),
+        }
+    return {"elapsed_sec": result.elapsed, "operations": operations}
@@ -0,0 +1,367 @@
+"""
+Cost of TLS, for the client API and for the communication between peers.
+
+A local cluster is started for every TLS configuration:
+
+* `plain` - no TLS
+* `service` - `service.enable_tls`, REST and gRPC API
+* `p2p` - `cluster.p2p.enable_tls`, forwarded requests, replication and consensus
+* `all` - both
+
+and the same search/upsert load runs against it, over REST and over gRPC. Reported per run:
+throughput and latency percentiles, and the CPU time of all peers per request (`/proc/<pid>/stat`).
+
+Handshake costs are measured separately:
+
+* `rest_new_connections` - the REST load, with a new connection for every request
+* `p2p_reconnect` - a peer is restarted, and the latency of the first searches through the first peer is
+  recorded while its `TransportChannelPool` connects to the restarted peer again
+
+Certificates for `localhost` are generated with `openssl`, like `tests/tls/gen.sh`.
+
+    python3 -m loadgen.tls_overhead --qdrant ../../target/release/qdrant --output-dir tls-results
+
+Every run is written as a `--output` file of the load generator, `<config>-<run>.json`, so the folder
+can be ingested with `benches/run_results.sh add --loadgen tls-results`. The files also contain
+the CPU time of the peers and the reconnect latencies of the configuration.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import closing
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+import httpx
+import numpy as np
+
+from .clients import compile_protos, setup_collection, ssl_context
+from .runner import LoadConfig, run_load, summary
+from .workload import parse_mix
+
+# service TLS, p2p TLS
+TLS_CONFIGS = {
+    "plain": (False, False),
+    "service": (True, False),
+    "p2p": (False, True),
+    "all": (True, True),
+}
+
+COLLECTION_NAME = "tls_overhead"
+START_TIMEOUT_SEC = 60
+RECONNECT_SEARCHES = 20
+
+CERT_CONFIG = """[req]
+distinguished_name = req_distinguished_name
+req_extensions = v3_req
+prompt = no
+[req_distinguished_name]
+CN = localhost
+[v3_req]
+basicConstraints = CA:FALSE
+keyUsage = digitalSignature, keyEncipherment
+extendedKeyUsage = clientAuth, serverAuth
+subjectAltName = DNS:localhost, IP:127.0.0.1
+"""
+
+
+@dataclass
+class Certificates:
+    ca_cert: str
+    cert: str
+    key: str
+
+
+def generate_certificates(out_dir: str) -> Certificates:
+    """
+    Self-signed CA, and a certificate of `localhost` signed by it
+    """
+
+    def path(name: str) -> str:
+        return os.path.join(out_dir, name)
+
+    with open(path("cert.cfg"), "w") as f:
+        f.write(CERT_CONFIG)
+    commands = [
+        ["openssl", "req", "-new", "-newkey", "rsa:2048", "-days", "1", "-nodes", "-x509", "-subj", "/CN=qdrant-ca",
+         "-keyout", path("cakey.pem"), "-out", path("cacert.pem")],
+        ["openssl", "genrsa", "-out", path("key.pem"), "2048"],
+        ["openssl", "req", "-new", "-key", path("key.pem"), "-out", path("cert.csr"), "-config", path("cert.cfg")],
+        ["openssl", "x509", "-req", "-days", "1", "-in", path("cert.csr"), "-CA", path("cacert.pem"),
+         "-CAkey", path("cakey.pem"), "-CAcreateserial", "-extensions", "v3_req", "-extfile", path("cert.cfg"),
+         "-out", path("cert.pem")],
+    ]
+    for command in commands:
+        subprocess.run(command, check=True, capture_output=True)
+    return Certificates(path("cacert.pem"), path("cert.pem"), path("key.pem"))
+
+
+def free_port() -> int:
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> float:
+    """
+    User and system CPU time of a process
+    """
+    with open(f"/proc/{pid}/stat") as f:
+        # the command name may contain spaces, fields are counted from its closing parenthesis
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+@dataclass
+class Peer:
+    dir: str
+    http_port: int
+    grpc_port: int
+    p2p_port: int
+    process: Optional[subprocess.Popen] = None
+
+
+class LocalCluster:
+    def __init__(self, executable: str, work_dir: str, n_peers: int, service_tls: bool, p2p_tls: bool,
+                 certificates: Certificates):
+        self.executable = executable
+        self.n_peers = n_peers
+        self.service_tls = service_tls
+        self.p2p_tls = p2p_tls
+        self.certificates = certificates
+        self.peers = []
+        for i in range(n_peers):
+            peer_dir = os.path.join(work_dir, f"peer_{i}")
+            os.makedirs(peer_dir)
+            self.peers.append(Peer(peer_dir, free_port(), free_port(), free_port()))
+        self.tls = ssl_context(certificates.ca_cert) if service_tls else None
+        self.client = httpx.Client(timeout=60, verify=self.tls if self.tls is not None else True)
+
+    def api_uri(self, i: int) -> str:
+        return f"{'https' if self.service_tls else 'http'}://localhost:{self.peers[i].http_port}"
+
+    def grpc_uri(self, i: int) -> str:
+        return f"localhost:{self.peers[i].grpc_port}"
+
+    def p2p_uri(self, i: int) -> str:
+        return f"{'https' if self.p2p_tls else 'http'}://localhost:{self.peers[i].p2p_port}"
+
+    def start_peer(self, i: int):
+        peer = self.peers[i]
+        env = {
+            **os.environ,
+            "QDRANT__CLUSTER__ENABLED": "true",
+            "QDRANT__CLUSTER__P2P__PORT": str(peer.p2p_port),
+            "QDRANT__CLUSTER__P2P__ENABLE_TLS": str(self.p2p_tls).lower(),
+            "QDRANT__SERVICE__HTTP_PORT": str(peer.http_port),
+            "QDRANT__SERVICE__GRPC_PORT": str(peer.grpc_port),
+            "QDRANT__SERVICE__ENABLE_TLS": str(self.service_tls).lower(),
+            "QDRANT__TLS__CERT": self.certificates.cert,
+            "QDRANT__TLS__KEY": self.certificates.key,
+            "QDRANT__TLS__CA_CERT": self.certificates.ca_cert,
+            "QDRANT__TELEMETRY_DISABLED": "true",
+        }
+        args = [self.executable, "--uri", self.p2p_uri(i)]
+        if i > 0:
+            args += ["--bootstrap", self.p2p_uri(0)]
+        with open(os.path.join(peer.dir, "qdrant.log"), "a") as log:
+            peer.process = subprocess.Popen(args, env=env, cwd=peer.dir, stderr=log, start_new_session=True)
+        self.wait_ready(i)
+
+    def wait_ready(self, i: int):
+        """
+        Wait until the peer serves requests and knows all peers
+        """
+        start = time.time()
+        while time.time() - start < START_TIMEOUT_SEC:
+            if self.peers[i].process.poll() is not None:
+                raise Exception(f"Peer {i} exited with {self.peers[i].process.returncode}, see {self.peers[i].dir}")
+            try:
+                r = self.client.get(f"{self.api_uri(i)}/cluster")
+                if r.is_success and len(r.json()["result"]["peers"]) >= i + 1:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise Exception(f"Peer {i} is not ready after {START_TIMEOUT_SEC} seconds")
+
+    def start(self):
+        # one at a time, joining peers need the previous ones in the cluster
+        for i in range(self.n_peers):
+            self.start_peer(i)
+
+    def stop_peer(self, i: int):
+        process = self.peers[i].process
+        if process is None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+        self.peers[i].process = None
+
+    def stop(self):
+        for i in range(self.n_peers):
+            self.stop_peer(i)
+        self.client.close()
+
+    def cpu_seconds(self) -> float:
+        return sum(cpu_seconds(peer.process.pid) for peer in self.peers)
+
+
+def run_measured(cluster: LocalCluster, config: LoadConfig) -> dict:
+    cpu_start = cluster.cpu_seconds()
+    report = summary(run_load(config))
+    cpu_sec = cluster.cpu_seconds() - cpu_start
+    requests_count = sum(operation["count"] for operation in report["operations"].values())
+    report["peers_cpu_sec"] = cpu_sec
+    report["cpu_ms_per_request"] = cpu_sec * 1000 / max(requests_count, 1)
+    return report
+
+
+def measure_reconnect(cluster: LocalCluster, vector_size: int) -> dict:
+    """
+    Latency of the first searches through the first peer, after the last peer restarted
+    """
+    restarted = cluster.n_peers - 1
+    cluster.stop_peer(restarted)
+    cluster.start_peer(restarted)
+
+    rng = np.random.default_rng(42)
+    latencies_ms = []
+    for _ in range(RECONNECT_SEARCHES):
+        start = time.perf_counter()
+        r = cluster.client.post(f"{cluster.api_uri(0)}/collections/{COLLECTION_NAME}/points/search", json={
+            "vector": rng.random(vector_size).tolist(),
+            "limit": 10,
+        })
+        r.raise_for_status()
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        "first_ms": latencies_ms[0],
+        "steady_p50_ms": float(np.median(latencies_ms[1:])),
+        "latencies_ms": latencies_ms,
+    }
+
+
+def run_config(name: str, args: argparse.Namespace, certificates: Certificates, stubs_dir: Optional[str]) -> dict:
+    service_tls, p2p_tls = TLS_CONFIGS[name]
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        cluster = LocalCluster(args.qdrant, work_dir, args.peers, service_tls, p2p_tls, certificates)
+        try:
+            cluster.start()
+            setup_collection(cluster.api_uri(0), COLLECTION_NAME, args.vector_size, args.peers,
+                             args.replication_factor, cluster.tls)
+            base = LoadConfig(
+                uri=cluster.api_uri(0),
+                grpc_uri=cluster.grpc_uri(0),
+                protocol="rest",
+                collection_name=COLLECTION_NAME,
+                mix=parse_mix("upsert"),
+                concurrency=args.concurrency,
+                workers=args.workers,
+                duration=args.preload,
+                vector_size=args.vector_size,
+                stubs_dir=stubs_dir,
+                tls_ca_cert=certificates.ca_cert if service_tls else None,
+            )
+            print(f"[{name}] preloading for {args.preload}s")
+            run_load(base)
+
+            runs = {}
+            mix = parse_mix(args.mix)
+            for protocol in args.protocols:
+                print(f"[{name}] {protocol} load for {args.duration}s")
+                runs[protocol] = run_measured(cluster, replace(base, protocol=protocol, mix=mix,
+                                                               duration=args.duration))
+            print(f"[{name}] REST load with a new connection per request for {args.duration}s")
+            runs["rest_new_connections"] = run_measured(cluster, replace(base, mix=mix, duration=args.duration,
+                                                                         new_connections=True))
+            print(f"[{name}] restarting peer {args.peers - 1}")
+            reconnect = measure_reconnect(cluster, args.vector_size)
+        finally:
+            cluster.stop()
+    return {"service_tls": service_tls, "p2p_tls": p2p_tls, "runs": runs, "p2p_reconnect": reconnect}
+
+
+def print_results(results: Dict[str, dict]):
+    header = f"{'config':<10} {'run':<22} {'rps':>10} {'p50 ms':>8} {'p99 ms':>8} {'cpu ms/req':>11} {'vs plain':>9}"
+    print(header)
+    plain = results.get("plain")
+    for name, result in results.items():
+        for run, report in result["runs"].items():
+            # the first operation of the mix is representative of the run
+            operation = next(iter(report["operations"].values()))
+            rps = sum(op["rps"] for op in report["operations"].values())
+            overhead = ""
+            if plain is not None and run in plain["runs"]:
+                plain_cpu = plain["runs"][run]["cpu_ms_per_request"]
+                if plain_cpu > 0:
+                    overhead = f"{(report['cpu_ms_per_request'] / plain_cpu - 1) * 100:+.1f}%"
+            print(f"{name:<10} {run:<22} {rps:>10.1f} {operation['percentiles_ms']['50.0']:>8.2f} "
+                  f"{operation['percentiles_ms']['99.0']:>8.2f} {report['cpu_ms_per_request']:>11.3f} {overhead:>9}")
+        reconnect = result["p2p_reconnect"]
+        print(f"{name:<10} {'p2p_reconnect':<22} first search {reconnect['first_ms']:.2f} ms, "
+              f"then p50 {reconnect['steady_p50_ms']:.2f} ms")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        "tls_overhead",
+        description="Throughput and CPU cost of TLS for the API and between peers, on a local cluster",
+    )
+    parser.add_argument("--qdrant", default=os.environ.get("QDRANT_EXEC", "../../target/release/qdrant"),
+                        help="Qdrant executable, `QDRANT_EXEC` by default")
+    parser.add_argument("--configs", default=",".join(TLS_CONFIGS),
+                        help=f"TLS configurations to compare, out of {', '.join(TLS_CONFIGS)}")
+    parser.add_argument("--protocols", default="rest,grpc", help="APIs to load, rest and/or grpc")
+    parser.add_argument("--peers", type=int, default=3)
+    parser.add_argument("--replication-factor", type=int, default=1)
+    parser.add_argument("--mix", default="search=9,upsert=1")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per worker")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=30.0, help="Duration of every run in seconds")
+    parser.add_argument("--preload", type=float, default=10.0, help="Upserts before the runs, in seconds")
+    parser.add_argument("--vector-size", type=int, default=128)
+    parser.add_argument("--work-dir", help="Folder of the peer storages, the system default if not set")
+    parser.add_argument("--output-dir", help="Write every run as a load generator output file")
+    args = parser.parse_args()
+    args.configs = args.configs.split(",")
+    args.protocols = args.protocols.split(",")
+    for name in args.configs:
+        if name not in TLS_CONFIGS:
+            parser.error(f"Unknown TLS configuration '{name}'")
+    return args
+
+
+def main():
+    args = parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        certificates = generate_certificates(tmp_dir)
+        stubs_dir = compile_protos(os.path.join(tmp_dir, "stubs")) if "grpc" in args.protocols else None
+        for name in args.configs:
+            results[name] = run_config(name, args, certificates, stubs_dir)
+
+    print()
+    print_results(results)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for name, result in results.items():
+            for run, report in result["runs"].items():
+                with open(os.path.join(args.output_dir, f"{name}-{run}.json"), "w") as f:
+                    json.dump({
+                        "config": {"tls": name, "run": run},
+                        **report,
+                        "p2p_reconnect": result["p2p_reconnect"],
+                    }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
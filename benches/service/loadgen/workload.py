@@ -0,0 +1,53 @@
+import random
+from typing import Dict, List
+
+# Same cities as `utils.js`, so the k6 and the python benchmarks query the same payload values
+CITIES = [
+    "Tokyo", "Delhi", "Shanghai", "São Paulo", "Mexico City", "Cairo", "Mumbai", "Beijing", "Dhaka", "Osaka",
+    "New York City", "Karachi", "Buenos Aires", "Chongqing", "Istanbul", "Kolkata", "Manila", "Lagos",
+    "Rio de Janeiro", "Tianjin", "Kinshasa", "Guangzhou", "Los Angeles", "Moscow", "Shenzhen", "Lahore",
+    "Bangalore", "Paris", "Bogotá", "Jakarta", "Chennai", "Lima", "Bangkok", "Seoul", "Nagoya", "Hyderabad",
+    "London", "Tehran", "Chicago", "Chengdu", "Nanjing", "Wuhan", "Ho Chi Minh City", "Luanda", "Ahmedabad",
+    "Kuala Lumpur", "Xi'an", "Hong Kong", "Dongguan", "Hangzhou",
+]
+
+OPERATIONS = ("search", "upsert")
+
+
+def random_vector(rng: random.Random, vector_size: int) -> List[float]:
+    return [rng.random() for _ in range(vector_size)]
+
+
+def random_city(rng: random.Random) -> str:
+    return rng.choice(CITIES)
+
+
+def random_point(rng: random.Random, vector_size: int) -> dict:
+    return {
+        "id": rng.randrange(1_000_000_000),
+        "vector": random_vector(rng, vector_size),
+        "payload": {
+            "city": random_city(rng),
+            "count": rng.randrange(100),
+        },
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    >>> parse_mix("search=9,upsert=1")
+    {'search': 0.9, 'upsert': 0.1}
+    >>> parse_mix("search")
+    {'search': 1.0}
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        weights[name] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"Operation mix '{mix}' has no positive weight")
+    return {name: weight / total for name, weight in weights.items()}
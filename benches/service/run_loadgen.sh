@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+
+# All arguments are passed to the load generator, see `--help`
+cd "$DIR"
+python3 -m loadgen "$@"
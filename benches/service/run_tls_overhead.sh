@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+
+# All arguments are passed to the TLS benchmark, see `--help`.
+# Paths are relative to this directory, the executable is `../../target/release/qdrant` by default.
+cd "$DIR"
+python3 -m loadgen.tls_overhead "$@"
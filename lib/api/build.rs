@@ -135,6 +135,8 @@ fn configure_validation(builder: Builder) -> Builder {
         .validates(&[
             ("GetCollectionInfoRequestInternal.get_collection_info_request", ""),
             ("InitiateShardTransferRequest.collection_name", "length(min = 1, max = 255)"),
+            ("UploadShardSnapshotRequest.collection_name", "length(min = 1, max = 255)"),
+            ("RecoverShardSnapshotRequest.collection_name", "length(min = 1, max = 255)"),
         ], &[])
         // Service: points.proto
         .validates(&[
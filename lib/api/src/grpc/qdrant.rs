@@ -2093,6 +2093,41 @@ pub struct InitiateShardTransferRequest {
     #[prost(uint32, tag = "2")]
     pub shard_id: u32,
 }
+#[derive(validator::Validate)]
+#[derive(serde::Serialize)]
+#[allow(clippy::derive_partial_eq_without_eq)]
+#[derive(Clone, PartialEq, ::prost::Message)]
+pub struct UploadShardSnapshotRequest {
+    /// Name of the collection
+    #[prost(string, tag = "1")]
+    #[validate(length(min = 1, max = 255))]
+    pub collection_name: ::prost::alloc::string::String,
+    /// Id of the receiving shard
+    #[prost(uint32, tag = "2")]
+    pub shard_id: u32,
+    /// Offset of the chunk in the snapshot file
+    #[prost(uint64, tag = "3")]
+    pub offset: u64,
+    /// Content of the chunk
+    #[prost(bytes = "vec", tag = "4")]
+    pub data: ::prost::alloc::vec::Vec<u8>,
+}
+#[derive(validator::Validate)]
+#[derive(serde::Serialize)]
+#[allow(clippy::derive_partial_eq_without_eq)]
+#[derive(Clone, PartialEq, ::prost::Message)]
+pub struct RecoverShardSnapshotRequest {
+    /// Name of the collection
+    #[prost(string, tag = "1")]
+    #[validate(length(min = 1, max = 255))]
+    pub collection_name: ::prost::alloc::string::String,
+    /// Id of the receiving shard
+    #[prost(uint32, tag = "2")]
+    pub shard_id: u32,
+    /// Size of the whole snapshot file
+    #[prost(uint64, tag = "3")]
+    pub size: u64,
+}
 /// Generated client implementations.
 pub mod collections_internal_client {
     #![allow(unused_variables, dead_code, missing_docs, clippy::let_unit_value)]
@@ -2230,6 +2265,58 @@ pub mod collections_internal_client {
                 .insert(GrpcMethod::new("qdrant.CollectionsInternal", "Initiate"));
             self.inner.unary(req, path, codec).await
         }
+        /// Write a chunk of the snapshot of a transferred shard
+        pub async fn upload_shard_snapshot(
+            &mut self,
+            request: impl tonic::IntoRequest<super::UploadShardSnapshotRequest>,
+        ) -> std::result::Result<
+            tonic::Response<super::CollectionOperationResponse>,
+            tonic::Status,
+        > {
+            self.inner
+                .ready()
+                .await
+                .map_err(|e| {
+                    tonic::Status::new(
+                        tonic::Code::Unknown,
+                        format!("Service was not ready: {}", e.into()),
+                    )
+                })?;
+            let codec = tonic::codec::ProstCodec::default();
+            let path = http::uri::PathAndQuery::from_static(
+                "/qdrant.CollectionsInternal/UploadShardSnapshot",
+            );
+            let mut req = request.into_request();
+            req.extensions_mut()
+                .insert(GrpcMethod::new("qdrant.CollectionsInternal", "UploadShardSnapshot"));
+            self.inner.unary(req, path, codec).await
+        }
+        /// Recover the receiving shard of a transfer from its uploaded snapshot
+        pub async fn recover_shard_snapshot(
+            &mut self,
+            request: impl tonic::IntoRequest<super::RecoverShardSnapshotRequest>,
+        ) -> std::result::Result<
+            tonic::Response<super::CollectionOperationResponse>,
+            tonic::Status,
+        > {
+            self.inner
+                .ready()
+                .await
+                .map_err(|e| {
+                    tonic::Status::new(
+                        tonic::Code::Unknown,
+                        format!("Service was not ready: {}", e.into()),
+                    )
+                })?;
+            let codec = tonic::codec::ProstCodec::default();
+            let path = http::uri::PathAndQuery::from_static(
+                "/qdrant.CollectionsInternal/RecoverShardSnapshot",
+            );
+            let mut req = request.into_request();
+            req.extensions_mut()
+                .insert(GrpcMethod::new("qdrant.CollectionsInternal", "RecoverShardSnapshot"));
+            self.inner.unary(req, path, codec).await
+        }
     }
 }
 /// Generated server implementations.
@@ -2255,6 +2342,22 @@ pub mod collections_internal_server {
             tonic::Response<super::CollectionOperationResponse>,
             tonic::Status,
         >;
+        /// Write a chunk of the snapshot of a transferred shard
+        async fn upload_shard_snapshot(
+            &self,
+            request: tonic::Request<super::UploadShardSnapshotRequest>,
+        ) -> std::result::Result<
+            tonic::Response<super::CollectionOperationResponse>,
+            tonic::Status,
+        >;
+        /// Recover the receiving shard of a transfer from its uploaded snapshot
+        async fn recover_shard_snapshot(
+            &self,
+            request: tonic::Request<super::RecoverShardSnapshotRequest>,
+        ) -> std::result::Result<
+            tonic::Response<super::CollectionOperationResponse>,
+            tonic::Status,
+        >;
     }
     #[derive(Debug)]
     pub struct CollectionsInternalServer<T: CollectionsInternal> {
@@ -2426,6 +2529,98 @@ pub mod collections_internal_server {
                     };
                     Box::pin(fut)
                 }
+                "/qdrant.CollectionsInternal/UploadShardSnapshot" => {
+                    #[allow(non_camel_case_types)]
+                    struct UploadShardSnapshotSvc<T: CollectionsInternal>(pub Arc<T>);
+                    impl<
+                        T: CollectionsInternal,
+                    > tonic::server::UnaryService<super::UploadShardSnapshotRequest>
+                    for UploadShardSnapshotSvc<T> {
+                        type Response = super::CollectionOperationResponse;
+                        type Future = BoxFuture<
+                            tonic::Response<Self::Response>,
+                            tonic::Status,
+                        >;
+                        fn call(
+                            &mut self,
+                            request: tonic::Request<super::UploadShardSnapshotRequest>,
+                        ) -> Self::Future {
+                            let inner = Arc::clone(&self.0);
+                            let fut = async move {
+                                (*inner).upload_shard_snapshot(request).await
+                            };
+                            Box::pin(fut)
+                        }
+                    }
+                    let accept_compression_encodings = self.accept_compression_encodings;
+                    let send_compression_encodings = self.send_compression_encodings;
+                    let max_decoding_message_size = self.max_decoding_message_size;
+                    let max_encoding_message_size = self.max_encoding_message_size;
+                    let inner = self.inner.clone();
+                    let fut = async move {
+                        let inner = inner.0;
+                        let method = UploadShardSnapshotSvc(inner);
+                        let codec = tonic::codec::ProstCodec::default();
+                        let mut grpc = tonic::server::Grpc::new(codec)
+                            .apply_compression_config(
+                                accept_compression_encodings,
+                                send_compression_encodings,
+                            )
+                            .apply_max_message_size_config(
+                                max_decoding_message_size,
+                                max_encoding_message_size,
+                            );
+                        let res = grpc.unary(method, req).await;
+                        Ok(res)
+                    };
+                    Box::pin(fut)
+                }
+                "/qdrant.CollectionsInternal/RecoverShardSnapshot" => {
+                    #[allow(non_camel_case_types)]
+                    struct RecoverShardSnapshotSvc<T: CollectionsInternal>(pub Arc<T>);
+                    impl<
+                        T: CollectionsInternal,
+                    > tonic::server::UnaryService<super::RecoverShardSnapshotRequest>
+                    for RecoverShardSnapshotSvc<T> {
+                        type Response = super::CollectionOperationResponse;
+                        type Future = BoxFuture<
+                            tonic::Response<Self::Response>,
+                            tonic::Status,
+                        >;
+                        fn call(
+                            &mut self,
+                            request: tonic::Request<super::RecoverShardSnapshotRequest>,
+                        ) -> Self::Future {
+                            let inner = Arc::clone(&self.0);
+                            let fut = async move {
+                                (*inner).recover_shard_snapshot(request).await
+                            };
+                            Box::pin(fut)
+                        }
+                    }
+                    let accept_compression_encodings = self.accept_compression_encodings;
+                    let send_compression_encodings = self.send_compression_encodings;
+                    let max_decoding_message_size = self.max_decoding_message_size;
+                    let max_encoding_message_size = self.max_encoding_message_size;
+                    let inner = self.inner.clone();
+                    let fut = async move {
+                        let inner = inner.0;
+                        let method = RecoverShardSnapshotSvc(inner);
+                        let codec = tonic::codec::ProstCodec::default();
+                        let mut grpc = tonic::server::Grpc::new(codec)
+                            .apply_compression_config(
+                                accept_compression_encodings,
+                                send_compression_encodings,
+                            )
+                            .apply_max_message_size_config(
+                                max_decoding_message_size,
+                                max_encoding_message_size,
+                            );
+                        let res = grpc.unary(method, req).await;
+                        Ok(res)
+                    };
+                    Box::pin(fut)
+                }
                 _ => {
                     Box::pin(async move {
                         Ok(
@@ -3890,6 +4085,8 @@ pub enum ReadConsistencyType {
     Majority = 1,
     /// Send requests to half + 1 nodes, return points which are present on all of them
     Quorum = 2,
+    /// Send request to the fastest node, and to another one if the first does not respond in time
+    Hedged = 3,
 }
 impl ReadConsistencyType {
     /// String value of the enum field names used in the ProtoBuf definition.
@@ -3901,6 +4098,7 @@ impl ReadConsistencyType {
             ReadConsistencyType::All => "All",
             ReadConsistencyType::Majority => "Majority",
             ReadConsistencyType::Quorum => "Quorum",
+            ReadConsistencyType::Hedged => "Hedged",
         }
     }
     /// Creates an enum from field names used in the ProtoBuf definition.
@@ -3909,6 +4107,7 @@ impl ReadConsistencyType {
             "All" => Some(Self::All),
             "Majority" => Some(Self::Majority),
             "Quorum" => Some(Self::Quorum),
+            "Hedged" => Some(Self::Hedged),
             _ => None,
         }
     }
@@ -2,6 +2,7 @@ use std::cmp::max;
 use std::collections::hash_map::Entry;
 use std::collections::{HashMap, HashSet};
 use std::future::Future;
+use std::io::SeekFrom;
 use std::ops::Deref;
 use std::path::{Path, PathBuf};
 use std::sync::Arc;
@@ -17,7 +18,8 @@ use segment::types::{
 };
 use semver::Version;
 use tar::Builder as TarBuilder;
-use tokio::fs::{copy, create_dir_all, remove_dir_all, remove_file, rename};
+use tokio::fs::{copy, create_dir_all, remove_dir_all, remove_file, rename, OpenOptions};
+use tokio::io::{AsyncSeekExt, AsyncWriteExt};
 use tokio::runtime::Handle;
 use tokio::sync::{Mutex, RwLock, RwLockWriteGuard};
 use validator::Validate;
@@ -56,8 +58,8 @@ use crate::shards::shard_holder::{LockedShardHolder, ShardHolder};
 use crate::shards::shard_versioning::versioned_shard_path;
 use crate::shards::transfer::shard_transfer::{
     change_remote_shard_route, check_transfer_conflicts_strict, finalize_partial_shard,
-    handle_transferred_shard_proxy, revert_proxy_shard_to_local, spawn_transfer_task,
-    ShardTransfer, ShardTransferKey,
+    handle_transferred_shard_proxy, received_snapshot_path, revert_proxy_shard_to_local,
+    spawn_transfer_task, suggest_transfer_source, ShardTransfer, ShardTransferKey,
 };
 use crate::shards::transfer::transfer_tasks_pool::{TaskResult, TransferTasksPool};
 use crate::shards::{replica_set, CollectionId, HASH_RING_SHARD_SCALE};
@@ -398,17 +400,22 @@ impl Collection {
 
         // Try to request shard transfer if replicas on the current peer are dead
         if state == ReplicaState::Dead && self.this_peer_id == peer_id {
-            let transfer_from = replica_set
-                .peers()
-                .into_iter()
-                .find(|(_, state)| state == &ReplicaState::Active)
-                .map(|(peer_id, _)| peer_id);
+            // Recover from the least busy replica
+            let transfers: Vec<_> = shard_holder
+                .shard_transfers
+                .read()
+                .iter()
+                .cloned()
+                .collect();
+            let transfer_from =
+                suggest_transfer_source(shard_id, peer_id, &transfers, &replica_set.peers());
             if let Some(transfer_from) = transfer_from {
                 self.request_shard_transfer(ShardTransfer {
                     shard_id,
                     from: transfer_from,
                     to: self.this_peer_id,
                     sync: true,
+                    method: None,
                 })
             } else {
                 log::warn!("No alive replicas to recover shard {shard_id}");
@@ -492,7 +499,9 @@ impl Collection {
             shard_holder,
             transfer.clone(),
             collection_id,
+            self.snapshots_path.clone(),
             channel_service,
+            self.shared_storage_config.transfer_scheduler.clone(),
             on_finish,
             on_error,
         );
@@ -1606,6 +1615,103 @@ impl Collection {
             .await
     }
 
+    async fn check_receiving_shard_transfer(&self, shard_id: ShardId) -> CollectionResult<()> {
+        let this_peer_id = self.this_peer_id;
+        let transfers = self
+            .get_transfers(|transfer| transfer.shard_id == shard_id && transfer.to == this_peer_id)
+            .await;
+        if transfers.is_empty() {
+            return Err(CollectionError::bad_request(format!(
+                "Shard {shard_id} is not transferred to peer {this_peer_id}"
+            )));
+        }
+        Ok(())
+    }
+
+    /// Write a chunk of the snapshot of a shard transferred to this peer
+    pub async fn write_shard_transfer_snapshot_chunk(
+        &self,
+        shard_id: ShardId,
+        offset: u64,
+        data: &[u8],
+    ) -> CollectionResult<()> {
+        self.check_receiving_shard_transfer(shard_id).await?;
+
+        let snapshot_path = received_snapshot_path(&self.snapshots_path, shard_id);
+        if let Some(parent) = snapshot_path.parent() {
+            create_dir_all(parent).await?;
+        }
+
+        let mut file = OpenOptions::new()
+            .create(true)
+            .write(true)
+            .open(&snapshot_path)
+            .await?;
+        let received = file.metadata().await?.len();
+        if offset > received {
+            return Err(CollectionError::bad_request(format!(
+                "Chunk of shard {shard_id} snapshot at offset {offset}, but {received} bytes are received"
+            )));
+        }
+
+        // A chunk might be sent again on retries, and the first chunk starts a new snapshot
+        file.set_len(offset).await?;
+        file.seek(SeekFrom::Start(offset)).await?;
+        file.write_all(data).await?;
+        file.flush().await?;
+        Ok(())
+    }
+
+    /// Replace the partial shard of a transfer to this peer with its uploaded snapshot
+    ///
+    /// The snapshot contains segments with built indexes, they are loaded as they are.
+    pub async fn recover_shard_transfer_snapshot(
+        &self,
+        shard_id: ShardId,
+        size: u64,
+    ) -> CollectionResult<()> {
+        self.check_receiving_shard_transfer(shard_id).await?;
+
+        let snapshot_path = received_snapshot_path(&self.snapshots_path, shard_id);
+        let received = tokio::fs::metadata(&snapshot_path)
+            .await
+            .map_err(|_| CollectionError::NotFound {
+                what: format!("Snapshot of shard {shard_id}"),
+            })?
+            .len();
+        if received != size {
+            return Err(CollectionError::bad_request(format!(
+                "Snapshot of shard {shard_id} has {size} bytes, but {received} bytes are received"
+            )));
+        }
+
+        let unpack_path = snapshot_path.with_extension("tmp");
+        let snapshot_path_clone = snapshot_path.clone();
+        let unpack_path_clone = unpack_path.clone();
+        tokio::task::spawn_blocking(move || {
+            if unpack_path_clone.exists() {
+                std::fs::remove_dir_all(&unpack_path_clone)?;
+            }
+            std::fs::create_dir_all(&unpack_path_clone)?;
+            let archive_file = std::fs::File::open(&snapshot_path_clone)?;
+            tar::Archive::new(archive_file).unpack(&unpack_path_clone)?;
+            LocalShard::restore_snapshot(&unpack_path_clone)
+        })
+        .await??;
+        remove_file(&snapshot_path).await?;
+
+        log::debug!("Recovering shard {}:{shard_id} from snapshot", self.name());
+        let recovered = self.recover_local_shard_from(&unpack_path, shard_id).await;
+        remove_dir_all(&unpack_path).await?;
+
+        if !recovered? {
+            return Err(CollectionError::service_error(format!(
+                "Snapshot of shard {shard_id} has no shard data"
+            )));
+        }
+        Ok(())
+    }
+
     /// Restore collection from snapshot
     ///
     /// This method performs blocking IO.
@@ -1749,6 +1855,7 @@ impl Collection {
                     to: *this_peer_id,
                     shard_id,
                     sync: true,
+                    method: None,
                 };
                 if check_transfer_conflicts_strict(&transfer, transfers.iter()).is_some() {
                     continue; // this transfer won't work
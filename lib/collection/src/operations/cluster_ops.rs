@@ -3,6 +3,7 @@ use serde::{Deserialize, Serialize};
 use validator::Validate;
 
 use crate::shards::shard::{PeerId, ShardId};
+use crate::shards::transfer::shard_transfer::ShardTransferMethod;
 
 #[derive(Debug, Deserialize, Serialize, JsonSchema, Clone)]
 #[serde(rename_all = "snake_case")]
@@ -48,6 +49,8 @@ pub struct MoveShard {
     pub shard_id: ShardId,
     pub to_peer_id: PeerId,
     pub from_peer_id: PeerId,
+    /// Method for transferring the shard from one node to another
+    pub method: Option<ShardTransferMethod>,
 }
 
 #[derive(Debug, Deserialize, Serialize, JsonSchema, Validate, Clone)]
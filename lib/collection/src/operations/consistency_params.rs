@@ -20,6 +20,8 @@ use validator::{Validate, ValidationError as ValidatorError, ValidationErrors};
 ///
 /// * `all` - send requests to all nodes and return points which present on all of them
 ///
+/// * `hedged` - send request to the fastest node, and to another one if the first does not respond in time
+///
 /// Default value is `Factor(1)`
 #[derive(Copy, Clone, Debug, Eq, PartialEq, Deserialize, Serialize, JsonSchema)]
 #[serde(untagged)]
@@ -145,6 +147,8 @@ where
 /// * `quorum` - send requests to all nodes and return points which present on majority of nodes
 ///
 /// * `all` - send requests to all nodes and return points which present on all nodes
+///
+/// * `hedged` - send request to the fastest node, and to another one if the first does not respond in time
 #[derive(Debug, Deserialize, Serialize, JsonSchema, Copy, Clone, PartialEq, Eq)]
 #[serde(rename_all = "snake_case")]
 pub enum ReadConsistencyType {
@@ -154,6 +158,8 @@ pub enum ReadConsistencyType {
     Quorum,
     // send requests to all nodes and return points which present on all nodes
     All,
+    // send request to the fastest node, and to another one if the first does not respond in time
+    Hedged,
 }
 
 impl TryFrom<i32> for ReadConsistencyType {
@@ -176,6 +182,7 @@ impl From<ReadConsistencyTypeGrpc> for ReadConsistencyType {
             ReadConsistencyTypeGrpc::Majority => Self::Majority,
             ReadConsistencyTypeGrpc::Quorum => Self::Quorum,
             ReadConsistencyTypeGrpc::All => Self::All,
+            ReadConsistencyTypeGrpc::Hedged => Self::Hedged,
         }
     }
 }
@@ -192,6 +199,7 @@ impl From<ReadConsistencyType> for ReadConsistencyTypeGrpc {
             ReadConsistencyType::Majority => ReadConsistencyTypeGrpc::Majority,
             ReadConsistencyType::Quorum => ReadConsistencyTypeGrpc::Quorum,
             ReadConsistencyType::All => ReadConsistencyTypeGrpc::All,
+            ReadConsistencyType::Hedged => ReadConsistencyTypeGrpc::Hedged,
         }
     }
 }
@@ -239,6 +247,13 @@ mod tests {
         let consistency: ReadConsistency = serde_json::from_str(json).unwrap();
         assert_eq!(consistency, ReadConsistency::Type(ReadConsistencyType::All));
 
+        let json = "\"hedged\"";
+        let consistency: ReadConsistency = serde_json::from_str(json).unwrap();
+        assert_eq!(
+            consistency,
+            ReadConsistency::Type(ReadConsistencyType::Hedged)
+        );
+
         let schema = schema_for!(ReadConsistency);
         let schema_str = serde_json::to_string_pretty(&schema).unwrap();
         println!("{schema_str}")
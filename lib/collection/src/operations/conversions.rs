@@ -1037,6 +1037,7 @@ impl From<api::grpc::qdrant::MoveShard> for MoveShard {
             shard_id: value.shard_id,
             from_peer_id: value.from_peer_id,
             to_peer_id: value.to_peer_id,
+            method: None,
         }
     }
 }
@@ -1,12 +1,17 @@
+use std::sync::Arc;
 use std::time::Duration;
 
 use crate::operations::types::NodeType;
+use crate::shards::transfer::transfer_scheduler::TransferScheduler;
 
 /// Default timeout for search requests.
 /// In cluster mode, this should be aligned with collection timeout.
 const DEFAULT_SEARCH_TIMEOUT: Duration = Duration::from_secs(60);
 const DEFAULT_UPDATE_QUEUE_SIZE: usize = 100;
 const DEFAULT_UPDATE_QUEUE_SIZE_LISTENER: usize = 10_000;
+/// Hedged reads query another replica once the first one is slower than this fraction of its
+/// recent searches
+const DEFAULT_HEDGED_READ_PERCENTILE: f32 = 0.95;
 
 /// Storage configuration shared between all collections.
 /// Represents a per-node configuration, which might be changes with restart.
@@ -18,6 +23,10 @@ pub struct SharedStorageConfig {
     pub handle_collection_load_errors: bool,
     pub recovery_mode: Option<String>,
     pub search_timeout: Duration,
+    /// Latency percentile of a replica, as a fraction, after which hedged reads query another one
+    pub hedged_read_percentile: f32,
+    /// Limits of the shard transfers from this peer, same instance for all collections
+    pub transfer_scheduler: Arc<TransferScheduler>,
 }
 
 impl Default for SharedStorageConfig {
@@ -28,17 +37,23 @@ impl Default for SharedStorageConfig {
             handle_collection_load_errors: false,
             recovery_mode: None,
             search_timeout: DEFAULT_SEARCH_TIMEOUT,
+            hedged_read_percentile: DEFAULT_HEDGED_READ_PERCENTILE,
+            transfer_scheduler: Default::default(),
         }
     }
 }
 
 impl SharedStorageConfig {
+    #[allow(clippy::too_many_arguments)]
     pub fn new(
         update_queue_size: Option<usize>,
         node_type: NodeType,
         handle_collection_load_errors: bool,
         recovery_mode: Option<String>,
         search_timeout: Option<Duration>,
+        hedged_read_percentile: Option<f32>,
+        max_outgoing_shard_transfers: Option<usize>,
+        shard_transfer_rate_limit: Option<u64>,
     ) -> Self {
         let update_queue_size = update_queue_size.unwrap_or(match node_type {
             NodeType::Normal => DEFAULT_UPDATE_QUEUE_SIZE,
@@ -51,6 +66,13 @@ impl SharedStorageConfig {
             handle_collection_load_errors,
             recovery_mode,
             search_timeout: search_timeout.unwrap_or(DEFAULT_SEARCH_TIMEOUT),
+            hedged_read_percentile: hedged_read_percentile
+                .unwrap_or(DEFAULT_HEDGED_READ_PERCENTILE)
+                .clamp(0.0, 1.0),
+            transfer_scheduler: Arc::new(TransferScheduler::new(
+                max_outgoing_shard_transfers,
+                shard_transfer_rate_limit,
+            )),
         }
     }
 }
@@ -1,7 +1,9 @@
+use std::mem::size_of;
 use std::path::Path;
 use std::sync::Arc;
 
 use async_trait::async_trait;
+use segment::data_types::vectors::{VectorElementType, VectorStruct};
 use segment::types::{
     ExtendedPointId, Filter, PointIdType, ScoredPoint, WithPayload, WithPayloadInterface,
     WithVector,
@@ -63,13 +65,14 @@ impl ForwardProxyShard {
     }
 
     /// Move batch of points to the remote shard.
-    /// Returns an offset of the next batch to be transferred.
+    /// Returns an offset of the next batch to be transferred, and the estimated size of the
+    /// transferred batch in bytes.
     pub async fn transfer_batch(
         &self,
         offset: Option<PointIdType>,
         batch_size: usize,
         runtime_handle: &Handle,
-    ) -> CollectionResult<Option<PointIdType>> {
+    ) -> CollectionResult<(Option<PointIdType>, usize)> {
         debug_assert!(batch_size > 0);
         let limit = batch_size + 1;
         let _update_lock = self.update_lock.lock().await;
@@ -96,6 +99,7 @@ impl ForwardProxyShard {
             batch.into_iter().map(|point| point.try_into()).collect();
 
         let points = points?;
+        let batch_bytes = points.iter().map(estimate_point_size).sum();
 
         // Use sync API to leverage potentially existing points
         let insert_points_operation = {
@@ -114,7 +118,7 @@ impl ForwardProxyShard {
             .update(insert_points_operation, wait)
             .await?;
 
-        Ok(next_page_offset)
+        Ok((next_page_offset, batch_bytes))
     }
 
     pub fn deconstruct(self) -> (LocalShard, RemoteShard) {
@@ -142,6 +146,23 @@ impl ForwardProxyShard {
     }
 }
 
+/// Approximate number of bytes the point takes on the wire
+fn estimate_point_size(point: &PointStruct) -> usize {
+    let vector_bytes = match &point.vector {
+        VectorStruct::Single(vector) => vector.len() * size_of::<VectorElementType>(),
+        VectorStruct::Multi(vectors) => vectors
+            .iter()
+            .map(|(name, vector)| name.len() + vector.len() * size_of::<VectorElementType>())
+            .sum(),
+    };
+    let payload_bytes = point
+        .payload
+        .as_ref()
+        .and_then(|payload| serde_json::to_vec(payload).ok())
+        .map_or(0, |payload| payload.len());
+    size_of::<PointIdType>() + vector_bytes + payload_bytes
+}
+
 #[async_trait]
 impl ShardOperation for ForwardProxyShard {
     /// Update `wrapped_shard` while keeping track of the changed points
@@ -3,6 +3,7 @@ use std::collections::{BTreeSet, HashMap};
 use std::mem::size_of;
 use std::ops::Deref;
 use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
 use std::sync::Arc;
 use std::thread;
 
@@ -55,6 +56,8 @@ pub struct LocalShard {
     pub(super) collection_config: Arc<TokioRwLock<CollectionConfig>>,
     pub(super) shared_storage_config: Arc<SharedStorageConfig>,
     pub(super) wal: LockedWal,
+    /// WAL index from which records are kept for a shard transfer, `u64::MAX` if none
+    pub(super) wal_keep_from: Arc<AtomicU64>,
     pub(super) update_handler: Arc<Mutex<UpdateHandler>>,
     pub(super) update_sender: ArcSwap<Sender<UpdateSignal>>,
     pub(super) path: PathBuf,
@@ -111,6 +114,7 @@ impl LocalShard {
         let segment_holder = Arc::new(RwLock::new(segment_holder));
         let config = collection_config.read().await;
         let locked_wal = Arc::new(ParkingMutex::new(wal));
+        let wal_keep_from = Arc::new(AtomicU64::new(u64::MAX));
 
         let mut update_handler = UpdateHandler::new(
             shared_storage_config.clone(),
@@ -118,6 +122,7 @@ impl LocalShard {
             update_runtime.clone(),
             segment_holder.clone(),
             locked_wal.clone(),
+            wal_keep_from.clone(),
             config.optimizer_config.flush_interval_sec,
             config.optimizer_config.max_optimization_threads,
         );
@@ -133,6 +138,7 @@ impl LocalShard {
             collection_config,
             shared_storage_config,
             wal: locked_wal,
+            wal_keep_from,
             update_handler: Arc::new(Mutex::new(update_handler)),
             update_sender: ArcSwap::from_pointee(update_sender),
             path: shard_path.to_owned(),
@@ -268,6 +274,38 @@ impl LocalShard {
         self.path.clone()
     }
 
+    /// Index of the next record written to the WAL
+    pub fn wal_next_index(&self) -> u64 {
+        let wal = self.wal.lock();
+        wal.first_index() + wal.len()
+    }
+
+    /// Keep WAL records from `index` on, even once they are flushed, until `release_wal`
+    pub fn keep_wal_from(&self, index: u64) {
+        self.wal_keep_from.store(index, Ordering::Relaxed);
+    }
+
+    /// Allow the WAL to be truncated up to the latest flushed record again
+    pub fn release_wal(&self) {
+        self.wal_keep_from.store(u64::MAX, Ordering::Relaxed);
+    }
+
+    /// Read at most `limit` WAL records, starting at index `from`
+    pub fn read_wal(
+        &self,
+        from: u64,
+        limit: usize,
+    ) -> CollectionResult<Vec<(u64, CollectionUpdateOperations)>> {
+        let wal = self.wal.lock();
+        if from < wal.first_index() {
+            return Err(CollectionError::service_error(format!(
+                "WAL records from {from} are already truncated, first available is {}",
+                wal.first_index()
+            )));
+        }
+        Ok(wal.read(from).take(limit).collect())
+    }
+
     pub fn wal_path(shard_path: &Path) -> PathBuf {
         shard_path.join("wal")
     }
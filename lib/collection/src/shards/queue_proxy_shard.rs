@@ -0,0 +1,168 @@
+use std::path::Path;
+use std::sync::Arc;
+
+use async_trait::async_trait;
+use segment::types::{
+    ExtendedPointId, Filter, ScoredPoint, WithPayload, WithPayloadInterface, WithVector,
+};
+use tokio::runtime::Handle;
+use tokio::sync::Mutex;
+
+use crate::operations::types::{
+    CollectionError, CollectionInfo, CollectionResult, CountRequest, CountResult, PointRequest,
+    Record, SearchRequestBatch, UpdateResult,
+};
+use crate::operations::CollectionUpdateOperations;
+use crate::shards::local_shard::LocalShard;
+use crate::shards::remote_shard::RemoteShard;
+use crate::shards::shard_trait::ShardOperation;
+use crate::shards::telemetry::LocalShardTelemetry;
+
+/// Number of queued updates read from the WAL at once
+const TRANSFER_BATCH_SIZE: usize = 100;
+
+/// QueueProxyShard
+///
+/// QueueProxyShard is a wrapper type for a LocalShard.
+///
+/// It is used while a snapshot of the wrapped shard is transferred to another node.
+/// Updates are only applied to the wrapped shard, which queues them in its WAL. The WAL is kept
+/// from the moment the proxy is created, so that the queued updates can be sent to the remote
+/// shard once it is recovered from the snapshot.
+pub struct QueueProxyShard {
+    pub(crate) wrapped_shard: LocalShard,
+    pub(crate) remote_shard: RemoteShard,
+    /// WAL index of the next update to send to the remote shard.
+    /// Also prevents concurrent transfers of the queued updates.
+    next_update: Mutex<u64>,
+}
+
+impl QueueProxyShard {
+    pub fn new(wrapped_shard: LocalShard, remote_shard: RemoteShard) -> Self {
+        let next_update = wrapped_shard.wal_next_index();
+        wrapped_shard.keep_wal_from(next_update);
+        Self {
+            wrapped_shard,
+            remote_shard,
+            next_update: Mutex::new(next_update),
+        }
+    }
+
+    /// Send the updates queued so far to the remote shard, in WAL order.
+    ///
+    /// Updates applied meanwhile are queued as well, the remote shard is only guaranteed to be
+    /// up to date if no update can reach the wrapped shard during the call.
+    pub async fn transfer_queued_updates(&self) -> CollectionResult<()> {
+        let mut next_update = self.next_update.lock().await;
+        loop {
+            let batch = self
+                .wrapped_shard
+                .read_wal(*next_update, TRANSFER_BATCH_SIZE)?;
+            let Some(&(last_update, _)) = batch.last() else {
+                return Ok(());
+            };
+
+            let batch_len = batch.len();
+            for (i, (_, operation)) in batch.into_iter().enumerate() {
+                // Only wait for the last update of the batch, the remote shard applies them in order
+                let wait = i + 1 == batch_len;
+                self.remote_shard
+                    .update(operation, wait)
+                    .await
+                    .map_err(|err| {
+                        CollectionError::forward_proxy_error(self.remote_shard.peer_id, err)
+                    })?;
+            }
+            *next_update = last_update + 1;
+        }
+    }
+
+    /// Stop keeping the WAL for the transfer and return the wrapped shards
+    pub fn deconstruct(self) -> (LocalShard, RemoteShard) {
+        self.wrapped_shard.release_wal();
+        (self.wrapped_shard, self.remote_shard)
+    }
+
+    /// Forward `create_snapshot` to `wrapped_shard`
+    pub async fn create_snapshot(
+        &self,
+        temp_path: &Path,
+        target_path: &Path,
+        save_wal: bool,
+    ) -> CollectionResult<()> {
+        self.wrapped_shard
+            .create_snapshot(temp_path, target_path, save_wal)
+            .await
+    }
+
+    pub async fn on_optimizer_config_update(&self) -> CollectionResult<()> {
+        self.wrapped_shard.on_optimizer_config_update().await
+    }
+
+    pub fn get_telemetry_data(&self) -> LocalShardTelemetry {
+        self.wrapped_shard.get_telemetry_data()
+    }
+}
+
+#[async_trait]
+impl ShardOperation for QueueProxyShard {
+    /// Update `wrapped_shard`, its WAL queues the update for the remote shard
+    async fn update(
+        &self,
+        operation: CollectionUpdateOperations,
+        wait: bool,
+    ) -> CollectionResult<UpdateResult> {
+        self.wrapped_shard.update(operation, wait).await
+    }
+
+    /// Forward read-only `scroll_by` to `wrapped_shard`
+    async fn scroll_by(
+        &self,
+        offset: Option<ExtendedPointId>,
+        limit: usize,
+        with_payload_interface: &WithPayloadInterface,
+        with_vector: &WithVector,
+        filter: Option<&Filter>,
+        search_runtime_handle: &Handle,
+    ) -> CollectionResult<Vec<Record>> {
+        self.wrapped_shard
+            .scroll_by(
+                offset,
+                limit,
+                with_payload_interface,
+                with_vector,
+                filter,
+                search_runtime_handle,
+            )
+            .await
+    }
+
+    async fn info(&self) -> CollectionResult<CollectionInfo> {
+        self.wrapped_shard.info().await
+    }
+
+    async fn search(
+        &self,
+        request: Arc<SearchRequestBatch>,
+        search_runtime_handle: &Handle,
+    ) -> CollectionResult<Vec<Vec<ScoredPoint>>> {
+        self.wrapped_shard
+            .search(request, search_runtime_handle)
+            .await
+    }
+
+    async fn count(&self, request: Arc<CountRequest>) -> CollectionResult<CountResult> {
+        self.wrapped_shard.count(request).await
+    }
+
+    async fn retrieve(
+        &self,
+        request: Arc<PointRequest>,
+        with_payload: &WithPayload,
+        with_vector: &WithVector,
+    ) -> CollectionResult<Vec<Record>> {
+        self.wrapped_shard
+            .retrieve(request, with_payload, with_vector)
+            .await
+    }
+}
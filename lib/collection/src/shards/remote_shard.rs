@@ -1,13 +1,15 @@
 use std::future::Future;
 use std::path::Path;
 use std::sync::Arc;
+use std::time::Duration;
 
 use api::grpc::qdrant::collections_internal_client::CollectionsInternalClient;
 use api::grpc::qdrant::points_internal_client::PointsInternalClient;
 use api::grpc::qdrant::{
     CollectionOperationResponse, CountPoints, CountPointsInternal, GetCollectionInfoRequest,
     GetCollectionInfoRequestInternal, GetPoints, GetPointsInternal, InitiateShardTransferRequest,
-    ScrollPoints, ScrollPointsInternal, SearchBatchPointsInternal,
+    RecoverShardSnapshotRequest, ScrollPoints, ScrollPointsInternal, SearchBatchPointsInternal,
+    UploadShardSnapshotRequest,
 };
 use async_trait::async_trait;
 use parking_lot::Mutex;
@@ -45,6 +47,11 @@ use crate::shards::shard_trait::ShardOperation;
 use crate::shards::telemetry::RemoteShardTelemetry;
 use crate::shards::CollectionId;
 
+/// Recovering a shard from a snapshot loads all of its segments, which takes long on large shards
+const SHARD_SNAPSHOT_RECOVERY_TIMEOUT: Duration = Duration::from_secs(2 * 3600);
+/// Search latency of a shard that did not respond for longer is considered unknown
+const SEARCH_LATENCY_TTL: Duration = Duration::from_secs(30);
+
 /// RemoteShard
 ///
 /// Remote Shard is a representation of a shard that is located on a remote peer.
@@ -53,7 +60,7 @@ pub struct RemoteShard {
     pub(crate) collection_id: CollectionId,
     pub peer_id: PeerId,
     pub channel_service: ChannelService,
-    telemetry_search_durations: Arc<Mutex<OperationDurationsAggregator>>,
+    pub(crate) telemetry_search_durations: Arc<Mutex<OperationDurationsAggregator>>,
     telemetry_update_durations: Arc<Mutex<OperationDurationsAggregator>>,
 }
 
@@ -132,6 +139,33 @@ impl RemoteShard {
         }
     }
 
+    /// Moving average of the recent search latency of the shard.
+    ///
+    /// Returns `None` if it is unknown or outdated, so that the shard gets searched again to
+    /// update it.
+    pub fn search_latency(&self) -> Option<Duration> {
+        let durations = self.telemetry_search_durations.lock();
+        let last_response = durations.last_response_date()?;
+        // The response date is rounded, and might be slightly in the future
+        let since_last_response = (chrono::Utc::now() - last_response)
+            .to_std()
+            .unwrap_or_default();
+        if since_last_response > SEARCH_LATENCY_TTL {
+            return None;
+        }
+        durations
+            .ewma_duration_micros()
+            .map(|micros| Duration::from_micros(micros as u64))
+    }
+
+    /// Search latency that the given fraction of the recent searches of the shard did not exceed
+    pub fn search_latency_percentile(&self, percentile: f32) -> Option<Duration> {
+        self.telemetry_search_durations
+            .lock()
+            .percentile_duration_micros(percentile)
+            .map(|micros| Duration::from_micros(micros as u64))
+    }
+
     pub async fn initiate_transfer(&self) -> CollectionResult<CollectionOperationResponse> {
         let res = self
             .with_collections_client(|mut client| async move {
@@ -147,6 +181,59 @@ impl RemoteShard {
         Ok(res)
     }
 
+    /// Write a chunk of a snapshot of this shard on the remote peer
+    pub async fn upload_shard_snapshot_chunk(
+        &self,
+        offset: u64,
+        data: Vec<u8>,
+    ) -> CollectionResult<CollectionOperationResponse> {
+        let request = &UploadShardSnapshotRequest {
+            collection_name: self.collection_id.clone(),
+            shard_id: self.id,
+            offset,
+            data,
+        };
+        let res = self
+            .with_collections_client(|mut client| async move {
+                client
+                    .upload_shard_snapshot(tonic::Request::new(request.clone()))
+                    .await
+            })
+            .await?
+            .into_inner();
+        Ok(res)
+    }
+
+    /// Replace the shard on the remote peer with the uploaded snapshot of `size` bytes
+    pub async fn recover_shard_snapshot(
+        &self,
+        size: u64,
+    ) -> CollectionResult<CollectionOperationResponse> {
+        let current_address = self.current_address()?;
+        let res = self
+            .channel_service
+            .channel_pool
+            .with_channel_timeout(
+                &current_address,
+                |channel| async move {
+                    let mut client = CollectionsInternalClient::new(channel);
+                    let mut request = tonic::Request::new(RecoverShardSnapshotRequest {
+                        collection_name: self.collection_id.clone(),
+                        shard_id: self.id,
+                        size,
+                    });
+                    request.set_timeout(SHARD_SNAPSHOT_RECOVERY_TIMEOUT);
+                    client.recover_shard_snapshot(request).await
+                },
+                Some(SHARD_SNAPSHOT_RECOVERY_TIMEOUT),
+                0,
+            )
+            .await
+            .map_err(CollectionError::from)?
+            .into_inner();
+        Ok(res)
+    }
+
     pub async fn forward_update(
         &self,
         operation: CollectionUpdateOperations,
@@ -13,6 +13,7 @@ use futures::stream::FuturesUnordered;
 use futures::{FutureExt, StreamExt};
 use itertools::Itertools;
 use rand::seq::SliceRandom;
+use rand::Rng;
 use schemars::JsonSchema;
 use segment::types::{
     ExtendedPointId, Filter, PointIdType, ScoredPoint, WithPayload, WithPayloadInterface,
@@ -39,7 +40,8 @@ use crate::save_on_disk::SaveOnDisk;
 use crate::shards::channel_service::ChannelService;
 use crate::shards::dummy_shard::DummyShard;
 use crate::shards::forward_proxy_shard::ForwardProxyShard;
-use crate::shards::shard::Shard::{Dummy, ForwardProxy, Local};
+use crate::shards::queue_proxy_shard::QueueProxyShard;
+use crate::shards::shard::Shard::{Dummy, ForwardProxy, Local, QueueProxy};
 use crate::shards::shard::{PeerId, Shard, ShardId};
 use crate::shards::shard_config::ShardConfig;
 use crate::shards::shard_trait::ShardOperation;
@@ -53,6 +55,16 @@ const DEFAULT_SHARD_DEACTIVATION_TIMEOUT: Duration = Duration::from_secs(30);
 
 const READ_REMOTE_REPLICAS: u32 = 2;
 
+/// Replicas with latencies within this factor of each other are read in random order,
+/// to spread the load between them
+const READ_LATENCY_JITTER: f64 = 1.5;
+
+/// Hedged reads wait at least this long before querying another replica
+const MIN_HEDGE_DELAY: Duration = Duration::from_millis(1);
+
+/// Hedge delay, until the latency of the replica is known
+const DEFAULT_HEDGE_DELAY: Duration = Duration::from_millis(100);
+
 const REPLICA_STATE_FILE: &str = "replica_state.json";
 
 //    │    Collection Created
@@ -745,8 +757,8 @@ impl ShardReplicaSet {
             )));
         }
 
-        // Shuffle the list of active remote shards to avoid biasing the first ones
-        active_remote_shards.shuffle(&mut rand::thread_rng());
+        // Prefer the fastest remote shards, without always biasing the same ones
+        order_by_latency(&mut active_remote_shards);
 
         let fan_out_selection = cmp::min(
             active_remote_shards.len(),
@@ -832,6 +844,8 @@ impl ShardReplicaSet {
         let total_count = local_count + remotes_count;
         let active_count = active_local_count + active_remotes_count;
 
+        let hedged = read_consistency == ReadConsistency::Type(ReadConsistencyType::Hedged);
+
         let (factor, condition) = match read_consistency {
             ReadConsistency::Type(ReadConsistencyType::All) => (total_count, ResolveCondition::All),
 
@@ -846,6 +860,8 @@ impl ShardReplicaSet {
             ReadConsistency::Factor(factor) => {
                 (factor.clamp(1, total_count), ResolveCondition::All)
             }
+
+            ReadConsistency::Type(ReadConsistencyType::Hedged) => (1, ResolveCondition::All),
         };
 
         if active_count < factor {
@@ -857,7 +873,18 @@ impl ShardReplicaSet {
         }
 
         let mut active_remotes: Vec<_> = active_remotes_iter.collect();
-        active_remotes.shuffle(&mut rand::thread_rng());
+        order_by_latency(&mut active_remotes);
+
+        // Local reads do not go over the network, only remote reads are hedged
+        let mut hedge_delay = match active_remotes.first() {
+            Some(remote) if hedged && active_local.is_none() && active_remotes.len() > 1 => {
+                let delay = remote
+                    .search_latency_percentile(self.shared_storage_config.hedged_read_percentile)
+                    .unwrap_or(DEFAULT_HEDGE_DELAY);
+                Some(delay.max(MIN_HEDGE_DELAY))
+            }
+            _ => None,
+        };
 
         let local_operations = active_local
             .into_iter()
@@ -869,9 +896,10 @@ impl ShardReplicaSet {
 
         let mut operations = local_operations.chain(remote_operations);
 
-        let required_reads = if active_local_count > 0 {
+        let required_reads = if active_local_count > 0 || hedged {
             // If there is a local shard, we can ignore fan-out `read_remote_replicas` param,
             // as we already know that the local peer is working.
+            // Hedged reads query more replicas only if the first one is slow.
             factor
         } else {
             max(factor, usize::try_from(self.read_remote_replicas).unwrap())
@@ -883,7 +911,24 @@ impl ShardReplicaSet {
         let mut responses = Vec::new();
         let mut errors = Vec::new();
 
-        while let Some(result) = pending_operations.next().await {
+        loop {
+            let result = match hedge_delay {
+                Some(delay) => match tokio::time::timeout(delay, pending_operations.next()).await {
+                    Ok(result) => result,
+                    Err(_) => {
+                        // The replica is slower than usual, query the next one as well
+                        // and take the first response
+                        hedge_delay = None;
+                        pending_operations.extend(operations.by_ref().take(1));
+                        continue;
+                    }
+                },
+                None => pending_operations.next().await,
+            };
+            let Some(result) = result else {
+                break;
+            };
+
             match result {
                 Ok(resp) => responses.push(resp),
 
@@ -1105,7 +1150,7 @@ impl ShardReplicaSet {
         let mut local_write = self.local.write().await;
 
         match &*local_write {
-            Some(ForwardProxy(_)) => {
+            Some(ForwardProxy(_) | QueueProxy(_)) => {
                 // Do nothing, we proceed further
             }
             Some(Local(_)) => return Ok(()),
@@ -1125,14 +1170,116 @@ impl ShardReplicaSet {
             }
         };
 
-        if let Some(ForwardProxy(proxy)) = local_write.take() {
-            let local_shard = proxy.wrapped_shard;
-            let _ = local_write.insert(Local(local_shard));
+        match local_write.take() {
+            Some(ForwardProxy(proxy)) => {
+                let (local_shard, _) = proxy.deconstruct();
+                let _ = local_write.insert(Local(local_shard));
+            }
+            Some(QueueProxy(proxy)) => {
+                let (local_shard, _) = proxy.deconstruct();
+                let _ = local_write.insert(Local(local_shard));
+            }
+            shard => *local_write = shard,
+        }
+
+        Ok(())
+    }
+
+    /// Wrap local shard into a queue proxy, to transfer a snapshot of it to `remote_shard`.
+    ///
+    /// Updates of the local shard are queued from now on, until the proxy is turned into a
+    /// forward proxy with `queue_proxy_into_forward_proxy`.
+    pub async fn queue_proxify_local(&self, remote_shard: RemoteShard) -> CollectionResult<()> {
+        let mut local_write = self.local.write().await;
+
+        match &*local_write {
+            Some(Local(_)) => {
+                // Do nothing, we proceed further
+            }
+            Some(shard) => {
+                return Err(CollectionError::service_error(format!(
+                    "Cannot queue proxify local shard {} - {} to peer {} because it is already proxified",
+                    shard.variant_name(), self.shard_id, remote_shard.peer_id
+                )))
+            }
+            None => {
+                return Err(CollectionError::service_error(format!(
+                    "Cannot queue proxify local shard {} on peer {} because it is not active",
+                    self.shard_id,
+                    self.this_peer_id()
+                )));
+            }
+        };
+
+        if let Some(Local(local)) = local_write.take() {
+            let proxy_shard = QueueProxyShard::new(local, remote_shard);
+            let _ = local_write.insert(QueueProxy(proxy_shard));
+        }
+
+        Ok(())
+    }
+
+    /// Send the updates queued by the queue proxy so far, without blocking new updates
+    pub async fn transfer_queued_updates(&self) -> CollectionResult<()> {
+        let read_local = self.local.read().await;
+        if let Some(QueueProxy(proxy)) = &*read_local {
+            proxy.transfer_queued_updates().await
+        } else {
+            Err(CollectionError::service_error(format!(
+                "Cannot transfer queued updates of shard {} because it is not queue proxified",
+                self.shard_id
+            )))
+        }
+    }
+
+    /// Send the last queued updates and replace the queue proxy with a forward proxy.
+    ///
+    /// Updates are blocked meanwhile, so that the remote shard is up to date before the forward
+    /// proxy starts forwarding new updates to it.
+    pub async fn queue_proxy_into_forward_proxy(&self) -> CollectionResult<()> {
+        let mut local_write = self.local.write().await;
+
+        match &*local_write {
+            Some(QueueProxy(proxy)) => proxy.transfer_queued_updates().await?,
+            Some(ForwardProxy(_)) => return Ok(()),
+            _ => {
+                return Err(CollectionError::service_error(format!(
+                    "Cannot forward proxify shard {} because it is not queue proxified",
+                    self.shard_id
+                )))
+            }
+        }
+
+        if let Some(QueueProxy(proxy)) = local_write.take() {
+            let (local_shard, remote_shard) = proxy.deconstruct();
+            let _ = local_write.insert(ForwardProxy(ForwardProxyShard::new(
+                local_shard,
+                remote_shard,
+            )));
         }
 
         Ok(())
     }
 
+    /// Snapshot the local shard wrapped by the queue proxy into `target_path`.
+    ///
+    /// The snapshot has an empty WAL, updates from the snapshot on are sent by the queue proxy.
+    pub async fn create_transfer_snapshot(
+        &self,
+        temp_path: &Path,
+        target_path: &Path,
+    ) -> CollectionResult<()> {
+        let read_local = self.local.read().await;
+        if let Some(QueueProxy(proxy)) = &*read_local {
+            proxy.create_snapshot(temp_path, target_path, false).await
+        } else {
+            Err(CollectionError::service_error(format!(
+                "Cannot snapshot shard {} for transfer because it is not queue proxified",
+                self.shard_id
+            )))
+        }
+    }
+
     /// Update local shard if any without forwarding to remote shards
     pub async fn update_local(
         &self,
@@ -1165,7 +1312,7 @@ impl ShardReplicaSet {
         &self,
         offset: Option<PointIdType>,
         batch_size: usize,
-    ) -> CollectionResult<Option<PointIdType>> {
+    ) -> CollectionResult<(Option<PointIdType>, usize)> {
         let read_local = self.local.read().await;
         if let Some(ForwardProxy(proxy)) = &*read_local {
             proxy
@@ -1579,6 +1726,27 @@ impl ShardReplicaSet {
     }
 }
 
+/// Order remote shards to read from, the fastest first.
+///
+/// Shards with unknown latency go first, so that it gets known.
+/// Shards with similar latencies are ordered randomly, so that one of them does not get all reads.
+fn order_by_latency(remotes: &mut Vec<&RemoteShard>) {
+    let mut rng = rand::thread_rng();
+    let mut keyed_remotes: Vec<_> = remotes
+        .drain(..)
+        .map(|remote| {
+            let key = remote.search_latency().map_or(0.0, |latency| {
+                latency.as_secs_f64() * rng.gen_range(1.0..READ_LATENCY_JITTER)
+            });
+            (key, remote)
+        })
+        .collect();
+    // Sorting is stable, shards with unknown latency stay in random order
+    keyed_remotes.shuffle(&mut rng);
+    keyed_remotes.sort_by(|(key1, _), (key2, _)| key1.total_cmp(key2));
+    remotes.extend(keyed_remotes.into_iter().map(|(_, remote)| remote));
+}
+
 #[cfg(test)]
 mod tests {
     use std::num::{NonZeroU32, NonZeroU64};
@@ -1674,4 +1842,30 @@ mod tests {
         assert_eq!(rs.highest_replica_peer_id(), Some(5));
         assert_eq!(rs.highest_alive_replica_peer_id(), Some(4));
     }
+
+    #[test]
+    fn test_order_by_latency() {
+        let channel_service = ChannelService::default();
+        let remote = |peer_id: PeerId, latency: Option<Duration>| {
+            let remote = RemoteShard::new(0, "test".to_string(), peer_id, channel_service.clone());
+            if let Some(latency) = latency {
+                remote
+                    .telemetry_search_durations
+                    .lock()
+                    .add_operation_result(true, latency);
+            }
+            remote
+        };
+        let slow = remote(1, Some(Duration::from_millis(100)));
+        let fast = remote(2, Some(Duration::from_millis(1)));
+        let unknown = remote(3, None);
+
+        // Jitter only reorders shards with similar latencies
+        for _ in 0..100 {
+            let mut remotes = vec![&slow, &fast, &unknown];
+            order_by_latency(&mut remotes);
+            let peers: Vec<_> = remotes.iter().map(|remote| remote.peer_id).collect();
+            assert_eq!(peers, vec![3, 2, 1]);
+        }
+    }
 }
@@ -6,6 +6,7 @@ use crate::shards::dummy_shard::DummyShard;
 use crate::shards::forward_proxy_shard::ForwardProxyShard;
 use crate::shards::local_shard::LocalShard;
 use crate::shards::proxy_shard::ProxyShard;
+use crate::shards::queue_proxy_shard::QueueProxyShard;
 use crate::shards::shard_trait::ShardOperation;
 use crate::shards::telemetry::LocalShardTelemetry;
 
@@ -22,6 +23,7 @@ pub enum Shard {
     Local(LocalShard),
     Proxy(ProxyShard),
     ForwardProxy(ForwardProxyShard),
+    QueueProxy(QueueProxyShard),
     Dummy(DummyShard),
 }
 
@@ -31,6 +33,7 @@ impl Shard {
             Shard::Local(_) => "local shard",
             Shard::Proxy(_) => "proxy shard",
             Shard::ForwardProxy(_) => "forward proxy shard",
+            Shard::QueueProxy(_) => "queue proxy shard",
             Shard::Dummy(_) => "dummy shard",
         }
     }
@@ -40,6 +43,7 @@ impl Shard {
             Shard::Local(local_shard) => local_shard,
             Shard::Proxy(proxy_shard) => proxy_shard,
             Shard::ForwardProxy(proxy_shard) => proxy_shard,
+            Shard::QueueProxy(proxy_shard) => proxy_shard,
             Shard::Dummy(dummy_shard) => dummy_shard,
         }
     }
@@ -49,6 +53,7 @@ impl Shard {
             Shard::Local(local_shard) => local_shard.get_telemetry_data(),
             Shard::Proxy(proxy_shard) => proxy_shard.get_telemetry_data(),
             Shard::ForwardProxy(proxy_shard) => proxy_shard.get_telemetry_data(),
+            Shard::QueueProxy(proxy_shard) => proxy_shard.get_telemetry_data(),
             Shard::Dummy(dummy_shard) => dummy_shard.get_telemetry_data(),
         };
         telemetry.variant_name = Some(self.variant_name().to_string());
@@ -77,6 +82,11 @@ impl Shard {
                     .create_snapshot(temp_path, target_path, save_wal)
                     .await
             }
+            Shard::QueueProxy(proxy_shard) => {
+                proxy_shard
+                    .create_snapshot(temp_path, target_path, save_wal)
+                    .await
+            }
             Shard::Dummy(dummy_shard) => {
                 dummy_shard
                     .create_snapshot(temp_path, target_path, save_wal)
@@ -90,6 +100,7 @@ impl Shard {
             Shard::Local(local_shard) => local_shard.on_optimizer_config_update().await,
             Shard::Proxy(proxy_shard) => proxy_shard.on_optimizer_config_update().await,
             Shard::ForwardProxy(proxy_shard) => proxy_shard.on_optimizer_config_update().await,
+            Shard::QueueProxy(proxy_shard) => proxy_shard.on_optimizer_config_update().await,
             Shard::Dummy(dummy_shard) => dummy_shard.on_optimizer_config_update().await,
         }
     }
@@ -1,2 +1,3 @@
 pub mod shard_transfer;
+pub mod transfer_scheduler;
 pub mod transfer_tasks_pool;
@@ -1,24 +1,33 @@
 use std::cmp::Ordering;
 use std::collections::{HashMap, HashSet};
 use std::future::Future;
+use std::path::{Path, PathBuf};
 use std::sync::atomic::AtomicBool;
 use std::sync::Arc;
 use std::time::Duration;
 
 use schemars::JsonSchema;
 use serde::{Deserialize, Serialize};
+use tar::Builder as TarBuilder;
+use tokio::fs::{create_dir_all, remove_dir_all, remove_file};
+use tokio::io::AsyncReadExt;
 use tokio::time::sleep;
 
 use crate::common::stoppable_task_async::{spawn_async_stoppable, StoppableAsyncTaskHandle};
 use crate::operations::types::{CollectionError, CollectionResult};
 use crate::shards::channel_service::ChannelService;
 use crate::shards::remote_shard::RemoteShard;
-use crate::shards::replica_set::ReplicaState;
+use crate::shards::replica_set::{ReplicaState, ShardReplicaSet};
 use crate::shards::shard::{PeerId, ShardId};
 use crate::shards::shard_holder::{LockedShardHolder, ShardHolder};
+use crate::shards::transfer::transfer_scheduler::{TransferRateLimiter, TransferScheduler};
 use crate::shards::CollectionId;
 
 const TRANSFER_BATCH_SIZE: usize = 100;
+/// Size of the chunks the snapshot of a shard is uploaded in
+const SNAPSHOT_CHUNK_SIZE: usize = 4 * 1024 * 1024;
+/// Directory for the snapshots of transferred shards, in the snapshots directory of the collection
+const SHARD_TRANSFER_SNAPSHOTS_DIR: &str = "shard-transfers";
 const RETRY_TIMEOUT: Duration = Duration::from_secs(1);
 const MAX_RETRY_COUNT: usize = 3;
 
@@ -30,6 +39,21 @@ pub struct ShardTransfer {
     /// If this flag is true, the is a replication related transfer of shard from 1 peer to another
     /// Shard on original peer will not be deleted in this case
     pub sync: bool,
+    /// Method to transfer the shard with, `stream_records` if not specified
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub method: Option<ShardTransferMethod>,
+}
+
+/// Methods for transferring a shard from one peer to another
+#[derive(Debug, Default, Clone, Copy, Hash, PartialEq, Eq, Serialize, Deserialize, JsonSchema)]
+#[serde(rename_all = "snake_case")]
+pub enum ShardTransferMethod {
+    /// Stream all shard records in batches, the receiving peer indexes them again
+    #[default]
+    StreamRecords,
+    /// Transfer a snapshot of the shard segments with their indexes, then the updates made
+    /// during the transfer
+    Snapshot,
 }
 
 /// Unique identifier of a transfer
@@ -60,6 +84,7 @@ async fn transfer_batches(
     shard_holder: Arc<LockedShardHolder>,
     shard_id: ShardId,
     stopped: Arc<AtomicBool>,
+    rate_limiter: &mut TransferRateLimiter,
 ) -> CollectionResult<()> {
     // Create payload indexes on the remote shard.
     {
@@ -88,21 +113,26 @@ async fn transfer_batches(
         let shard_holder_guard = shard_holder.read().await;
         let transferring_shard_opt = shard_holder_guard.get_shard(&shard_id);
 
-        if let Some(replica_set) = transferring_shard_opt {
-            offset = replica_set
+        let batch_bytes = if let Some(replica_set) = transferring_shard_opt {
+            let (next_offset, batch_bytes) = replica_set
                 .transfer_batch(offset, TRANSFER_BATCH_SIZE)
                 .await?;
+            offset = next_offset;
             if offset.is_none() {
                 // That was the last batch, all look good
                 break;
             }
+            batch_bytes
         } else {
             // Forward proxy gone?!
             // That would be a programming error.
             return Err(CollectionError::service_error(format!(
                 "Shard {shard_id} is not found"
             )));
-        }
+        };
+        // Do not hold the shard holder while the transfer is throttled
+        drop(shard_holder_guard);
+        rate_limiter.consume(batch_bytes).await;
     }
     Ok(())
 }
@@ -192,23 +222,184 @@ pub async fn handle_transferred_shard_proxy(
     Ok(true)
 }
 
+/// Directory for the snapshots of transferred shards
+pub fn transfer_snapshots_path(collection_snapshots_path: &Path) -> PathBuf {
+    collection_snapshots_path.join(SHARD_TRANSFER_SNAPSHOTS_DIR)
+}
+
+/// Path of the snapshot of a shard, uploaded to this peer by a transfer
+pub fn received_snapshot_path(collection_snapshots_path: &Path, shard_id: ShardId) -> PathBuf {
+    transfer_snapshots_path(collection_snapshots_path).join(format!("{shard_id}-received.tar"))
+}
+
+fn get_replica_set(
+    shard_holder: &ShardHolder,
+    shard_id: ShardId,
+) -> CollectionResult<&ShardReplicaSet> {
+    shard_holder
+        .get_shard(&shard_id)
+        .ok_or_else(|| CollectionError::service_error(format!("Shard {shard_id} is not found")))
+}
+
+/// Transfer a snapshot of the shard, then the updates made since the snapshot was taken.
+///
+/// Segments are transferred as they are, with their vector and payload indexes, so that the
+/// receiving peer does not need to index the points again.
+async fn transfer_snapshot(
+    shard_holder: Arc<LockedShardHolder>,
+    shard_id: ShardId,
+    remote_shard: RemoteShard,
+    snapshots_path: &Path,
+    stopped: Arc<AtomicBool>,
+    rate_limiter: &mut TransferRateLimiter,
+) -> CollectionResult<()> {
+    let peer_id = remote_shard.peer_id;
+    let upload_shard = RemoteShard::new(
+        shard_id,
+        remote_shard.collection_id.clone(),
+        peer_id,
+        remote_shard.channel_service.clone(),
+    );
+
+    // Queue updates from now on, the snapshot is taken afterwards.
+    // A previous attempt might have left a proxy, it is replaced so that the transfer starts over.
+    {
+        let shard_holder_guard = shard_holder.read().await;
+        let replica_set = get_replica_set(&shard_holder_guard, shard_id)?;
+        replica_set.un_proxify_local().await?;
+        replica_set.queue_proxify_local(remote_shard).await?;
+    }
+
+    let transfer_path = transfer_snapshots_path(snapshots_path);
+    let snapshot_dir = transfer_path.join(format!("{shard_id}-to-{peer_id}"));
+    let snapshot_file = snapshot_dir.with_extension("tar");
+    if snapshot_dir.exists() {
+        remove_dir_all(&snapshot_dir).await?;
+    }
+    create_dir_all(&snapshot_dir).await?;
+
+    log::debug!("Creating snapshot of shard {shard_id} for transfer to peer {peer_id}");
+    {
+        let shard_holder_guard = shard_holder.read().await;
+        let replica_set = get_replica_set(&shard_holder_guard, shard_id)?;
+        replica_set
+            .create_transfer_snapshot(&transfer_path, &snapshot_dir)
+            .await?;
+    }
+
+    let snapshot_dir_clone = snapshot_dir.clone();
+    let snapshot_file_clone = snapshot_file.clone();
+    tokio::task::spawn_blocking(move || {
+        // have to use std here, cause TarBuilder is not async
+        let file = std::fs::File::create(&snapshot_file_clone)?;
+        let mut builder = TarBuilder::new(file);
+        builder.append_dir_all(".", &snapshot_dir_clone)?;
+        builder.finish()?;
+        Ok::<_, CollectionError>(())
+    })
+    .await??;
+    remove_dir_all(&snapshot_dir).await?;
+
+    let upload_result =
+        upload_snapshot(&upload_shard, &snapshot_file, &stopped, rate_limiter).await;
+    if let Err(err) = remove_file(&snapshot_file).await {
+        log::warn!("Failed to remove snapshot of shard {shard_id}: {err}");
+    }
+    let snapshot_size = upload_result?;
+
+    log::debug!("Recovering shard {shard_id} from snapshot on peer {peer_id}");
+    upload_shard.recover_shard_snapshot(snapshot_size).await?;
+
+    // Catch up with the updates made since the snapshot, without blocking updates
+    if stopped.load(std::sync::atomic::Ordering::Relaxed) {
+        return Err(CollectionError::Cancelled {
+            description: "Transfer cancelled".to_string(),
+        });
+    }
+    {
+        let shard_holder_guard = shard_holder.read().await;
+        let replica_set = get_replica_set(&shard_holder_guard, shard_id)?;
+        replica_set.transfer_queued_updates().await?;
+    }
+
+    // Send the last queued updates and forward all further updates, as with streamed records
+    let shard_holder_guard = shard_holder.read().await;
+    let replica_set = get_replica_set(&shard_holder_guard, shard_id)?;
+    replica_set.queue_proxy_into_forward_proxy().await
+}
+
+/// Upload the snapshot file chunk by chunk, returns the size of the snapshot
+async fn upload_snapshot(
+    remote_shard: &RemoteShard,
+    snapshot_file: &Path,
+    stopped: &AtomicBool,
+    rate_limiter: &mut TransferRateLimiter,
+) -> CollectionResult<u64> {
+    let mut file = tokio::fs::File::open(snapshot_file).await?;
+    let mut buffer = vec![0; SNAPSHOT_CHUNK_SIZE];
+    let mut offset = 0;
+    loop {
+        if stopped.load(std::sync::atomic::Ordering::Relaxed) {
+            return Err(CollectionError::Cancelled {
+                description: "Transfer cancelled".to_string(),
+            });
+        }
+
+        let mut filled = 0;
+        while filled < buffer.len() {
+            let read = file.read(&mut buffer[filled..]).await?;
+            if read == 0 {
+                break;
+            }
+            filled += read;
+        }
+        if filled == 0 && offset > 0 {
+            break;
+        }
+
+        remote_shard
+            .upload_shard_snapshot_chunk(offset, buffer[..filled].to_vec())
+            .await?;
+        offset += filled as u64;
+
+        if filled < buffer.len() {
+            break;
+        }
+        rate_limiter.consume(filled).await;
+    }
+    Ok(offset)
+}
+
+#[allow(clippy::too_many_arguments)]
 pub async fn transfer_shard(
     shard_holder: Arc<LockedShardHolder>,
     shard_id: ShardId,
     collection_id: CollectionId,
     peer_id: PeerId,
+    method: ShardTransferMethod,
+    snapshots_path: &Path,
     channel_service: ChannelService,
+    transfer_scheduler: &TransferScheduler,
     stopped: Arc<AtomicBool>,
 ) -> CollectionResult<()> {
     // Initiate shard on a remote peer
     let remote_shard = RemoteShard::new(shard_id, collection_id.clone(), peer_id, channel_service);
-
-    // ToDo: Initial fast file-based transfer (optional)
-    // * Create shard snapshot - save the latest version of point updates in the snapshot
-    // * Initiate shard, use snapshot link for initialization
-    // * Transfer difference between snapshot and current shard state
+    let mut rate_limiter = transfer_scheduler.rate_limiter();
 
     remote_shard.initiate_transfer().await?;
+
+    if method == ShardTransferMethod::Snapshot {
+        return transfer_snapshot(
+            shard_holder,
+            shard_id,
+            remote_shard,
+            snapshots_path,
+            stopped,
+            &mut rate_limiter,
+        )
+        .await;
+    }
+
     {
         let shard_holder_guard = shard_holder.read().await;
         let transferring_shard = shard_holder_guard.get_shard(&shard_id);
@@ -221,7 +412,13 @@ pub async fn transfer_shard(
         }
     };
     // Transfer contents batch by batch
-    transfer_batches(shard_holder.clone(), shard_id, stopped.clone()).await
+    transfer_batches(
+        shard_holder.clone(),
+        shard_id,
+        stopped.clone(),
+        &mut rate_limiter,
+    )
+    .await
 }
 
 pub fn validate_transfer_exists(
@@ -336,7 +533,7 @@ pub fn validate_transfer(
 /// Requirements:
 /// 1. Peer should have an active replica of the shard
 /// 2. There should be no active transfers from this peer with the same shard
-/// 3. Prefer peer with the lowest number of active transfers
+/// 3. Prefer peer with the lowest number of active transfers, sent or received
 ///
 /// If there are no peers that satisfy the requirements, returns `None`.
 pub fn suggest_transfer_source(
@@ -363,10 +560,12 @@ pub fn suggest_transfer_source(
         .cloned()
         .collect();
 
+    // Receiving a shard takes the bandwidth and the disk of the peer as well
     let transfer_counts = current_transfers
         .iter()
         .fold(HashMap::new(), |mut counts, transfer| {
             *counts.entry(transfer.from).or_insert(0_usize) += 1;
+            *counts.entry(transfer.to).or_insert(0_usize) += 1;
             counts
         });
 
@@ -375,7 +574,8 @@ pub fn suggest_transfer_source(
         .into_iter()
         .map(|peer_id| (peer_id, transfer_counts.get(&peer_id).unwrap_or(&0)))
         .collect::<Vec<(PeerId, &usize)>>();
-    candidates.sort_unstable_by_key(|(_, count)| **count);
+    // Break ties by peer id, so that the choice does not depend on the hash map order
+    candidates.sort_unstable_by_key(|(peer_id, count)| (**count, *peer_id));
 
     candidates.first().map(|(peer_id, _)| *peer_id)
 }
@@ -448,11 +648,14 @@ pub fn suggest_peer_to_remove_replica(
     candidates.first().map(|(peer_id, _, _)| *peer_id)
 }
 
+#[allow(clippy::too_many_arguments)]
 pub fn spawn_transfer_task<T, F>(
     shards_holder: Arc<LockedShardHolder>,
     transfer: ShardTransfer,
     collection_id: CollectionId,
+    snapshots_path: PathBuf,
     channel_service: ChannelService,
+    transfer_scheduler: Arc<TransferScheduler>,
     on_finish: T,
     on_error: F,
 ) -> StoppableAsyncTaskHandle<bool>
@@ -461,6 +664,22 @@ where
     F: Future<Output = ()> + Send + 'static,
 {
     spawn_async_stoppable(move |stopped| async move {
+        // Retries keep the turn of the transfer, the permit is released when the task ends
+        let _permit = match transfer_scheduler.wait_for_turn(&stopped).await {
+            Ok(permit) => permit,
+            Err(CollectionError::Cancelled { .. }) => return false,
+            Err(error) => {
+                log::error!(
+                    "Failed to schedule transfer of shard {} -> {}: {}",
+                    transfer.shard_id,
+                    transfer.to,
+                    error
+                );
+                on_error.await;
+                return false;
+            }
+        };
+
         let mut tries = MAX_RETRY_COUNT;
         let mut finished = false;
         while !finished && tries > 0 {
@@ -469,7 +688,10 @@ where
                 transfer.shard_id,
                 collection_id.clone(),
                 transfer.to,
+                transfer.method.unwrap_or_default(),
+                &snapshots_path,
                 channel_service.clone(),
+                &transfer_scheduler,
                 stopped.clone(),
             )
             .await;
@@ -515,3 +737,49 @@ where
         finished
     })
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn transfer(shard_id: ShardId, from: PeerId, to: PeerId) -> ShardTransfer {
+        ShardTransfer {
+            shard_id,
+            from,
+            to,
+            sync: true,
+            method: None,
+        }
+    }
+
+    #[test]
+    fn test_suggest_transfer_source_by_load() {
+        let shard_peers = HashMap::from([
+            (1, ReplicaState::Active),
+            (2, ReplicaState::Active),
+            (3, ReplicaState::Active),
+            (4, ReplicaState::Dead),
+        ]);
+
+        // No transfers, any active replica except the target
+        assert_eq!(suggest_transfer_source(0, 4, &[], &shard_peers), Some(1));
+
+        // Peer 1 sends another shard, peer 2 receives one
+        let transfers = [transfer(1, 1, 5), transfer(2, 5, 2)];
+        assert_eq!(
+            suggest_transfer_source(0, 4, &transfers, &shard_peers),
+            Some(3)
+        );
+
+        // Peer 3 already sends this shard
+        let transfers = [transfer(0, 3, 5), transfer(1, 1, 5), transfer(2, 1, 6)];
+        assert_eq!(
+            suggest_transfer_source(0, 4, &transfers, &shard_peers),
+            Some(2)
+        );
+
+        // No active replica to transfer from
+        let shard_peers = HashMap::from([(1, ReplicaState::Dead), (4, ReplicaState::Dead)]);
+        assert_eq!(suggest_transfer_source(0, 4, &[], &shard_peers), None);
+    }
+}
@@ -0,0 +1,135 @@
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
+use std::time::Duration;
+
+use tokio::sync::{OwnedSemaphorePermit, Semaphore};
+use tokio::time::{sleep_until, timeout, Instant};
+
+use crate::operations::types::{CollectionError, CollectionResult};
+
+/// How often a transfer waiting for its turn checks if it is cancelled
+const WAIT_CHECK_INTERVAL: Duration = Duration::from_secs(1);
+
+/// Schedules the shard transfers sent from this peer, for all collections.
+///
+/// Transfers requested at once, like when a peer is drained, would otherwise all run in parallel
+/// and compete for the network with the live queries.
+#[derive(Debug, Default)]
+pub struct TransferScheduler {
+    /// Limits the number of transfers running from this peer at once.
+    /// If not defined - all transfers run immediately.
+    outgoing_limiter: Option<Arc<Semaphore>>,
+    /// Bytes per second each transfer is allowed to send.
+    /// If not defined - transfers are not throttled.
+    rate_limit: Option<u64>,
+}
+
+impl TransferScheduler {
+    pub fn new(max_outgoing_transfers: Option<usize>, rate_limit: Option<u64>) -> Self {
+        Self {
+            outgoing_limiter: max_outgoing_transfers
+                .map(|limit| Arc::new(Semaphore::new(limit.max(1)))),
+            rate_limit: rate_limit.filter(|limit| *limit > 0),
+        }
+    }
+
+    /// Wait until the transfer is allowed to start.
+    ///
+    /// The transfer runs for as long as the returned permit is kept.
+    /// Returns `Cancelled` error if the transfer is stopped while waiting.
+    pub async fn wait_for_turn(
+        &self,
+        stopped: &AtomicBool,
+    ) -> CollectionResult<Option<OwnedSemaphorePermit>> {
+        let Some(limiter) = &self.outgoing_limiter else {
+            return Ok(None);
+        };
+        loop {
+            if stopped.load(Ordering::Relaxed) {
+                return Err(CollectionError::Cancelled {
+                    description: "Transfer cancelled".to_string(),
+                });
+            }
+            if let Ok(permit) = timeout(WAIT_CHECK_INTERVAL, limiter.clone().acquire_owned()).await
+            {
+                return permit.map(Some).map_err(|_| {
+                    CollectionError::service_error("Transfer scheduler is closed".to_string())
+                });
+            }
+        }
+    }
+
+    /// Rate limiter for a single transfer
+    pub fn rate_limiter(&self) -> TransferRateLimiter {
+        TransferRateLimiter::new(self.rate_limit)
+    }
+}
+
+/// Throttles a transfer to the configured number of bytes per second
+#[derive(Debug)]
+pub struct TransferRateLimiter {
+    bytes_per_sec: Option<u64>,
+    /// Time at which the data sent so far is allowed to be sent with the limit
+    next_free: Instant,
+}
+
+impl TransferRateLimiter {
+    pub fn new(bytes_per_sec: Option<u64>) -> Self {
+        Self {
+            bytes_per_sec,
+            next_free: Instant::now(),
+        }
+    }
+
+    /// Account for `bytes` sent, wait if the transfer is ahead of its limit
+    pub async fn consume(&mut self, bytes: usize) {
+        let Some(bytes_per_sec) = self.bytes_per_sec else {
+            return;
+        };
+        // Do not accumulate credit while the transfer was slower than its limit
+        self.next_free = self.next_free.max(Instant::now())
+            + Duration::from_secs_f64(bytes as f64 / bytes_per_sec as f64);
+        sleep_until(self.next_free).await;
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[tokio::test]
+    async fn test_transfer_scheduler_limits_outgoing_transfers() {
+        let scheduler = TransferScheduler::new(Some(1), None);
+        let stopped = AtomicBool::new(false);
+
+        let permit = scheduler.wait_for_turn(&stopped).await.unwrap();
+        assert!(permit.is_some());
+
+        // The second transfer waits for the first one, until it is cancelled
+        stopped.store(true, Ordering::Relaxed);
+        let result = scheduler.wait_for_turn(&stopped).await;
+        assert!(matches!(result, Err(CollectionError::Cancelled { .. })));
+
+        drop(permit);
+        stopped.store(false, Ordering::Relaxed);
+        assert!(scheduler.wait_for_turn(&stopped).await.unwrap().is_some());
+    }
+
+    #[tokio::test]
+    async fn test_transfer_scheduler_unlimited() {
+        let scheduler = TransferScheduler::default();
+        let stopped = AtomicBool::new(false);
+        assert!(scheduler.wait_for_turn(&stopped).await.unwrap().is_none());
+        assert!(scheduler.wait_for_turn(&stopped).await.unwrap().is_none());
+    }
+
+    #[tokio::test]
+    async fn test_transfer_rate_limiter() {
+        let mut limiter = TransferRateLimiter::new(Some(10_000));
+        let start = Instant::now();
+        for _ in 0..4 {
+            limiter.consume(500).await;
+        }
+        assert!(start.elapsed() >= Duration::from_millis(200));
+    }
+}
@@ -1,5 +1,6 @@
 use std::cmp::min;
 use std::collections::HashSet;
+use std::sync::atomic::{AtomicU64, Ordering};
 use std::sync::Arc;
 
 use itertools::Itertools;
@@ -80,6 +81,9 @@ pub struct UpdateHandler {
     runtime_handle: Handle,
     /// WAL, required for operations
     wal: LockedWal,
+    /// WAL index from which records must be kept, even if they are already flushed.
+    /// `u64::MAX` if there is no such requirement.
+    wal_keep_from: Arc<AtomicU64>,
     optimization_handles: Arc<TokioMutex<Vec<StoppableTaskHandle<bool>>>>,
     max_optimization_threads: usize,
 }
@@ -91,6 +95,7 @@ impl UpdateHandler {
         runtime_handle: Handle,
         segments: LockedSegmentHolder,
         wal: LockedWal,
+        wal_keep_from: Arc<AtomicU64>,
         flush_interval_sec: u64,
         max_optimization_threads: usize,
     ) -> UpdateHandler {
@@ -104,6 +109,7 @@ impl UpdateHandler {
             flush_stop: None,
             runtime_handle,
             wal,
+            wal_keep_from,
             flush_interval_sec,
             optimization_handles: Arc::new(TokioMutex::new(vec![])),
             max_optimization_threads,
@@ -131,6 +137,7 @@ impl UpdateHandler {
         self.flush_worker = Some(self.runtime_handle.spawn(Self::flush_worker(
             self.segments.clone(),
             self.wal.clone(),
+            self.wal_keep_from.clone(),
             self.flush_interval_sec,
             flush_rx,
         )));
@@ -395,6 +402,7 @@ impl UpdateHandler {
     async fn flush_worker(
         segments: LockedSegmentHolder,
         wal: LockedWal,
+        wal_keep_from: Arc<AtomicU64>,
         flush_interval_sec: u64,
         mut stop_receiver: oneshot::Receiver<()>,
     ) {
@@ -431,7 +439,10 @@ impl UpdateHandler {
                     continue;
                 }
             };
-            if let Err(err) = wal.lock().ack(confirmed_version) {
+            // Records still needed for a shard transfer must not be truncated
+            let keep_from = wal_keep_from.load(Ordering::Relaxed);
+            let ack_version = confirmed_version.min(keep_from.saturating_sub(1));
+            if let Err(err) = wal.lock().ack(ack_version) {
                 segments.write().report_optimizer_error(err);
             }
         }
@@ -10,6 +10,10 @@ use crate::common::anonymize::Anonymize;
 
 const AVG_DATASET_LEN: usize = 128;
 const SLIDING_WINDOW_LEN: usize = 8;
+/// Weight of the last duration in the exponentially weighted moving average
+const EWMA_ALPHA: f32 = 0.2;
+/// Failed operations multiply the moving average by this factor
+const EWMA_FAILURE_PENALTY: f32 = 2.0;
 
 #[derive(Serialize, Deserialize, Clone, Default, Debug, JsonSchema)]
 pub struct OperationDurationStatistics {
@@ -44,6 +48,7 @@ pub struct OperationDurationsAggregator {
     timing_loops: usize,
     min_value: Option<f32>,
     max_value: Option<f32>,
+    ewma_value: Option<f32>,
     last_response_date: Option<DateTime<Utc>>,
 }
 
@@ -180,13 +185,18 @@ impl OperationDurationsAggregator {
             timing_loops: 0,
             min_value: None,
             max_value: None,
+            ewma_value: None,
             last_response_date: Some(Utc::now().round_subsecs(2)),
         }))
     }
 
     pub fn add_operation_result(&mut self, success: bool, duration: Duration) {
+        let duration = duration.as_micros() as f32;
         if success {
-            let duration = duration.as_micros() as f32;
+            self.ewma_value = Some(match self.ewma_value {
+                Some(ewma_value) => EWMA_ALPHA * duration + (1. - EWMA_ALPHA) * ewma_value,
+                None => duration,
+            });
             self.min_value = Some(match self.min_value {
                 Some(min_value) => min_value.min(duration),
                 None => duration,
@@ -205,6 +215,13 @@ impl OperationDurationsAggregator {
             }
         } else {
             self.fail_count += 1;
+            // A failing operation might fail fast, it must not look faster than it was.
+            // The penalty does not compound: a burst of failures is capped by the slowest duration.
+            let penalized =
+                self.ewma_value.unwrap_or(duration).max(duration) * EWMA_FAILURE_PENALTY;
+            let max_penalized =
+                self.max_value.unwrap_or(duration).max(duration) * EWMA_FAILURE_PENALTY;
+            self.ewma_value = Some(penalized.min(max_penalized));
         }
 
         self.last_response_date = Some(Utc::now().round_subsecs(2));
@@ -225,6 +242,37 @@ impl OperationDurationsAggregator {
         }
     }
 
+    /// Exponentially weighted moving average of the durations in microseconds.
+    /// Follows changes faster than the average of the statistics, and is increased by failures.
+    pub fn ewma_duration_micros(&self) -> Option<f32> {
+        self.ewma_value
+    }
+
+    /// Duration in microseconds that the given fraction of the last successful operations
+    /// did not exceed, e.g. `0.95` for the 95th percentile
+    pub fn percentile_duration_micros(&self, percentile: f32) -> Option<f32> {
+        let mut data = self.last_timings().to_vec();
+        if data.is_empty() {
+            return None;
+        }
+        data.sort_unstable_by(f32::total_cmp);
+        let index = ((data.len() - 1) as f32 * percentile.clamp(0., 1.)).round() as usize;
+        Some(data[index])
+    }
+
+    pub fn last_response_date(&self) -> Option<DateTime<Utc>> {
+        self.last_response_date
+    }
+
+    /// Durations of the last successful operations, in no particular order
+    fn last_timings(&self) -> &[f32] {
+        if self.timing_loops > 0 {
+            &self.timings
+        } else {
+            &self.timings[..self.timing_index]
+        }
+    }
+
     fn calculate_avg(&self) -> f32 {
         let data: Vec<f32> = if self.timing_loops > 0 {
             let mut result = Vec::new();
@@ -252,3 +300,41 @@ impl OperationDurationsAggregator {
         data.iter().sum::<f32>() / data.len() as f32
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_ewma_and_percentile_durations() {
+        let aggregator = OperationDurationsAggregator::new();
+        let mut aggregator = aggregator.lock();
+        assert_eq!(aggregator.ewma_duration_micros(), None);
+        assert_eq!(aggregator.percentile_duration_micros(0.5), None);
+
+        for millis in 1..=100 {
+            aggregator.add_operation_result(true, Duration::from_millis(millis));
+        }
+        assert_eq!(aggregator.percentile_duration_micros(0.0), Some(1000.));
+        assert_eq!(aggregator.percentile_duration_micros(0.5), Some(51000.));
+        assert_eq!(aggregator.percentile_duration_micros(1.0), Some(100_000.));
+
+        // Recent durations weigh more than old ones
+        let ewma = aggregator.ewma_duration_micros().unwrap();
+        assert!(ewma > aggregator.get_statistics().avg_duration_micros.unwrap());
+        assert!(ewma < 100_000.);
+
+        // Failures only make the average slower
+        aggregator.add_operation_result(false, Duration::from_micros(1));
+        assert!(aggregator.ewma_duration_micros().unwrap() > ewma);
+
+        // ... but not beyond the penalized slowest duration
+        for _ in 0..1000 {
+            aggregator.add_operation_result(false, Duration::from_micros(1));
+        }
+        assert_eq!(
+            aggregator.ewma_duration_micros(),
+            Some(100_000. * EWMA_FAILURE_PENALTY)
+        );
+    }
+}
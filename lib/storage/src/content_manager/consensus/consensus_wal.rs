@@ -5,13 +5,16 @@ use itertools::Itertools;
 use prost::Message;
 use protobuf::Message as _;
 use raft::eraftpb::Entry as RaftEntry;
-use wal::Wal;
+use wal::{Wal, WalOptions};
 
 use crate::content_manager::consensus_manager;
 use crate::{ConsensusOperations, StorageError};
 
 const COLLECTIONS_META_WAL_DIR: &str = "collections_meta_wal";
 
+/// Consensus entries are small, segments should be small enough to be removed on compaction
+const COLLECTIONS_META_WAL_SEGMENT_CAPACITY: usize = 4 * 1024 * 1024;
+
 pub struct ConsensusOpWal(Wal);
 
 impl ConsensusOpWal {
@@ -19,7 +22,14 @@ impl ConsensusOpWal {
         let collections_meta_wal_path = Path::new(storage_path).join(COLLECTIONS_META_WAL_DIR);
         create_dir_all(&collections_meta_wal_path)
             .expect("Can't create Collections meta Wal directory");
-        let wal = Wal::open(collections_meta_wal_path).expect("Can't open Collections meta Wal");
+        let wal = Wal::with_options(
+            collections_meta_wal_path,
+            &WalOptions {
+                segment_capacity: COLLECTIONS_META_WAL_SEGMENT_CAPACITY,
+                segment_queue_len: 0,
+            },
+        )
+        .expect("Can't open Collections meta Wal");
         ConsensusOpWal(wal)
     }
 
@@ -27,6 +37,21 @@ impl ConsensusOpWal {
         Ok(self.0.clear()?)
     }
 
+    /// Remove entries up to raft index `until_index` from the WAL.
+    ///
+    /// WAL is truncated by whole segments, so some of these entries might be kept on disk.
+    /// The entry at `until_index` is always kept, so that the index offset is preserved.
+    pub fn compact(&mut self, until_index: u64) -> Result<(), StorageError> {
+        let Some(first_entry) = self.first_entry()? else {
+            return Ok(());
+        };
+        if until_index <= first_entry.index {
+            return Ok(());
+        }
+        let offset = first_entry.index - self.0.first_index();
+        Ok(self.0.prefix_truncate(until_index - offset)?)
+    }
+
     pub fn entry(&self, id: u64) -> raft::Result<RaftEntry> {
         // Raft entries are expected to have index starting from 1
         if id < 1 {
@@ -70,6 +70,15 @@ impl Persistent {
         self.save()
     }
 
+    /// Remember that the consensus log is compacted up to the entry of `meta`, inclusive
+    pub fn set_latest_snapshot_meta(
+        &mut self,
+        meta: SnapshotMetadataSer,
+    ) -> Result<(), StorageError> {
+        self.latest_snapshot_meta = meta;
+        self.save()
+    }
+
     /// Returns state and if it was initialized for the first time
     pub fn load_or_init(
         storage_path: impl AsRef<Path>,
@@ -29,7 +29,7 @@ use super::CollectionContainer;
 use crate::content_manager::consensus::consensus_wal::ConsensusOpWal;
 use crate::content_manager::consensus::entry_queue::EntryId;
 use crate::content_manager::consensus::operation_sender::OperationSender;
-use crate::content_manager::consensus::persistent::Persistent;
+use crate::content_manager::consensus::persistent::{Persistent, SnapshotMetadataSer};
 use crate::types::{
     ClusterInfo, ClusterStatus, ConsensusThreadStatus, MessageSendErrors, PeerAddressById,
     PeerInfo, RaftInfo,
@@ -431,12 +431,22 @@ impl<C: CollectionContainer> ConsensusManager<C> {
     ///
     pub fn apply_normal_entry(&self, entry: &RaftEntry) -> Result<bool, StorageError> {
         let operation: ConsensusOperations = entry.try_into()?;
+        self.apply_operation(operation)
+    }
+
+    fn apply_operation(&self, operation: ConsensusOperations) -> Result<bool, StorageError> {
+        if let ConsensusOperations::Batch(operations) = operation {
+            return self.apply_batch(operations);
+        }
+
         let on_apply = self.on_consensus_op_apply.lock().remove(&operation);
         let result = match operation {
             ConsensusOperations::CollectionMeta(operation) => {
                 self.toc.perform_collection_meta_op(*operation)
             }
 
+            ConsensusOperations::Batch(_) => unreachable!(),
+
             ConsensusOperations::AddPeer { .. } | ConsensusOperations::RemovePeer(_) => {
                 // RemovePeer or AddPeer should be converted into native ConfChangeV2 message before sending to the Raft.
                 // So we do not expect to receive these operations as a normal entry.
@@ -462,6 +472,27 @@ impl<C: CollectionContainer> ConsensusManager<C> {
         result
     }
 
+    /// Apply operations of a batch entry in order, each proposer is notified with its own result.
+    ///
+    /// Operations of the batch are independent: a user error only fails its own operation.
+    /// A service error stops applying the batch, the whole entry is applied again after restart.
+    fn apply_batch(&self, operations: Vec<ConsensusOperations>) -> Result<bool, StorageError> {
+        let mut all_succeeded = true;
+        for operation in operations {
+            match self.apply_operation(operation) {
+                Ok(result) => all_succeeded &= result,
+                Err(err @ StorageError::ServiceError { .. }) => return Err(err),
+                Err(err) => {
+                    log::warn!(
+                        "Failed to apply batched consensus operation with user error: {err}"
+                    );
+                    all_succeeded = false;
+                }
+            }
+        }
+        Ok(all_succeeded)
+    }
+
     // Outer `Result` is "fatal" error, inner `Result` is "transient"/"local" error.
     pub fn apply_snapshot(
         &self,
@@ -660,6 +691,45 @@ impl<C: CollectionContainer> ConsensusManager<C> {
         self.persistent.read().last_applied_entry()
     }
 
+    /// Compact the consensus WAL up to the last applied entry, if at least
+    /// `min_entries_to_compact` entries were applied since the previous compaction.
+    ///
+    /// Applied operations are persisted in the state of the collections, peers which are behind
+    /// the compacted entries receive a Raft snapshot of this state instead of the whole log.
+    /// Returns `true` if the WAL was compacted.
+    pub fn compact_wal(&self, min_entries_to_compact: u64) -> Result<bool, StorageError> {
+        if min_entries_to_compact == 0 {
+            return Ok(false);
+        }
+        let Some(last_applied) = self.last_applied_entry() else {
+            return Ok(false);
+        };
+        let compacted_until = self.persistent.read().latest_snapshot_meta().index;
+        if last_applied < compacted_until + min_entries_to_compact {
+            return Ok(false);
+        }
+
+        let mut wal = self.wal.lock();
+        let term = wal
+            .entry(last_applied)
+            .map_err(|err| {
+                StorageError::service_error(format!(
+                    "Can't read applied entry {last_applied} to compact consensus WAL: {err}"
+                ))
+            })?
+            .term;
+        // Save compaction point before truncating, so that WAL never starts after it
+        self.persistent
+            .write()
+            .set_latest_snapshot_meta(SnapshotMetadataSer {
+                term,
+                index: last_applied,
+            })?;
+        wal.compact(last_applied)?;
+        log::debug!("Compacted consensus WAL up to entry {last_applied}");
+        Ok(true)
+    }
+
     pub fn sync_local_state(&self) -> Result<(), StorageError> {
         self.toc.sync_local_state()
     }
@@ -702,13 +772,18 @@ impl<C: CollectionContainer> Storage for ConsensusManager<C> {
         if idx == snapshot_meta.index {
             return Ok(snapshot_meta.term);
         }
+        if idx < snapshot_meta.index {
+            return Err(raft::Error::Store(raft::StorageError::Compacted));
+        }
         Ok(wal_guard.entry(idx)?.term)
     }
 
     fn first_index(&self) -> raft::Result<u64> {
+        // WAL might keep some of the entries which are already compacted
+        let compacted_until = self.persistent.read().latest_snapshot_meta().index;
         let index = match self.wal.lock().first_entry().map_err(raft_error_other)? {
-            Some(entry) => entry.index,
-            None => self.persistent.read().latest_snapshot_meta().index + 1,
+            Some(entry) => entry.index.max(compacted_until + 1),
+            None => compacted_until + 1,
         };
         Ok(index)
     }
@@ -811,13 +886,16 @@ mod tests {
     use proptest::prelude::*;
     use raft::eraftpb::Entry;
     use raft::storage::{MemStorage, Storage};
+    use raft::GetEntriesContext;
     use tempfile::Builder;
+    use tokio::sync::broadcast;
 
     use super::ConsensusManager;
     use crate::content_manager::consensus::consensus_wal::ConsensusOpWal;
     use crate::content_manager::consensus::entry_queue::EntryApplyProgressQueue;
     use crate::content_manager::consensus::operation_sender::OperationSender;
     use crate::content_manager::consensus::persistent::Persistent;
+    use crate::content_manager::consensus_ops::ConsensusOperations;
     use crate::content_manager::CollectionContainer;
 
     #[test]
@@ -963,6 +1041,77 @@ mod tests {
         (consensus_state, mem_storage)
     }
 
+    #[test]
+    fn batch_entry_notifies_each_operation() {
+        let dir = Builder::new().prefix("raft_state_test").tempdir().unwrap();
+        let (consensus_state, _) = setup_storages(vec![], dir.path());
+
+        let operations = vec![
+            ConsensusOperations::remove_replica("first".to_string(), 0, 1),
+            ConsensusOperations::remove_replica("second".to_string(), 0, 1),
+        ];
+        let mut receivers = Vec::new();
+        for operation in &operations {
+            let (sender, receiver) = broadcast::channel(1);
+            consensus_state
+                .on_consensus_op_apply
+                .lock()
+                .insert(operation.clone(), sender);
+            receivers.push(receiver);
+        }
+
+        let entry = Entry {
+            index: 1,
+            data: serde_cbor::to_vec(&ConsensusOperations::Batch(operations)).unwrap(),
+            ..Default::default()
+        };
+        assert!(consensus_state.apply_normal_entry(&entry).unwrap());
+
+        for mut receiver in receivers {
+            assert!(receiver.try_recv().unwrap().unwrap());
+        }
+        assert!(consensus_state.on_consensus_op_apply.lock().is_empty());
+    }
+
+    #[test]
+    fn compacted_wal_starts_after_applied_entries() {
+        let dir = Builder::new().prefix("raft_state_test").tempdir().unwrap();
+        let entries = (1..=10)
+            .map(|index| Entry {
+                index,
+                term: 1,
+                ..Default::default()
+            })
+            .collect();
+        let (consensus_state, _) = setup_storages(entries, dir.path());
+        assert!(!consensus_state.compact_wal(5).unwrap());
+
+        {
+            let mut persistent = consensus_state.persistent.write();
+            persistent.set_unapplied_entries(1, 10).unwrap();
+            for _ in 0..8 {
+                persistent.entry_applied().unwrap();
+            }
+        }
+        assert!(!consensus_state.compact_wal(10).unwrap());
+        assert!(consensus_state.compact_wal(5).unwrap());
+
+        assert_eq!(consensus_state.first_index().unwrap(), 9);
+        assert_eq!(consensus_state.last_index().unwrap(), 10);
+        assert_eq!(consensus_state.term(8).unwrap(), 1);
+        assert!(matches!(
+            consensus_state.entries(1, 11, None::<u64>, GetEntriesContext::empty(false)),
+            Err(raft::Error::Store(raft::StorageError::Compacted))
+        ));
+        assert_eq!(
+            consensus_state
+                .entries(9, 11, None::<u64>, GetEntriesContext::empty(false))
+                .unwrap()
+                .len(),
+            2
+        );
+    }
+
     prop_compose! {
         fn gen_entries(min_entries: u64, max_entries: u64)(n in min_entries..max_entries, inc_term_every in 1u64..max_entries) -> Vec<Entry> {
             (1..=n).map(|index| Entry {index, term: 1 + index/inc_term_every, ..Default::default()}).collect::<Vec<Entry>>()
@@ -44,6 +44,9 @@ pub mod consensus_ops {
             peer_id: PeerId,
             status: SnapshotStatus,
         },
+        /// Collection meta operations proposed together as a single Raft entry.
+        /// Applied one by one in the given order.
+        Batch(Vec<ConsensusOperations>),
     }
 
     impl TryFrom<&RaftEntry> for ConsensusOperations {
@@ -17,6 +17,7 @@ use collection::grouping::GroupBy;
 use collection::operations::config_diff::DiffConfig;
 use collection::operations::consistency_params::ReadConsistency;
 use collection::operations::point_ops::WriteOrdering;
+use collection::operations::shared_storage_config::SharedStorageConfig;
 use collection::operations::snapshot_ops::SnapshotDescription;
 use collection::operations::types::{
     AliasDescription, CollectionResult, CountRequest, CountResult, GroupsResult, PointRequest,
@@ -71,6 +72,8 @@ pub const DEFAULT_WRITE_LOCK_ERROR_MESSAGE: &str = "Write operations are forbidd
 pub struct TableOfContent {
     collections: Arc<RwLock<Collections>>,
     storage_config: Arc<StorageConfig>,
+    /// Same instance for all collections, so that they share the per-node limits
+    shared_storage_config: Arc<SharedStorageConfig>,
     search_runtime: Runtime,
     update_runtime: Runtime,
     general_runtime: Runtime,
@@ -111,6 +114,7 @@ impl TableOfContent {
             let temp_path = Path::new(path);
             create_dir_all(temp_path).expect("Can't create temporary files directory");
         }
+        let shared_storage_config = Arc::new(storage_config.to_shared_storage_config());
         let collection_paths =
             read_dir(&collections_path).expect("Can't read Collections directory");
         let mut collections: HashMap<String, Collection> = Default::default();
@@ -144,7 +148,7 @@ impl TableOfContent {
                 this_peer_id,
                 &collection_path,
                 &collection_snapshots_path,
-                storage_config.to_shared_storage_config().into(),
+                shared_storage_config.clone(),
                 channel_service.clone(),
                 Self::change_peer_state_callback(
                     consensus_proposal_sender.clone(),
@@ -187,6 +191,7 @@ impl TableOfContent {
         TableOfContent {
             collections: Arc::new(RwLock::new(collections)),
             storage_config: Arc::new(storage_config.clone()),
+            shared_storage_config,
             search_runtime,
             update_runtime,
             general_runtime,
@@ -443,7 +448,7 @@ impl TableOfContent {
             &collection_path,
             &snapshots_path,
             &collection_config,
-            self.storage_config.to_shared_storage_config().into(),
+            self.shared_storage_config.clone(),
             collection_shard_distribution,
             self.channel_service.clone(),
             Self::change_peer_state_callback(
@@ -743,6 +748,7 @@ impl TableOfContent {
                 from: from_peer,
                 to: to_peer,
                 sync,
+                method: None,
             };
             let operation = ConsensusOperations::start_transfer(collection_name, transfer_request);
             proposal_sender.send(operation)?;
@@ -1120,6 +1126,40 @@ impl TableOfContent {
         Ok(())
     }
 
+    /// Write a chunk of the snapshot of a shard transferred to this peer
+    pub async fn receive_shard_snapshot_chunk(
+        &self,
+        collection_name: &str,
+        shard_id: ShardId,
+        offset: u64,
+        data: &[u8],
+    ) -> Result<(), StorageError> {
+        self.get_collection(collection_name)
+            .await?
+            .write_shard_transfer_snapshot_chunk(shard_id, offset, data)
+            .await?;
+        Ok(())
+    }
+
+    /// Recover the shard transferred to this peer from its uploaded snapshot
+    pub async fn recover_received_shard_snapshot(
+        &self,
+        collection_name: &str,
+        shard_id: ShardId,
+        size: u64,
+    ) -> Result<(), StorageError> {
+        log::info!(
+            "Recovering shard {}:{} from transferred snapshot",
+            collection_name,
+            shard_id
+        );
+        self.get_collection(collection_name)
+            .await?
+            .recover_shard_transfer_snapshot(shard_id, size)
+            .await?;
+        Ok(())
+    }
+
     /// Recommend points using positive and negative example from the request
     ///
     /// # Arguments
@@ -1446,7 +1486,7 @@ impl TableOfContent {
                         &collection_path,
                         &snapshots_path,
                         &state.config,
-                        self.storage_config.to_shared_storage_config().into(),
+                        self.shared_storage_config.clone(),
                         shard_distribution,
                         self.channel_service.clone(),
                         Self::change_peer_state_callback(
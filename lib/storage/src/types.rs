@@ -26,6 +26,18 @@ pub struct PerformanceConfig {
     pub update_rate_limit: Option<usize>,
     #[serde(default, skip_serializing_if = "Option::is_none")]
     pub search_timeout_sec: Option<usize>,
+    /// Percentile of the recent search latency of a replica, after which a `hedged` read
+    /// queries another replica as well. Default is 95.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub hedged_read_percentile: Option<f32>,
+    /// Max number of shard transfers running from this peer at once, for all collections.
+    /// If not defined - all requested transfers run at once.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub max_outgoing_shard_transfers: Option<usize>,
+    /// Max kilobytes per second sent by each shard transfer.
+    /// If not defined - transfers are not throttled.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub shard_transfer_rate_limit_kb: Option<usize>,
 }
 
 const fn default_max_optimization_threads() -> usize {
@@ -81,6 +93,13 @@ impl StorageConfig {
             self.performance
                 .search_timeout_sec
                 .map(|x| Duration::from_secs(x as u64)),
+            self.performance
+                .hedged_read_percentile
+                .map(|percentile| percentile / 100.0),
+            self.performance.max_outgoing_shard_transfers,
+            self.performance
+                .shard_transfer_rate_limit_kb
+                .map(|kb| kb as u64 * 1024),
         )
     }
 }
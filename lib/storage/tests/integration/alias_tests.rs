@@ -46,6 +46,9 @@ fn test_alias_operation() {
             max_optimization_threads: 1,
             update_rate_limit: None,
             search_timeout_sec: None,
+            hedged_read_percentile: None,
+            max_outgoing_shard_transfers: None,
+            shard_transfer_rate_limit_kb: None,
         },
         hnsw_index: Default::default(),
         quantization: None,
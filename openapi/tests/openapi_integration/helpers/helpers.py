@@ -1,9 +1,13 @@
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Optional
+
 import jsonschema
 import requests
 from schemathesis.models import APIOperation
-from schemathesis.specs.openapi.references import ConvertingResolver
+from schemathesis.specs.openapi.converter import to_json_schema_recursive
 from schemathesis.specs.openapi.schemas import OpenApi30
 
+from .http_session import get_session
 from .settings import QDRANT_HOST, SCHEMA
 
 
@@ -22,13 +26,71 @@ def validate_schema(data, operation_schema: OpenApi30, raw_definitions):
     :param raw_definitions: definitions to check data with
     :return:
     """
-    resolver = ConvertingResolver(
+    compile_validator(operation_schema, raw_definitions).validate(data)
+
+
+@lru_cache(maxsize=None)
+def get_json_schema_components() -> dict:
+    """
+    OpenAPI components converted to JSON Schema once,
+    instead of converting each referenced definition on every resolution during validation.
+    """
+    return {
+        "components": to_json_schema_recursive(
+            SCHEMA.raw_schema.get("components", {}),
+            nullable_name=SCHEMA.nullable_name,
+            is_response_schema=False,
+        )
+    }
+
+
+def compile_validator(operation_schema: OpenApi30, raw_definitions) -> jsonschema.Draft7Validator:
+    resolver = jsonschema.RefResolver(
         operation_schema.location or "",
-        operation_schema.raw_schema,
+        get_json_schema_components(),
+    )
+    definitions = to_json_schema_recursive(
+        raw_definitions,
         nullable_name=operation_schema.nullable_name,
-        is_response_schema=False
+        is_response_schema=False,
+    )
+    return jsonschema.Draft7Validator(definitions, resolver=resolver)
+
+
+class OperationValidator(NamedTuple):
+    operation: APIOperation
+    body_validator: Optional[jsonschema.Draft7Validator]
+    path_params: FrozenSet[str]
+    required_path_params: FrozenSet[str]
+    query_params: FrozenSet[str]
+    required_query_params: FrozenSet[str]
+
+
+@lru_cache(maxsize=None)
+def get_operation_validator(api: str, method: str) -> OperationValidator:
+    """
+    Compile the request validation of an operation once, it is reused by every request to it.
+    """
+    operation: APIOperation = SCHEMA[api][method]
+
+    assert isinstance(operation.schema, OpenApi30)
+
+    body_schema = operation.definition.raw.get('requestBody', {}).get('content', {}).get('application/json')
+    body_validator = None
+    if body_schema is not None:
+        body_validator = compile_validator(
+            operation_schema=operation.schema,
+            raw_definitions=body_schema['schema']
+        )
+
+    return OperationValidator(
+        operation=operation,
+        body_validator=body_validator,
+        path_params=frozenset(p.name for p in operation.path_parameters.items),
+        required_path_params=frozenset(p.name for p in operation.path_parameters.items if p.is_required),
+        query_params=frozenset(p.name for p in operation.query.items),
+        required_query_params=frozenset(p.name for p in operation.query.items if p.is_required),
     )
-    jsonschema.validate(data, raw_definitions, cls=jsonschema.Draft7Validator, resolver=resolver)
 
 
 def request_with_validation(
@@ -38,36 +100,22 @@ def request_with_validation(
         query_params: dict = None,
         body: dict = None
 ) -> requests.Response:
-    operation: APIOperation = SCHEMA[api][method]
-
-    assert isinstance(operation.schema, OpenApi30)
+    validator = get_operation_validator(api, method)
 
     if body:
-        validate_schema(
-            data=body,
-            operation_schema=operation.schema,
-            raw_definitions=operation.definition.raw['requestBody']['content']['application/json']['schema']
-        )
+        assert validator.body_validator is not None, f"{method} {api} does not accept a JSON request body"
+        validator.body_validator.validate(body)
 
     if path_params is None:
         path_params = {}
     if query_params is None:
         query_params = {}
-    action = getattr(requests, method.lower(), None)
-
-    for param in operation.path_parameters.items:
-        if param.is_required:
-            assert param.name in path_params
-
-    for param in operation.query.items:
-        if param.is_required:
-            assert param.name in query_params
-
-    for param in path_params.keys():
-        assert param in set(p.name for p in operation.path_parameters.items)
+    action = getattr(get_session(), method.lower(), None)
 
-    for param in query_params.keys():
-        assert param in set(p.name for p in operation.query.items)
+    assert validator.required_path_params <= path_params.keys()
+    assert validator.required_query_params <= query_params.keys()
+    assert path_params.keys() <= validator.path_params
+    assert query_params.keys() <= validator.query_params
 
     if not action:
         raise RuntimeError(f"Method {method} does not exists")
@@ -78,6 +126,6 @@ def request_with_validation(
         json=body
     )
 
-    operation.validate_response(response)
+    validator.operation.validate_response(response)
 
     return response
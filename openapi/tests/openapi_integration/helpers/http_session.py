@@ -0,0 +1,54 @@
+"""
+Shared HTTP session used by `request_with_validation`.
+
+Connections to Qdrant are kept alive and pooled, instead of opening a new
+connection for every request. Failed connections are retried with backoff,
+responses with an error status are returned as is, as tests check them.
+The session is re-created in forked processes, as pooled sockets can not be
+shared between processes.
+
+`requests` only supports HTTP/1.1.
+
+Counterpart of `tests/consensus_tests/http_session.py`: these tests run in a
+container which only mounts `openapi/tests`, so the module can not be imported
+from there. Keep `make_session` and `get_session` of both modules in sync.
+"""
+import os
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .settings import HTTP_BACKOFF, HTTP_POOL_SIZE, HTTP_RETRIES
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+
+def make_session(pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES,
+                 backoff_factor: float = HTTP_BACKOFF) -> requests.Session:
+    # Only retry connection errors, responses with an error status are returned as is
+    retry = Retry(total=retries, connect=retries, read=False, status=0, backoff_factor=backoff_factor)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        _session = make_session()
+        _session_pid = os.getpid()
+    return _session
+
+
+def set_session(session: requests.Session):
+    """
+    Replace the session used by all helpers, e.g. to change the retry policy for a test.
+    """
+    global _session, _session_pid
+    _session = session
+    _session_pid = os.getpid()
@@ -7,3 +7,8 @@ OPENAPI_FILE = os.environ.get("OPENAPI_FILE", os.path.join(os.path.dirname(ROOT_
 
 SCHEMA = schemathesis.from_file(open(OPENAPI_FILE))
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "http://localhost:6333")
+
+# HTTP session of the helpers, see `http_session.py`
+HTTP_POOL_SIZE = int(os.environ.get("QDRANT_HTTP_POOL_SIZE", 16))
+HTTP_RETRIES = int(os.environ.get("QDRANT_HTTP_RETRIES", 3))
+HTTP_BACKOFF = float(os.environ.get("QDRANT_HTTP_BACKOFF", 0.1))
@@ -53,6 +53,7 @@ mod test {
         test("all", from_type(ReadConsistencyType::All));
         test("majority", from_type(ReadConsistencyType::Majority));
         test("quorum", from_type(ReadConsistencyType::Quorum));
+        test("hedged", from_type(ReadConsistencyType::Hedged));
     }
 
     #[test]
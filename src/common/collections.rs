@@ -159,6 +159,7 @@ pub async fn do_update_collection_cluster(
                             to: move_shard.to_peer_id,
                             from: move_shard.from_peer_id,
                             sync: false,
+                            method: move_shard.method,
                         }),
                     ),
                     wait_timeout,
@@ -192,6 +193,7 @@ pub async fn do_update_collection_cluster(
                             to: replicate_shard.to_peer_id,
                             from: replicate_shard.from_peer_id,
                             sync: true,
+                            method: replicate_shard.method,
                         }),
                     ),
                     wait_timeout,
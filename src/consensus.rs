@@ -53,6 +53,8 @@ pub struct Consensus {
     /// ToDo: Make if many
     config: ConsensusConfig,
     broker: RaftMessageBroker,
+    /// Message received while collecting a batch of proposals, which is handled next
+    pending_message: Option<Message>,
 }
 
 impl Consensus {
@@ -234,6 +236,7 @@ impl Consensus {
             runtime,
             config,
             broker,
+            pending_message: None,
         };
 
         Ok((consensus, sender))
@@ -449,6 +452,9 @@ impl Consensus {
                 if stop_consensus {
                     return Ok(());
                 }
+                if let Err(err) = store.compact_wal(self.config.compact_wal_entries) {
+                    log::warn!("Failed to compact consensus WAL: {err}");
+                }
             } else {
                 timeout -= d;
             }
@@ -477,10 +483,13 @@ impl Consensus {
     fn propose_updates(&mut self, timeout: Duration) -> anyhow::Result<bool> {
         // Poll the async. channel on the consensus runtime.
         // https://docs.rs/tokio/1.22.0/tokio/sync/mpsc/index.html#communicating-between-sync-and-async-code
-        let received = self.runtime.block_on(async {
-            // Wait for the next proposal during `timeout`.
-            tokio::time::timeout(timeout, self.receiver.recv()).await
-        });
+        let received = match self.pending_message.take() {
+            Some(message) => Ok(Some(message)),
+            None => self.runtime.block_on(async {
+                // Wait for the next proposal during `timeout`.
+                tokio::time::timeout(timeout, self.receiver.recv()).await
+            }),
+        };
         match received {
             Ok(Some(Message::FromPeer(message))) => {
                 if message.get_msg_type() == MessageType::MsgHeartbeat
@@ -525,6 +534,7 @@ impl Consensus {
                         Ok(())
                     }
                     _ => {
+                        let operation = self.collect_proposal_batch(operation);
                         let message = match serde_cbor::to_vec(&operation) {
                             Ok(message) => message,
                             Err(err) => {
@@ -554,6 +564,45 @@ impl Consensus {
         }
     }
 
+    /// Collect collection meta operations proposed within `proposal_batch_window_ms` after `operation`,
+    /// so that they are committed as a single Raft entry.
+    /// The first message which can not be batched is kept in `pending_message` to be handled next.
+    fn collect_proposal_batch(&mut self, operation: ConsensusOperations) -> ConsensusOperations {
+        let max_batch_size = self.config.max_proposal_batch_size;
+        if max_batch_size <= 1 || !matches!(operation, ConsensusOperations::CollectionMeta(_)) {
+            return operation;
+        }
+
+        let deadline = tokio::time::Instant::now()
+            + Duration::from_millis(self.config.proposal_batch_window_ms);
+        let mut batch = vec![operation];
+        while batch.len() < max_batch_size {
+            // Messages which are already queued are received even if the window has elapsed
+            let received = self
+                .runtime
+                .block_on(async { tokio::time::timeout_at(deadline, self.receiver.recv()).await });
+            match received {
+                Ok(Some(Message::FromClient(
+                    operation @ ConsensusOperations::CollectionMeta(_),
+                ))) => batch.push(operation),
+                Ok(Some(message)) => {
+                    self.pending_message = Some(message);
+                    break;
+                }
+                // Sender is dropped or the window has elapsed
+                Ok(None) | Err(_) => break,
+            }
+        }
+
+        if batch.len() == 1 {
+            // Single operations are proposed as is
+            batch.pop().unwrap()
+        } else {
+            log::trace!("Proposing {} operations in a single entry", batch.len());
+            ConsensusOperations::Batch(batch)
+        }
+    }
+
     /// Returns `true` if learner promotion was proposed, `false` otherwise.
     /// Learner node does not vote on elections, cause it might not have a big picture yet.
     /// So consensus should guarantee that learners are promoted one-by-one.
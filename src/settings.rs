@@ -89,6 +89,18 @@ pub struct ConsensusConfig {
     #[validate(range(min = 1))]
     #[serde(default = "default_message_timeout_tics")]
     pub message_timeout_ticks: u64,
+    /// How long to wait for more collection meta operations to propose them in a single Raft entry
+    #[serde(default = "default_proposal_batch_window_ms")]
+    pub proposal_batch_window_ms: u64,
+    /// Maximal number of collection meta operations proposed in a single Raft entry.
+    /// Batching is disabled with 1, as peers of older versions can not apply batched entries.
+    #[serde(default = "default_max_proposal_batch_size")]
+    #[validate(range(min = 1))]
+    pub max_proposal_batch_size: usize,
+    /// Compact the consensus WAL after this number of entries is applied.
+    /// Set to 0 to disable compaction.
+    #[serde(default = "default_compact_wal_entries")]
+    pub compact_wal_entries: u64,
 }
 
 impl Default for ConsensusConfig {
@@ -98,6 +110,9 @@ impl Default for ConsensusConfig {
             tick_period_ms: default_tick_period_ms(),
             bootstrap_timeout_sec: default_bootstrap_timeout_sec(),
             message_timeout_ticks: default_message_timeout_tics(),
+            proposal_batch_window_ms: default_proposal_batch_window_ms(),
+            max_proposal_batch_size: default_max_proposal_batch_size(),
+            compact_wal_entries: default_compact_wal_entries(),
         }
     }
 }
@@ -221,6 +236,18 @@ const fn default_message_timeout_tics() -> u64 {
     10
 }
 
+const fn default_proposal_batch_window_ms() -> u64 {
+    5
+}
+
+const fn default_max_proposal_batch_size() -> usize {
+    1
+}
+
+const fn default_compact_wal_entries() -> u64 {
+    128
+}
+
 const fn default_tls_cert_ttl() -> Option<u64> {
     // Default one hour
     Some(3600)
@@ -4,7 +4,7 @@ use std::time::Instant;
 use api::grpc::qdrant::collections_internal_server::CollectionsInternal;
 use api::grpc::qdrant::{
     CollectionOperationResponse, GetCollectionInfoRequestInternal, GetCollectionInfoResponse,
-    InitiateShardTransferRequest,
+    InitiateShardTransferRequest, RecoverShardSnapshotRequest, UploadShardSnapshotRequest,
 };
 use storage::content_manager::conversions::error_to_status;
 use storage::content_manager::toc::TableOfContent;
@@ -68,4 +68,53 @@ impl CollectionsInternal for CollectionsInternalService {
         };
         Ok(Response::new(response))
     }
+
+    async fn upload_shard_snapshot(
+        &self,
+        request: Request<UploadShardSnapshotRequest>,
+    ) -> Result<Response<CollectionOperationResponse>, Status> {
+        // Not logged, the request is mostly snapshot data
+        let timing = Instant::now();
+        let UploadShardSnapshotRequest {
+            collection_name,
+            shard_id,
+            offset,
+            data,
+        } = request.into_inner();
+
+        self.toc
+            .receive_shard_snapshot_chunk(&collection_name, shard_id, offset, &data)
+            .await
+            .map_err(error_to_status)?;
+
+        let response = CollectionOperationResponse {
+            result: true,
+            time: timing.elapsed().as_secs_f64(),
+        };
+        Ok(Response::new(response))
+    }
+
+    async fn recover_shard_snapshot(
+        &self,
+        request: Request<RecoverShardSnapshotRequest>,
+    ) -> Result<Response<CollectionOperationResponse>, Status> {
+        validate_and_log(request.get_ref());
+        let timing = Instant::now();
+        let RecoverShardSnapshotRequest {
+            collection_name,
+            shard_id,
+            size,
+        } = request.into_inner();
+
+        self.toc
+            .recover_received_shard_snapshot(&collection_name, shard_id, size)
+            .await
+            .map_err(error_to_status)?;
+
+        let response = CollectionOperationResponse {
+            result: true,
+            time: timing.elapsed().as_secs_f64(),
+        };
+        Ok(Response::new(response))
+    }
 }
@@ -0,0 +1,50 @@
+"""
+Chaos scenarios under load, see `chaos.py` for the scenario format.
+
+Every scenario of `scenarios/` runs as a separate test, and fails if it exceeds its limits.
+Other scenarios can be run by pointing `QDRANT_CHAOS_SCENARIOS` to a folder or a file:
+
+    QDRANT_CHAOS_SCENARIOS=my_scenario.json pytest tests/consensus_benchmarks -k chaos -s
+"""
+import glob
+
+import pytest
+
+from consensus_tests.utils import *
+from .chaos import ChaosRunner, check_limits, load_scenario
+from .common import print_metrics, save_result
+
+SCENARIOS = os.environ.get("QDRANT_CHAOS_SCENARIOS", os.path.join(os.path.dirname(__file__), "scenarios"))
+
+
+def scenario_files() -> List[str]:
+    if os.path.isdir(SCENARIOS):
+        return sorted(glob.glob(os.path.join(SCENARIOS, "*.json")))
+    return [SCENARIOS]
+
+
+@pytest.mark.parametrize("scenario_file", scenario_files(), ids=lambda path: os.path.splitext(os.path.basename(path))[0])
+def test_chaos_scenario(tmp_path: Path, scenario_file: str):
+    scenario = load_scenario(scenario_file)
+    peer_api_uris, peer_dirs, _ = start_cluster(tmp_path, scenario.peers)
+
+    report = ChaosRunner(scenario, peer_api_uris, peer_dirs).run()
+
+    for event in report["events"]:
+        recovery = "not recovered" if event["recovery_sec"] is None else f"recovered in {event['recovery_sec']:.0f}s"
+        dip = "-" if event["dip_ratio"] is None else f"{event['dip_ratio']:.2f}"
+        print(f"{event['at_sec']:6.1f}s {event['event']:<60} errors: {event['errors']:>6} "
+              f"throughput dip: {dip:>5} {recovery}")
+    for violation in report["violations"][:10]:
+        print(f"Read-consistency violation: {violation}")
+    print_metrics(f"chaos ({scenario.name})", report["metrics"])
+
+    with open(scenario_file) as f:
+        params = json.load(f)
+    # Per-event and per-second details, for a closer look at a failed run
+    details = {key: report[key] for key in ("events", "throughput", "errors", "violations")}
+    path = save_result(f"chaos_{scenario.name}", params, report["metrics"], details)
+    print(f"Results written to {path}")
+
+    failures = check_limits(scenario.limits, report["metrics"])
+    assert not failures, f"Scenario {scenario.name} exceeded its limits: {', '.join(failures)}"
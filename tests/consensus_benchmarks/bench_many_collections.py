@@ -0,0 +1,190 @@
+"""
+Scaling of the cluster with the number of collections.
+
+`test_many_collections.py` creates a handful of collections, multi-tenant deployments have thousands
+of small ones. Collections are created through consensus in steps of powers of two, up to
+`QDRANT_BENCH_MAX_COLLECTIONS`. At every step, on top of the creation rate of the step itself:
+
+* consensus latency - create and delete of a probe collection, repeated `QDRANT_BENCH_PROBES` times
+* `GET /collections` latency, on every peer
+* memory - resident memory of all peers, per empty collection over the cluster without collections
+* consensus storage - size of the raft state and of the meta operations WAL of the first peer
+* restart - the last peer is killed and started again, time until it serves HTTP (collections loaded),
+  and until it lists all collections
+
+Metrics are named `n<collections>_*`, to see where a value stops growing linearly.
+Run from the project root:
+
+    QDRANT_BENCH_MAX_COLLECTIONS=10000 pytest tests/consensus_benchmarks -k many_collections -s
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from consensus_tests.utils import *
+from memory_profile.rss import read_status
+from .common import env_float, env_int, folder_size, print_metrics, save_result
+
+COLLECTION_PREFIX = "tenant_"
+PROBE_COLLECTION = "probe_collection"
+
+N_PEERS = env_int("QDRANT_BENCH_PEERS", 3)
+MAX_COLLECTIONS = env_int("QDRANT_BENCH_MAX_COLLECTIONS", 10_000)
+CREATE_PARALLEL = env_int("QDRANT_BENCH_CREATE_PARALLEL", 4)
+PROBES = env_int("QDRANT_BENCH_PROBES", 10)
+# Restart a peer at every step, 0 to skip
+RESTART = env_int("QDRANT_BENCH_RESTART", 1)
+# Wait before measuring memory, for background tasks of the new collections to settle
+SETTLE_SEC = env_float("QDRANT_BENCH_SETTLE_SEC", 2)
+TIMEOUT_SEC = env_float("QDRANT_BENCH_TIMEOUT", 3600)
+REQUEST_TIMEOUT_SEC = 600
+# Listing thousands of collections is not free, do not poll too often
+POLL_INTERVAL_SEC = 0.2
+
+
+def collection_counts(max_collections: int) -> List[int]:
+    """
+    Powers of two up to `max_collections`, and `max_collections` itself
+
+    >>> collection_counts(10)
+    [1, 2, 4, 8, 10]
+    """
+    counts = []
+    count = 1
+    while count < max_collections:
+        counts.append(count)
+        count *= 2
+    return counts + [max_collections]
+
+
+def create_collection(peer_api_uri: str, collection_name: str) -> float:
+    """
+    :return: latency in milliseconds
+    """
+    start = time.time()
+    r = get_session().put(f"{peer_api_uri}/collections/{collection_name}?timeout=60", json={
+        "vectors": {"size": 4, "distance": "Dot"},
+        "shard_number": 1,
+    }, timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+    return (time.time() - start) * 1000
+
+
+def delete_collection(peer_api_uri: str, collection_name: str) -> float:
+    start = time.time()
+    r = get_session().delete(f"{peer_api_uri}/collections/{collection_name}?timeout=60", timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+    return (time.time() - start) * 1000
+
+
+def list_collections(peer_api_uri: str) -> List[str]:
+    r = get_session().get(f"{peer_api_uri}/collections", timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+    return [collection["name"] for collection in r.json()["result"]["collections"]]
+
+
+def wait_collections_count(peer_api_uris: List[str], expected: int):
+    start = time.time()
+    while time.time() - start < TIMEOUT_SEC:
+        if all(len(list_collections(uri)) == expected for uri in peer_api_uris):
+            return
+        time.sleep(POLL_INTERVAL_SEC)
+    raise Exception(f"Peers do not list {expected} collections after {TIMEOUT_SEC} seconds")
+
+
+def latency_stats(name: str, latencies_ms: List[float]) -> Dict[str, float]:
+    latencies_ms = np.array(latencies_ms)
+    return {
+        f"{name}_mean_ms": float(latencies_ms.mean()),
+        f"{name}_p50_ms": float(np.percentile(latencies_ms, 50)),
+        f"{name}_p99_ms": float(np.percentile(latencies_ms, 99)),
+        f"{name}_max_ms": float(latencies_ms.max()),
+    }
+
+
+def peers_rss_bytes(peer_processes: List[Popen]) -> int:
+    return int(sum(read_status(p.pid)["VmRSS"] for p in peer_processes) * 1024 * 1024)
+
+
+def consensus_storage_bytes(peer_dir: Path) -> int:
+    storage = peer_dir / "storage"
+    raft_state = sum(os.path.getsize(path) for path in storage.glob("raft_state*"))
+    return raft_state + folder_size(storage / "collections_meta_wal")
+
+
+def test_many_collections_scaling(tmp_path: Path):
+    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster(tmp_path, N_PEERS)
+    peer_processes = list(processes)
+
+    time.sleep(SETTLE_SEC)
+    empty_rss_bytes = peers_rss_bytes(peer_processes)
+
+    metrics = {"empty_rss_bytes": empty_rss_bytes}
+    rows = []
+    created = 0
+    for count in collection_counts(MAX_COLLECTIONS):
+        print(f"Creating collections {created}..{count}")
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=CREATE_PARALLEL) as executor:
+            create_latencies = list(executor.map(
+                lambda i: create_collection(peer_api_uris[i % N_PEERS], f"{COLLECTION_PREFIX}{i}"),
+                range(created, count),
+            ))
+        create_sec = time.time() - start
+        created = count
+        wait_collections_count(peer_api_uris, count)
+
+        row = {
+            "collections": count,
+            "create_per_sec": len(create_latencies) / create_sec,
+            **latency_stats("create", create_latencies),
+        }
+
+        probe_create, probe_delete = [], []
+        for i in range(PROBES):
+            peer_api_uri = peer_api_uris[i % N_PEERS]
+            probe_create.append(create_collection(peer_api_uri, PROBE_COLLECTION))
+            probe_delete.append(delete_collection(peer_api_uri, PROBE_COLLECTION))
+        row.update(latency_stats("probe_create", probe_create))
+        row.update(latency_stats("probe_delete", probe_delete))
+
+        list_latencies = []
+        for uri in peer_api_uris:
+            for _ in range(PROBES):
+                request_start = time.time()
+                list_collections(uri)
+                list_latencies.append((time.time() - request_start) * 1000)
+        row.update(latency_stats("list", list_latencies))
+
+        time.sleep(SETTLE_SEC)
+        rss_bytes = peers_rss_bytes(peer_processes)
+        row["rss_bytes"] = rss_bytes
+        row["rss_per_collection_bytes"] = (rss_bytes - empty_rss_bytes) / count
+        row["consensus_storage_bytes"] = consensus_storage_bytes(peer_dirs[0])
+
+        if RESTART:
+            kill_process_group(peer_processes[-1])
+            log_file = f"peer_0_{N_PEERS - 1}_restarted_{count}.log"
+            restart_start = time.time()
+            peer_api_uris[-1] = start_peer(peer_dirs[-1], log_file, bootstrap_uri)
+            peer_processes[-1] = processes[-1]
+            wait_for_peer_log(processes[-1], get_peer_log_path(log_file))
+            row["restart_sec"] = time.time() - restart_start
+            wait_collections_count(peer_api_uris[-1:], count)
+            row["restart_ready_sec"] = time.time() - restart_start
+
+        print(row)
+        rows.append(row)
+        metrics.update({f"n{count}_{name}": value for name, value in row.items() if name != "collections"})
+
+    params = {
+        "peers": N_PEERS,
+        "max_collections": MAX_COLLECTIONS,
+        "create_parallel": CREATE_PARALLEL,
+        "probes": PROBES,
+    }
+    print_metrics("many_collections", metrics)
+    print(f"Results written to {save_result('many_collections', params, metrics, details={'rows': rows})}")
+
+    for uri in peer_api_uris:
+        assert len(list_collections(uri)) == MAX_COLLECTIONS
@@ -0,0 +1,145 @@
+"""
+Shard transfer throughput and client latency under load.
+
+A single shard is loaded with many points, then moved or replicated to another peer
+through `/collections/{name}/cluster` while searches and upserts keep running.
+Reported:
+
+* transfer throughput, in points and shard bytes per second
+* time until the new replica is Active
+* client p50/p99 latency before, during (while the shard is forwarded) and after the transfer
+
+Run from the project root, with parameters in the environment:
+
+    QDRANT_BENCH_POINTS=1000000 pytest tests/consensus_benchmarks -k move -s
+"""
+import pytest
+
+from consensus_tests.utils import *
+from datagen import DatasetGenerator, PayloadField
+from .common import (BackgroundLoad, env_float, env_int, folder_size, print_metrics, save_result, shard_path,
+                     upload_points, wait_collection_green)
+
+COLLECTION_NAME = "benchmark_collection"
+SHARD_ID = 0
+
+N_PEERS = env_int("QDRANT_BENCH_PEERS", 3)
+N_POINTS = env_int("QDRANT_BENCH_POINTS", 1_000_000)
+DIM = env_int("QDRANT_BENCH_DIM", 128)
+UPLOAD_PARALLEL = env_int("QDRANT_BENCH_UPLOAD_PARALLEL", 4)
+SEARCH_THREADS = env_int("QDRANT_BENCH_SEARCH_THREADS", 4)
+UPSERT_THREADS = env_int("QDRANT_BENCH_UPSERT_THREADS", 1)
+# KB of vectors before a segment is indexed, 0 disables indexing to only measure the transfer itself
+INDEXING_THRESHOLD = env_int("QDRANT_BENCH_INDEXING_THRESHOLD", 0)
+# Load measured before and after the transfer, as a baseline
+BASELINE_SEC = env_float("QDRANT_BENCH_BASELINE_SEC", 10)
+TRANSFER_TIMEOUT_SEC = env_float("QDRANT_BENCH_TRANSFER_TIMEOUT", 3600)
+
+CITIES = ["London", "New York", "Paris", "Tokyo", "Berlin", "Rome", "Madrid", "Moscow"]
+
+
+def create_benchmark_collection(peer_api_uri: str):
+    r = get_session().put(f"{peer_api_uri}/collections/{COLLECTION_NAME}?timeout=60", json={
+        "vectors": {"size": DIM, "distance": "Dot"},
+        "shard_number": 1,
+        "replication_factor": 1,
+        "optimizers_config": {"indexing_threshold": INDEXING_THRESHOLD},
+    })
+    assert_http_ok(r)
+
+
+def find_shard_holder(peer_api_uris: List[str]) -> int:
+    for i, uri in enumerate(peer_api_uris):
+        local_shards = get_collection_cluster_info(uri, COLLECTION_NAME)["local_shards"]
+        if any(shard["shard_id"] == SHARD_ID for shard in local_shards):
+            return i
+    raise Exception(f"No peer holds shard {SHARD_ID}")
+
+
+def transferred_replica(target_uri: str) -> Optional[dict]:
+    """
+    Local replica of the target peer, once the transfer is over
+    """
+    info = get_collection_cluster_info(target_uri, COLLECTION_NAME)
+    if info["shard_transfers"]:
+        return None
+    for shard in info["local_shards"]:
+        if shard["shard_id"] == SHARD_ID and shard["state"] == "Active":
+            return shard
+    return None
+
+
+@pytest.mark.parametrize("method", ["move", "replicate"])
+def test_shard_transfer_under_load(tmp_path: Path, method: str):
+    peer_api_uris, peer_dirs, _ = start_cluster(tmp_path, N_PEERS)
+
+    create_benchmark_collection(peer_api_uris[0])
+    wait_collection_exists_and_active_on_all_peers(COLLECTION_NAME, peer_api_uris)
+
+    generator = DatasetGenerator(DIM, [PayloadField("city", "keyword", values=CITIES)], seed=42)
+    upload_sec = upload_points(peer_api_uris[0], COLLECTION_NAME, generator, N_POINTS, parallel=UPLOAD_PARALLEL)
+    wait_collection_green(peer_api_uris[0], COLLECTION_NAME)
+    print(f"Uploaded {N_POINTS} points in {upload_sec:.1f}s")
+
+    source = find_shard_holder(peer_api_uris)
+    target = (source + 1) % N_PEERS
+    source_peer_id = get_cluster_info(peer_api_uris[source])["peer_id"]
+    target_peer_id = get_cluster_info(peer_api_uris[target])["peer_id"]
+    shard_bytes = folder_size(shard_path(peer_dirs[source], COLLECTION_NAME, SHARD_ID))
+
+    load = BackgroundLoad(peer_api_uris, COLLECTION_NAME, generator, N_POINTS,
+                          search_threads=SEARCH_THREADS, upsert_threads=UPSERT_THREADS)
+    load.start()
+    try:
+        baseline_start = time.time()
+        time.sleep(BASELINE_SEC)
+
+        transfer_start = time.time()
+        r = get_session().post(f"{peer_api_uris[0]}/collections/{COLLECTION_NAME}/cluster", json={
+            f"{method}_shard": {
+                "shard_id": SHARD_ID,
+                "from_peer_id": source_peer_id,
+                "to_peer_id": target_peer_id,
+            }
+        })
+        assert_http_ok(r)
+
+        replica = None
+        while replica is None:
+            if time.time() - transfer_start > TRANSFER_TIMEOUT_SEC:
+                raise Exception(f"Shard transfer did not finish in {TRANSFER_TIMEOUT_SEC} seconds")
+            time.sleep(MIN_RETRY_INTERVAL_SEC)
+            replica = transferred_replica(peer_api_uris[target])
+        transfer_end = time.time()
+
+        time.sleep(BASELINE_SEC)
+        after_end = time.time()
+    finally:
+        load.stop()
+
+    transfer_sec = transfer_end - transfer_start
+    metrics = {
+        "upload_sec": upload_sec,
+        "shard_bytes": shard_bytes,
+        "transferred_points": replica["points_count"],
+        "time_to_active_sec": transfer_sec,
+        "transfer_points_per_sec": replica["points_count"] / transfer_sec,
+        "transfer_bytes_per_sec": shard_bytes / transfer_sec,
+        "target_shard_bytes": folder_size(shard_path(peer_dirs[target], COLLECTION_NAME, SHARD_ID)),
+        **load.stats(baseline_start, transfer_start, "before"),
+        **load.stats(transfer_start, transfer_end, "during"),
+        **load.stats(transfer_end, after_end, "after"),
+    }
+    params = {
+        "method": method,
+        "peers": N_PEERS,
+        "points": N_POINTS,
+        "dim": DIM,
+        "indexing_threshold": INDEXING_THRESHOLD,
+        "search_threads": SEARCH_THREADS,
+        "upsert_threads": UPSERT_THREADS,
+    }
+    print_metrics(f"shard_transfer ({method})", metrics)
+    print(f"Results written to {save_result(f'shard_transfer_{method}', params, metrics)}")
+
+    assert replica["points_count"] == N_POINTS
@@ -0,0 +1,241 @@
+"""
+Snapshot creation and recovery times, to plan backup windows.
+
+`test_snapshot*.py` verify snapshots of tiny collections, this suite times them with real data sizes,
+on a single node and on a cluster, for every storage mode of `STORAGE_MODES`. For every dataset size:
+
+* full snapshot (`POST /snapshots`) of the first peer
+* collection snapshot (`POST /collections/{name}/snapshots`) on all peers at once, each of its local shards
+* upload (`POST /collections/{name}/snapshots/upload`) of the collection snapshot of the first peer
+* recovery (`PUT /collections/{name}/snapshots/recover`) of all peers at once, each from the URL of its own snapshot
+
+Every operation reports its duration, the bytes written by the peers (`/proc/<pid>/io`), the snapshot size,
+and the peak of the temporary disk usage: the highest disk usage of the peer folders during the operation,
+over what is left after it. Upload and recovery report their throughput.
+
+Metrics are named `p<points>_<operation>_*`. Run from the project root:
+
+    QDRANT_BENCH_SNAPSHOT_POINTS=100000,1000000 pytest tests/consensus_benchmarks -k snapshots -s
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from consensus_tests.utils import *
+from datagen import DatasetGenerator, PayloadField
+from .common import env_float, env_int, folder_size, print_metrics, save_result, upload_points, wait_collection_green
+
+COLLECTION_NAME = "benchmark_collection"
+
+POINTS = [int(n) for n in os.environ.get("QDRANT_BENCH_SNAPSHOT_POINTS", "10000,100000,1000000").split(",")]
+N_PEERS = env_int("QDRANT_BENCH_PEERS", 3)
+DIM = env_int("QDRANT_BENCH_DIM", 128)
+UPLOAD_PARALLEL = env_int("QDRANT_BENCH_UPLOAD_PARALLEL", 4)
+# Disk usage sampling interval of the peer folders
+DISK_SAMPLE_INTERVAL_SEC = env_float("QDRANT_BENCH_DISK_SAMPLE_INTERVAL", 0.2)
+REQUEST_TIMEOUT_SEC = env_float("QDRANT_BENCH_SNAPSHOT_TIMEOUT", 3600)
+
+STORAGE_MODES = {
+    "ram": {"on_disk_payload": False},
+    "mmap": {"on_disk_payload": False, "optimizers_config": {"memmap_threshold_kb": 1}},
+    "on_disk": {
+        "vectors": {"size": DIM, "distance": "Dot", "on_disk": True},
+        "on_disk_payload": True,
+        "hnsw_config": {"on_disk": True},
+    },
+}
+MODES = os.environ.get("QDRANT_BENCH_STORAGE_MODES", ",".join(STORAGE_MODES)).split(",")
+
+CITIES = ["London", "New York", "Paris", "Tokyo", "Berlin", "Rome", "Madrid", "Moscow"]
+
+
+def read_write_bytes(pid: int) -> int:
+    """
+    Bytes the process caused to be written to the storage layer
+    """
+    with open(f"/proc/{pid}/io") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name == "write_bytes":
+                return int(value)
+    return 0
+
+
+class DiskUsage:
+    """
+    Highest disk usage of the peer folders while the block runs, sampled from a background thread
+    """
+
+    def __init__(self, peer_dirs: List[Path], peer_processes: List[Popen]):
+        self.peer_dirs = peer_dirs
+        self.peer_processes = peer_processes
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.start = 0.0
+        self.sec = 0.0
+        self.before = 0
+        self.peak = 0
+        self.after = 0
+        self.written_start = 0
+        self.written_bytes = 0
+
+    def size(self) -> int:
+        return sum(folder_size(peer_dir) for peer_dir in self.peer_dirs)
+
+    def run(self):
+        while not self.stop_event.wait(DISK_SAMPLE_INTERVAL_SEC):
+            self.peak = max(self.peak, self.size())
+
+    def __enter__(self) -> "DiskUsage":
+        self.before = self.peak = self.size()
+        self.written_start = sum(read_write_bytes(p.pid) for p in self.peer_processes)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.sec = time.time() - self.start
+        self.stop_event.set()
+        self.thread.join()
+        self.written_bytes = sum(read_write_bytes(p.pid) for p in self.peer_processes) - self.written_start
+        self.after = self.size()
+        self.peak = max(self.peak, self.after)
+
+    def metrics(self, prefix: str) -> Dict[str, float]:
+        return {
+            f"{prefix}_sec": self.sec,
+            f"{prefix}_written_bytes": self.written_bytes,
+            f"{prefix}_peak_temp_bytes": self.peak - self.after,
+        }
+
+
+def create_benchmark_collection(peer_api_uri: str, mode: str, shard_number: int):
+    r = get_session().put(f"{peer_api_uri}/collections/{COLLECTION_NAME}?timeout=60", json={
+        "vectors": {"size": DIM, "distance": "Dot"},
+        "shard_number": shard_number,
+        **STORAGE_MODES[mode],
+    })
+    assert_http_ok(r)
+    r = get_session().put(f"{peer_api_uri}/collections/{COLLECTION_NAME}/index?wait=true", json={
+        "field_name": "city",
+        "field_schema": "keyword",
+    })
+    assert_http_ok(r)
+
+
+def drop_benchmark_collection(peer_api_uris: List[str], peer_dirs: List[Path]):
+    r = get_session().delete(f"{peer_api_uris[0]}/collections/{COLLECTION_NAME}?timeout=60")
+    assert_http_ok(r)
+    # snapshots are kept after the collection is dropped
+    for peer_dir in peer_dirs:
+        shutil.rmtree(peer_dir / "snapshots", ignore_errors=True)
+
+
+def create_full_snapshot(peer_api_uri: str) -> dict:
+    r = get_session().post(f"{peer_api_uri}/snapshots?wait=true", timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+    return r.json()["result"]
+
+
+def create_collection_snapshot(peer_api_uri: str) -> dict:
+    r = get_session().post(f"{peer_api_uri}/collections/{COLLECTION_NAME}/snapshots?wait=true",
+                           timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+    return r.json()["result"]
+
+
+def upload_snapshot(peer_api_uri: str, snapshot_path: Path):
+    with open(snapshot_path, "rb") as f:
+        r = get_session().post(
+            f"{peer_api_uri}/collections/{COLLECTION_NAME}/snapshots/upload?wait=true&priority=snapshot",
+            files={"snapshot": f},
+            timeout=REQUEST_TIMEOUT_SEC,
+        )
+    assert_http_ok(r)
+
+
+def recover_snapshot(peer_api_uri: str, snapshot_name: str):
+    r = get_session().put(f"{peer_api_uri}/collections/{COLLECTION_NAME}/snapshots/recover?wait=true", json={
+        "location": f"{peer_api_uri}/collections/{COLLECTION_NAME}/snapshots/{snapshot_name}",
+        "priority": "snapshot",
+    }, timeout=REQUEST_TIMEOUT_SEC)
+    assert_http_ok(r)
+
+
+def on_all_peers(function, peer_api_uris: List[str], *args) -> list:
+    with ThreadPoolExecutor(max_workers=len(peer_api_uris)) as executor:
+        return list(executor.map(function, peer_api_uris, *args))
+
+
+def collection_bytes(peer_dirs: List[Path]) -> int:
+    return sum(folder_size(peer_dir / "storage" / "collections" / COLLECTION_NAME) for peer_dir in peer_dirs)
+
+
+def measure_snapshots(peer_api_uris: List[str], peer_dirs: List[Path], peer_processes: List[Popen], mode: str,
+                      points: int) -> Dict[str, float]:
+    create_benchmark_collection(peer_api_uris[0], mode, len(peer_api_uris))
+    wait_collection_exists_and_active_on_all_peers(COLLECTION_NAME, peer_api_uris)
+    generator = DatasetGenerator(DIM, [PayloadField("city", "keyword", values=CITIES)], seed=42)
+    upload_points(peer_api_uris[0], COLLECTION_NAME, generator, points, parallel=UPLOAD_PARALLEL)
+    for uri in peer_api_uris:
+        wait_collection_green(uri, COLLECTION_NAME)
+    metrics = {"collection_bytes": collection_bytes(peer_dirs)}
+
+    print(f"Full snapshot of {points} points ({mode})")
+    with DiskUsage(peer_dirs[:1], peer_processes[:1]) as usage:
+        snapshot = create_full_snapshot(peer_api_uris[0])
+    metrics.update(usage.metrics("full_snapshot"))
+    metrics["full_snapshot_bytes"] = snapshot["size"]
+    r = get_session().delete(f"{peer_api_uris[0]}/snapshots/{snapshot['name']}")
+    assert_http_ok(r)
+
+    print(f"Collection snapshots of {points} points ({mode})")
+    with DiskUsage(peer_dirs, peer_processes) as usage:
+        snapshots = on_all_peers(create_collection_snapshot, peer_api_uris)
+    snapshot_bytes = sum(snapshot["size"] for snapshot in snapshots)
+    metrics.update(usage.metrics("collection_snapshot"))
+    metrics["collection_snapshot_bytes"] = snapshot_bytes
+
+    print(f"Upload of {points} points ({mode})")
+    upload_path = peer_dirs[0] / "snapshots" / COLLECTION_NAME / snapshots[0]["name"]
+    with DiskUsage(peer_dirs[:1], peer_processes[:1]) as usage:
+        upload_snapshot(peer_api_uris[0], upload_path)
+    metrics.update(usage.metrics("upload"))
+    metrics["upload_bytes_per_sec"] = snapshots[0]["size"] / usage.sec
+    wait_collection_size(peer_api_uris[0], COLLECTION_NAME, points)
+
+    print(f"Recovery of {points} points ({mode})")
+    with DiskUsage(peer_dirs, peer_processes) as usage:
+        on_all_peers(recover_snapshot, peer_api_uris, [snapshot["name"] for snapshot in snapshots])
+    metrics.update(usage.metrics("recover"))
+    metrics["recover_bytes_per_sec"] = snapshot_bytes / usage.sec
+    metrics["recover_points_per_sec"] = points / usage.sec
+    wait_collection_size(peer_api_uris[0], COLLECTION_NAME, points)
+
+    drop_benchmark_collection(peer_api_uris, peer_dirs)
+    return metrics
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("n_peers", sorted({1, N_PEERS}))
+def test_snapshot_performance(tmp_path: Path, n_peers: int, mode: str):
+    peer_api_uris, peer_dirs, _ = start_cluster(tmp_path, n_peers)
+    peer_processes = list(processes)
+
+    metrics = {}
+    for points in POINTS:
+        result = measure_snapshots(peer_api_uris, peer_dirs, peer_processes, mode, points)
+        metrics.update({f"p{points}_{name}": value for name, value in result.items()})
+
+    params = {
+        "peers": n_peers,
+        "storage_mode": mode,
+        "points": POINTS,
+        "dim": DIM,
+    }
+    benchmark = f"snapshots_{mode}_{n_peers}_peers"
+    print_metrics(benchmark, metrics)
+    print(f"Results written to {save_result(benchmark, params, metrics)}")
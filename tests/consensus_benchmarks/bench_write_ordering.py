@@ -0,0 +1,129 @@
+"""
+Cost of the write ordering guarantees of upserts.
+
+`test_write_ordering.py` checks what `ordering=weak|medium|strong` guarantees, this benchmark measures
+the upsert throughput and latency of each level. For every cluster size, the sweep covers:
+
+* replication factor and `write_consistency_factor` of the collection (combinations with `wcf > rf` are skipped)
+* batch size of the upserts
+* ordering: `weak` is applied by any replica, `medium` by the highest alive replica,
+  `strong` by the leader of the shard (all forwarded through the receiving peer)
+
+Every combination runs `QDRANT_BENCH_DURATION_SEC` of upserts from `QDRANT_BENCH_UPSERT_THREADS` clients,
+spread over all peers, after a warmup. Metrics are named `rf<rf>_wcf<wcf>_batch<size>_<ordering>_upsert_*`.
+
+Run from the project root:
+
+    QDRANT_BENCH_ORDERING_PEERS=3,5 pytest tests/consensus_benchmarks -k write_ordering -s
+"""
+import itertools
+import os
+
+import pytest
+
+from consensus_tests.utils import *
+from datagen import DatasetGenerator, PayloadField
+from .common import BackgroundLoad, env_float, env_int, print_metrics, save_result, upload_points
+
+COLLECTION_NAME = "benchmark_collection"
+
+
+def env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+PEERS = [int(n) for n in env_list("QDRANT_BENCH_ORDERING_PEERS", "3,5")]
+ORDERINGS = env_list("QDRANT_BENCH_ORDERINGS", "weak,medium,strong")
+REPLICATION_FACTORS = [int(n) for n in env_list("QDRANT_BENCH_REPLICATION_FACTORS", "1,2,3")]
+WRITE_CONSISTENCY_FACTORS = [int(n) for n in env_list("QDRANT_BENCH_WRITE_CONSISTENCY_FACTORS", "1,2,3")]
+BATCH_SIZES = [int(n) for n in env_list("QDRANT_BENCH_BATCH_SIZES", "1,10,100")]
+# Shards per collection, the number of peers if 0, so that every peer leads some of them
+SHARDS = env_int("QDRANT_BENCH_SHARDS", 0)
+DIM = env_int("QDRANT_BENCH_DIM", 128)
+# Points uploaded beforehand, upserts overwrite them
+N_POINTS = env_int("QDRANT_BENCH_POINTS", 100_000)
+UPSERT_THREADS = env_int("QDRANT_BENCH_UPSERT_THREADS", 8)
+WARMUP_SEC = env_float("QDRANT_BENCH_WARMUP_SEC", 2)
+DURATION_SEC = env_float("QDRANT_BENCH_DURATION_SEC", 10)
+
+
+def create_benchmark_collection(peer_api_uri: str, shard_number: int, replication_factor: int,
+                                write_consistency_factor: int):
+    r = get_session().delete(f"{peer_api_uri}/collections/{COLLECTION_NAME}?timeout=60")
+    assert_http_ok(r)
+    r = get_session().put(f"{peer_api_uri}/collections/{COLLECTION_NAME}?timeout=60", json={
+        "vectors": {"size": DIM, "distance": "Dot"},
+        "shard_number": shard_number,
+        "replication_factor": replication_factor,
+        "write_consistency_factor": write_consistency_factor,
+    })
+    assert_http_ok(r)
+
+
+def measure_upserts(peer_api_uris: List[str], generator: DatasetGenerator, ordering: str, batch_size: int,
+                    prefix: str) -> Dict[str, float]:
+    load = BackgroundLoad(peer_api_uris, COLLECTION_NAME, generator, N_POINTS, search_threads=0,
+                          upsert_threads=UPSERT_THREADS, upsert_batch_size=batch_size, ordering=ordering)
+    load.start()
+    try:
+        time.sleep(WARMUP_SEC)
+        start = time.time()
+        time.sleep(DURATION_SEC)
+        end = time.time()
+    finally:
+        load.stop()
+
+    metrics = load.stats(start, end, prefix)
+    metrics[f"{prefix}_upsert_points_per_sec"] = metrics.get(f"{prefix}_upsert_per_sec", 0.0) * batch_size
+    return metrics
+
+
+@pytest.mark.parametrize("n_peers", PEERS)
+def test_write_ordering_cost(tmp_path: Path, n_peers: int):
+    peer_api_uris, _, _ = start_cluster(tmp_path, n_peers)
+    shard_number = SHARDS or n_peers
+    generator = DatasetGenerator(DIM, [PayloadField("count", "integer")], seed=42)
+
+    metrics = {}
+    rows = []
+    for replication_factor, write_consistency_factor in itertools.product(REPLICATION_FACTORS,
+                                                                         WRITE_CONSISTENCY_FACTORS):
+        if replication_factor > n_peers or write_consistency_factor > replication_factor:
+            continue
+        create_benchmark_collection(peer_api_uris[0], shard_number, replication_factor, write_consistency_factor)
+        wait_collection_exists_and_active_on_all_peers(COLLECTION_NAME, peer_api_uris)
+        upload_points(peer_api_uris[0], COLLECTION_NAME, generator, N_POINTS)
+
+        # orderings alternate for every batch size, so that they see the same state of the collection
+        for batch_size, ordering in itertools.product(BATCH_SIZES, ORDERINGS):
+            prefix = f"rf{replication_factor}_wcf{write_consistency_factor}_batch{batch_size}_{ordering}"
+            print(f"Measuring {prefix} on {n_peers} peers")
+            result = measure_upserts(peer_api_uris, generator, ordering, batch_size, prefix)
+            metrics.update(result)
+            rows.append({
+                "replication_factor": replication_factor,
+                "write_consistency_factor": write_consistency_factor,
+                "batch_size": batch_size,
+                "ordering": ordering,
+                **{name[len(prefix) + 1:]: value for name, value in result.items()},
+            })
+
+    params = {
+        "peers": n_peers,
+        "shards": shard_number,
+        "points": N_POINTS,
+        "dim": DIM,
+        "orderings": ORDERINGS,
+        "replication_factors": REPLICATION_FACTORS,
+        "write_consistency_factors": WRITE_CONSISTENCY_FACTORS,
+        "batch_sizes": BATCH_SIZES,
+        "upsert_threads": UPSERT_THREADS,
+        "duration_sec": DURATION_SEC,
+    }
+    benchmark = f"write_ordering_{n_peers}_peers"
+    print_metrics(benchmark, metrics)
+    print(f"Results written to {save_result(benchmark, params, metrics, details={'rows': rows})}")
+
+    assert rows, "No valid combination of replication and write consistency factors"
+    for row in rows:
+        assert row.get("upsert_count", 0) > row.get("upsert_errors", 0), f"All upserts failed: {row}"
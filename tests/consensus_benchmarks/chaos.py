@@ -0,0 +1,460 @@
+"""
+Chaos scenarios: fault injection on a schedule, while a read/write load keeps running.
+
+A scenario is declared in JSON:
+
+    {
+        "name": "kill_and_restart_follower",
+        "peers": 3,
+        "collection": {"shard_number": 4, "replication_factor": 2},
+        "load": {"read_workers": 4, "write_workers": 2, "read_consistency": "majority"},
+        "duration_sec": 60,
+        "events": [
+            {"at_sec": 10, "action": "kill_peer", "peer": 2},
+            {"at_sec": 30, "action": "restart_peer", "peer": 2}
+        ],
+        "limits": {"max_violations": 0, "max_recovery_sec": 30}
+    }
+
+Peers are referred to by their index in the cluster. Actions:
+
+* `kill_peer` - SIGKILL a peer, it is not used as an entry point of the load until restarted
+* `restart_peer` - start a killed peer again on its storage
+* `remove_peer` - kill a peer and force its removal from the cluster
+* `create_collection`, `drop_collection` - meta operations on another collection than the one under load
+* `transfer_shard` - move (`"method": "move"`, default) or replicate `shard_id` from peer `from` to peer `to`,
+  by default from a peer holding the shard to a peer without it
+
+Writers own disjoint ranges of point ids and write increasing versions into the payload.
+A read returning an older version than the last acknowledged write of a point, or no point at all,
+is a read-consistency violation.
+
+Measured per event: errors, the throughput dip relative to the throughput before the first event,
+and the time until throughput is back to normal without errors.
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+import numpy as np
+import requests
+
+from consensus_tests.assertions import assert_http_ok
+from consensus_tests.http_session import get_session
+from consensus_tests.utils import (get_cluster_info, get_collection_cluster_info, get_peer_log_path,
+                                   kill_process_group, processes, start_peer,
+                                   wait_collection_exists_and_active_on_all_peers, wait_for_peer_log)
+
+LOAD_COLLECTION = "chaos_collection"
+VECTOR_SIZE = 4
+REQUEST_TIMEOUT_SEC = 10
+# Throughput is counted in buckets of this size
+BUCKET_SEC = 1.0
+# Throughput is recovered once it stays above this ratio of the baseline, without errors...
+RECOVERY_RATIO = 0.9
+# ... for that long
+RECOVERY_STABLE_SEC = 3.0
+
+ACTIONS = ("kill_peer", "restart_peer", "remove_peer", "create_collection", "drop_collection", "transfer_shard")
+
+
+@dataclass
+class Event:
+    at_sec: float
+    action: str
+    peer: Optional[int] = None
+    collection: Optional[str] = None
+    shard_id: Optional[int] = None
+    # `from` and `to` in JSON
+    from_peer: Optional[int] = None
+    to_peer: Optional[int] = None
+    method: str = "move"
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unknown action '{self.action}', expected one of {ACTIONS}")
+        if self.action in ("create_collection", "drop_collection") and self.collection in (None, LOAD_COLLECTION):
+            raise ValueError(f"{self.action} needs a collection other than {LOAD_COLLECTION}")
+
+    def describe(self) -> str:
+        details = {k: v for k, v in asdict(self).items() if v is not None and k not in ("at_sec", "action", "method")}
+        return f"{self.action} {details}"
+
+
+@dataclass
+class LoadConfig:
+    read_workers: int = 4
+    write_workers: int = 2
+    # `consistency` parameter of reads: a number, `majority`, `quorum` or `all`
+    read_consistency: Union[int, str] = 1
+    # `ordering` parameter of writes: `weak`, `medium` or `strong`
+    write_ordering: str = "weak"
+    # Points owned by every writer
+    points_per_writer: int = 100
+    # Points read by a request
+    read_batch: int = 10
+
+
+@dataclass
+class Limits:
+    """
+    Thresholds of the scenario to pass, `None` for no limit
+    """
+    max_error_rate: Optional[float] = None
+    max_violations: Optional[int] = 0
+    max_recovery_sec: Optional[float] = None
+    # Lowest throughput during any event, relative to the baseline
+    min_dip_ratio: Optional[float] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    peers: int = 3
+    duration_sec: float = 60
+    # Parameters of the collection under load, e.g. `shard_number` and `replication_factor`
+    collection: dict = field(default_factory=dict)
+    load: LoadConfig = field(default_factory=LoadConfig)
+    events: List[Event] = field(default_factory=list)
+    limits: Limits = field(default_factory=Limits)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Scenario":
+        events = []
+        for event in data.get("events", []):
+            event = dict(event)
+            event["from_peer"] = event.pop("from", None)
+            event["to_peer"] = event.pop("to", None)
+            events.append(Event(**event))
+        return cls(
+            name=data["name"],
+            peers=data.get("peers", 3),
+            duration_sec=data.get("duration_sec", 60),
+            collection=data.get("collection", {}),
+            load=LoadConfig(**data.get("load", {})),
+            events=sorted(events, key=lambda e: e.at_sec),
+            limits=Limits(**data.get("limits", {})),
+        )
+
+
+def load_scenario(path: Union[str, Path]) -> Scenario:
+    with open(path) as f:
+        return Scenario.from_json(json.load(f))
+
+
+@dataclass
+class Operation:
+    kind: str
+    start: float
+    latency: float
+    ok: bool
+
+
+class VersionedLoad:
+    """
+    Writers upsert increasing versions of their own points, readers check that they never
+    read a version older than the last one acknowledged when the read started.
+    """
+
+    def __init__(self, peer_api_uris: List[str], down: Set[int], config: LoadConfig):
+        # Shared with the runner, which updates them when peers are restarted or killed
+        self.peer_api_uris = peer_api_uris
+        self.down = down
+        self.config = config
+        self.total_points = config.write_workers * config.points_per_writer
+        # point id -> last acknowledged version, every writer only updates its own points
+        self.acknowledged: Dict[int, int] = {}
+        self.operations: List[Operation] = []
+        self.violations: List[dict] = []
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+    def populate(self):
+        ids = list(range(self.total_points))
+        r = get_session().put(
+            f"{self.peer_api_uris[0]}/collections/{LOAD_COLLECTION}/points?wait=true&ordering=strong", json={
+                "batch": {
+                    "ids": ids,
+                    "vectors": np.random.default_rng(0).random((len(ids), VECTOR_SIZE)).tolist(),
+                    "payloads": [{"version": 0} for _ in ids],
+                }
+            })
+        assert_http_ok(r)
+        self.acknowledged = {point_id: 0 for point_id in ids}
+
+    def start(self):
+        for i in range(self.config.write_workers):
+            self.threads.append(threading.Thread(target=self.write_loop, args=(i,), daemon=True))
+        for i in range(self.config.read_workers):
+            self.threads.append(threading.Thread(target=self.read_loop, args=(i,), daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def entry_point(self, rng: random.Random) -> str:
+        alive = [uri for i, uri in enumerate(self.peer_api_uris) if i not in self.down]
+        return rng.choice(alive or self.peer_api_uris)
+
+    def record(self, kind: str, start: float, ok: bool):
+        self.operations.append(Operation(kind, start, time.time() - start, ok))
+
+    def write_loop(self, writer: int):
+        rng = random.Random(writer)
+        first_id = writer * self.config.points_per_writer
+        version = 0
+        while not self.stop_event.is_set():
+            version += 1
+            point_id = first_id + rng.randrange(self.config.points_per_writer)
+            start = time.time()
+            try:
+                r = get_session().put(
+                    f"{self.entry_point(rng)}/collections/{LOAD_COLLECTION}/points"
+                    f"?wait=true&ordering={self.config.write_ordering}",
+                    json={"points": [{
+                        "id": point_id,
+                        "vector": [rng.random() for _ in range(VECTOR_SIZE)],
+                        "payload": {"version": version},
+                    }]},
+                    timeout=REQUEST_TIMEOUT_SEC)
+                ok = r.ok
+            except requests.exceptions.RequestException:
+                ok = False
+            if ok:
+                self.acknowledged[point_id] = version
+            self.record("write", start, ok)
+
+    def read_loop(self, reader: int):
+        rng = random.Random(1000 + reader)
+        while not self.stop_event.is_set():
+            ids = rng.sample(range(self.total_points), min(self.config.read_batch, self.total_points))
+            expected = {point_id: self.acknowledged[point_id] for point_id in ids}
+            start = time.time()
+            try:
+                r = get_session().post(
+                    f"{self.entry_point(rng)}/collections/{LOAD_COLLECTION}/points"
+                    f"?consistency={self.config.read_consistency}",
+                    json={"ids": ids, "with_payload": True, "with_vector": False},
+                    timeout=REQUEST_TIMEOUT_SEC)
+                ok = r.ok
+            except requests.exceptions.RequestException:
+                ok = False
+            self.record("read", start, ok)
+            if ok:
+                self.check(expected, r.json()["result"], start)
+
+    def check(self, expected: Dict[int, int], points: List[dict], read_start: float):
+        found = {point["id"]: point["payload"].get("version", -1) for point in points}
+        for point_id, version in expected.items():
+            if found.get(point_id, -1) < version:
+                self.violations.append({
+                    "time": read_start,
+                    "id": point_id,
+                    "expected_version": version,
+                    "read_version": found.get(point_id),
+                })
+
+
+class ChaosRunner:
+    """
+    Runs a scenario on a started cluster, `peer_api_uris` and `peer_dirs` as returned by `start_cluster`
+    """
+
+    def __init__(self, scenario: Scenario, peer_api_uris: List[str], peer_dirs: List[Path]):
+        self.scenario = scenario
+        self.peer_api_uris = list(peer_api_uris)
+        self.peer_dirs = peer_dirs
+        # `start_cluster` starts peers in order, as its last processes
+        self.peer_processes = processes[-len(peer_api_uris):]
+        self.peer_ids = [get_cluster_info(uri)["peer_id"] for uri in peer_api_uris]
+        self.down: Set[int] = set()
+        self.restarts = defaultdict(int)
+        self.load = VersionedLoad(self.peer_api_uris, self.down, scenario.load)
+        # (time, event) of the applied events
+        self.applied: List[tuple] = []
+
+    def create_collection(self, name: str, **params):
+        r = get_session().put(f"{self.alive_uri()}/collections/{name}?timeout=30", json={
+            "vectors": {"size": VECTOR_SIZE, "distance": "Dot"},
+            **params,
+        })
+        assert_http_ok(r)
+
+    def alive_uri(self) -> str:
+        return next(uri for i, uri in enumerate(self.peer_api_uris) if i not in self.down)
+
+    def run(self) -> dict:
+        self.create_collection(LOAD_COLLECTION, **self.scenario.collection)
+        wait_collection_exists_and_active_on_all_peers(LOAD_COLLECTION, self.peer_api_uris)
+        self.load.populate()
+
+        self.load.start()
+        start = time.time()
+        try:
+            for event in self.scenario.events:
+                time.sleep(max(0.0, start + event.at_sec - time.time()))
+                print(f"{time.time() - start:.1f}s: {event.describe()}")
+                self.applied.append((time.time(), event))
+                self.apply(event)
+            time.sleep(max(0.0, start + self.scenario.duration_sec - time.time()))
+        finally:
+            self.load.stop()
+        return self.report(start, time.time())
+
+    def apply(self, event: Event):
+        if event.action == "kill_peer":
+            self.kill(event.peer)
+        elif event.action == "restart_peer":
+            self.restart(event.peer)
+        elif event.action == "remove_peer":
+            self.kill(event.peer)
+            r = get_session().delete(f"{self.alive_uri()}/cluster/peer/{self.peer_ids[event.peer]}?force=true")
+            assert_http_ok(r)
+        elif event.action == "create_collection":
+            self.create_collection(event.collection)
+        elif event.action == "drop_collection":
+            r = get_session().delete(f"{self.alive_uri()}/collections/{event.collection}?timeout=30")
+            assert_http_ok(r)
+        elif event.action == "transfer_shard":
+            holders = self.shard_holders(event.shard_id)
+            from_peer = holders[0] if event.from_peer is None else event.from_peer
+            to_peer = event.to_peer
+            if to_peer is None:
+                to_peer = next(i for i in range(len(self.peer_api_uris)) if i not in holders and i not in self.down)
+            r = get_session().post(f"{self.alive_uri()}/collections/{LOAD_COLLECTION}/cluster", json={
+                f"{event.method}_shard": {
+                    "shard_id": event.shard_id,
+                    "from_peer_id": self.peer_ids[from_peer],
+                    "to_peer_id": self.peer_ids[to_peer],
+                }
+            })
+            assert_http_ok(r)
+
+    def shard_holders(self, shard_id: int) -> List[int]:
+        """
+        Live peers with a local replica of the shard
+        """
+        return [
+            i for i, uri in enumerate(self.peer_api_uris)
+            if i not in self.down and any(
+                shard["shard_id"] == shard_id
+                for shard in get_collection_cluster_info(uri, LOAD_COLLECTION)["local_shards"])
+        ]
+
+    def kill(self, peer: int):
+        self.down.add(peer)
+        kill_process_group(self.peer_processes[peer])
+
+    def restart(self, peer: int):
+        # Any live peer can bootstrap the restarted one
+        bootstrap_uri = next(
+            info["uri"] for peer_id, info in get_cluster_info(self.alive_uri())["peers"].items()
+            if int(peer_id) != self.peer_ids[peer]
+        )
+        self.restarts[peer] += 1
+        log_file = f"peer_0_{peer}_restarted_{self.restarts[peer]}.log"
+        self.peer_api_uris[peer] = start_peer(self.peer_dirs[peer], log_file, bootstrap_uri)
+        self.peer_processes[peer] = processes[-1]
+        wait_for_peer_log(processes[-1], get_peer_log_path(log_file))
+        self.down.discard(peer)
+
+    def report(self, start: float, end: float) -> dict:
+        operations = self.load.operations
+        # Only complete buckets, a partial last one would look like a dip
+        n_buckets = max(1, int((end - start) / BUCKET_SEC))
+        ok_counts = np.zeros(n_buckets)
+        error_counts = np.zeros(n_buckets)
+        for operation in operations:
+            bucket = int((operation.start - start) / BUCKET_SEC)
+            if bucket >= n_buckets:
+                continue
+            if operation.ok:
+                ok_counts[bucket] += 1
+            else:
+                error_counts[bucket] += 1
+        throughput = ok_counts / BUCKET_SEC
+
+        # Throughput before the first event, the first bucket is skipped as a warm-up
+        first_event = int((self.applied[0][0] - start) / BUCKET_SEC) if self.applied else n_buckets
+        baseline = float(np.median(throughput[1:first_event])) if first_event > 1 else float(np.median(throughput))
+
+        events = []
+        for i, (event_time, event) in enumerate(self.applied):
+            window_end = self.applied[i + 1][0] if i + 1 < len(self.applied) else end
+            first = min(int((event_time - start) / BUCKET_SEC), n_buckets - 1)
+            last = min(n_buckets, max(first + 1, int(np.ceil((window_end - start) / BUCKET_SEC))))
+            events.append({
+                "at_sec": event_time - start,
+                "window_sec": window_end - event_time,
+                "event": event.describe(),
+                "errors": int(error_counts[first:last].sum()),
+                "dip_ratio": float(throughput[first:last].min() / baseline) if baseline > 0 else None,
+                "recovery_sec": self.recovery_time(throughput, error_counts, baseline, first, last),
+            })
+
+        metrics = {"baseline_ops_per_sec": baseline, "violations": len(self.load.violations)}
+        for kind in ("read", "write"):
+            kind_operations = [o for o in operations if o.kind == kind]
+            errors = sum(1 for o in kind_operations if not o.ok)
+            latencies_ms = np.array([o.latency for o in kind_operations if o.ok]) * 1000
+            metrics[f"{kind}_count"] = len(kind_operations)
+            metrics[f"{kind}_error_rate"] = errors / len(kind_operations) if kind_operations else 0.0
+            if len(latencies_ms) > 0:
+                metrics[f"{kind}_p50_ms"] = float(np.percentile(latencies_ms, 50))
+                metrics[f"{kind}_p99_ms"] = float(np.percentile(latencies_ms, 99))
+        dips = [e["dip_ratio"] for e in events if e["dip_ratio"] is not None]
+        if dips:
+            metrics["min_dip_ratio"] = min(dips)
+        if events:
+            # an event without recovery until the next one counts as its whole window
+            metrics["max_recovery_sec"] = max(
+                e["window_sec"] if e["recovery_sec"] is None else e["recovery_sec"] for e in events)
+            metrics["unrecovered_events"] = sum(1 for e in events if e["recovery_sec"] is None)
+
+        return {
+            "metrics": metrics,
+            "events": events,
+            "throughput": throughput.tolist(),
+            "errors": error_counts.tolist(),
+            "violations": self.load.violations[:100],
+        }
+
+    @staticmethod
+    def recovery_time(throughput: np.ndarray, errors: np.ndarray, baseline: float, first: int,
+                      last: int) -> Optional[float]:
+        """
+        Seconds from the event until throughput stays normal without errors for `RECOVERY_STABLE_SEC`,
+        `None` if it did not happen before the next event
+        """
+        stable = max(1, int(RECOVERY_STABLE_SEC / BUCKET_SEC))
+        healthy = (throughput >= RECOVERY_RATIO * baseline) & (errors == 0)
+        for bucket in range(first, last - stable + 1):
+            if healthy[bucket:bucket + stable].all():
+                return (bucket - first) * BUCKET_SEC
+        return None
+
+
+def check_limits(limits: Limits, metrics: Dict[str, float]) -> List[str]:
+    """
+    :return: descriptions of the exceeded limits
+    """
+    failures = []
+    error_rate = max(metrics.get("read_error_rate", 0.0), metrics.get("write_error_rate", 0.0))
+    if limits.max_error_rate is not None and error_rate > limits.max_error_rate:
+        failures.append(f"error rate {error_rate:.4f} > {limits.max_error_rate}")
+    if limits.max_violations is not None and metrics["violations"] > limits.max_violations:
+        failures.append(f"{metrics['violations']} read-consistency violations > {limits.max_violations}")
+    if limits.max_recovery_sec is not None and metrics.get("max_recovery_sec", 0.0) > limits.max_recovery_sec:
+        failures.append(f"recovery took {metrics['max_recovery_sec']:.1f}s > {limits.max_recovery_sec}s")
+    if limits.min_dip_ratio is not None and metrics.get("min_dip_ratio", 1.0) < limits.min_dip_ratio:
+        failures.append(f"throughput dipped to {metrics['min_dip_ratio']:.2f} of the baseline < {limits.min_dip_ratio}")
+    return failures
@@ -0,0 +1,221 @@
+"""
+Shared parts of the consensus benchmarks: bulk loading, background client load and result files.
+
+Results are written as JSON into `QDRANT_BENCH_RESULTS_DIR` (`consensus_benchmark_results` by default):
+
+    {"benchmark": "shard_transfer", "timestamp": ..., "params": {...}, "metrics": {"transfer_points_per_sec": ...}}
+
+Metric names end with their unit, e.g. `_sec`, `_ms`, `_bytes` or `_per_sec`.
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+from consensus_tests.assertions import assert_http_ok
+from consensus_tests.http_session import get_session
+from datagen import DatasetGenerator
+
+RESULTS_DIR = os.environ.get("QDRANT_BENCH_RESULTS_DIR", "consensus_benchmark_results")
+
+REQUEST_TIMEOUT_SEC = 60
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def upload_points(peer_api_uri: str, collection_name: str, generator: DatasetGenerator, total: int,
+                  batch_size: int = 1000, parallel: int = 4) -> float:
+    """
+    Upload `total` points of the generator from `parallel` threads
+    :return: upload time in seconds
+    """
+
+    def upload(first_batch: int):
+        for body in generator.json_bytes_batches(total, batch_size, first_batch=first_batch, step=parallel):
+            r = get_session().put(
+                f"{peer_api_uri}/collections/{collection_name}/points?wait=true",
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=REQUEST_TIMEOUT_SEC,
+            )
+            assert_http_ok(r)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        for future in [executor.submit(upload, i) for i in range(parallel)]:
+            future.result()
+    return time.time() - start
+
+
+def wait_collection_green(peer_api_uri: str, collection_name: str, timeout: float = 3600):
+    """
+    Wait for the optimizers to finish, so that they do not interfere with the measurements
+    """
+    start = time.time()
+    while time.time() - start < timeout:
+        r = get_session().get(f"{peer_api_uri}/collections/{collection_name}")
+        assert_http_ok(r)
+        if r.json()["result"]["status"] == "green":
+            return
+        time.sleep(1)
+    raise Exception(f"Collection {collection_name} is not green after {timeout} seconds")
+
+
+def folder_size(path: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                # removed by the optimizers in the meantime
+                pass
+    return size
+
+
+def shard_path(peer_dir: Path, collection_name: str, shard_id: int) -> Path:
+    return peer_dir / "storage" / "collections" / collection_name / str(shard_id)
+
+
+@dataclass
+class RequestRecord:
+    operation: str
+    start: float
+    latency: float
+    ok: bool
+
+
+class BackgroundLoad:
+    """
+    Searches and upserts sent to the peers from background threads, until stopped.
+    Every request is recorded with its start time, so that latencies of different
+    phases of a benchmark can be compared, e.g. before and during a shard transfer.
+
+    Upserts overwrite existing points of the generator, the number of points does not change.
+    """
+
+    def __init__(self, peer_api_uris: List[str], collection_name: str, generator: DatasetGenerator,
+                 points_count: int, search_threads: int = 4, upsert_threads: int = 1, upsert_batch_size: int = 10,
+                 ordering: Optional[str] = None):
+        """
+        :param ordering: write ordering of the upserts, `weak`, `medium` or `strong`, the server default if not set
+        """
+        self.peer_api_uris = peer_api_uris
+        self.collection_name = collection_name
+        self.generator = generator
+        self.points_count = points_count
+        self.search_threads = search_threads
+        self.upsert_threads = upsert_threads
+        self.upsert_batch_size = upsert_batch_size
+        self.ordering = ordering
+        self.queries = generator.query_vectors(1000).tolist()
+        self.records: List[RequestRecord] = []
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+    def start(self):
+        for i in range(self.search_threads):
+            self.threads.append(threading.Thread(target=self.run, args=(self.search, i), daemon=True))
+        for i in range(self.upsert_threads):
+            self.threads.append(threading.Thread(target=self.run, args=(self.upsert, i), daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def run(self, request, thread_index: int):
+        rng = random.Random(thread_index)
+        # Spread the threads over the peers, every peer forwards to the shard holders
+        peer_api_uri = self.peer_api_uris[thread_index % len(self.peer_api_uris)]
+        while not self.stop_event.is_set():
+            operation = request.__name__
+            start = time.time()
+            try:
+                ok = request(peer_api_uri, rng).ok
+            except requests.exceptions.RequestException:
+                ok = False
+            self.records.append(RequestRecord(operation, start, time.time() - start, ok))
+
+    def search(self, peer_api_uri: str, rng: random.Random) -> requests.Response:
+        return get_session().post(
+            f"{peer_api_uri}/collections/{self.collection_name}/points/search",
+            json={"vector": rng.choice(self.queries), "limit": 10},
+            timeout=REQUEST_TIMEOUT_SEC,
+        )
+
+    def upsert(self, peer_api_uri: str, rng: random.Random) -> requests.Response:
+        n_batches = max(1, self.points_count // self.upsert_batch_size)
+        batch = self.generator.batch(rng.randrange(n_batches), self.upsert_batch_size)
+        ordering = f"&ordering={self.ordering}" if self.ordering else ""
+        return get_session().put(
+            f"{peer_api_uri}/collections/{self.collection_name}/points?wait=true{ordering}",
+            data=batch.to_json_bytes(),
+            headers={"Content-Type": "application/json"},
+            timeout=REQUEST_TIMEOUT_SEC,
+        )
+
+    def stats(self, start: float, end: float, prefix: str) -> Dict[str, float]:
+        """
+        Metrics of the requests started in `[start, end)`, per operation:
+        `<prefix>_<operation>_{count,errors,per_sec,mean_ms,p50_ms,p90_ms,p99_ms,max_ms}`
+        """
+        metrics = {}
+        for operation in ("search", "upsert"):
+            records = [r for r in self.records if r.operation == operation and start <= r.start < end]
+            if not records:
+                continue
+            name = f"{prefix}_{operation}"
+            latencies_ms = np.array([r.latency for r in records if r.ok]) * 1000
+            metrics[f"{name}_count"] = len(records)
+            metrics[f"{name}_errors"] = sum(1 for r in records if not r.ok)
+            metrics[f"{name}_per_sec"] = len(records) / max(end - start, 1e-9)
+            if len(latencies_ms) > 0:
+                metrics[f"{name}_mean_ms"] = float(latencies_ms.mean())
+                for percentile in (50, 90, 99):
+                    metrics[f"{name}_p{percentile}_ms"] = float(np.percentile(latencies_ms, percentile))
+                metrics[f"{name}_max_ms"] = float(latencies_ms.max())
+        return metrics
+
+
+def save_result(benchmark: str, params: dict, metrics: Dict[str, float], details: Optional[dict] = None,
+                results_dir: Optional[str] = None) -> str:
+    """
+    :param details: additional content of the result file, e.g. time series of the run
+    """
+    results_dir = results_dir or RESULTS_DIR
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = time.time()
+    path = os.path.join(results_dir, f"{benchmark}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime(timestamp))}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "benchmark": benchmark,
+            "timestamp": timestamp,
+            "params": params,
+            "metrics": metrics,
+            **(details or {}),
+        }, f, indent=2)
+    return path
+
+
+def print_metrics(benchmark: str, metrics: Dict[str, float]):
+    print(f"{benchmark}:")
+    for name, value in metrics.items():
+        print(f"  {name:<50} {value:>14.3f}" if isinstance(value, float) else f"  {name:<50} {value:>14}")
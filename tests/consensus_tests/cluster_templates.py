@@ -0,0 +1,175 @@
+"""
+Bootstrapped cluster storage, reused between tests.
+
+A template is a cluster started once per session, with consensus converged and
+optional setup applied (e.g. collections created), whose peers are then stopped.
+Tests start a cluster from a copy of the template storage instead of going
+through raft bootstrap and collection creation again:
+
+    # `cluster_templates` is a session fixture, see `conftest.py`
+    def test_something(tmp_path, cluster_templates):
+        template = cluster_templates.get("3_peers_test_collection", 3, setup=with_collection(replication_factor=3))
+        peer_api_uris, peer_dirs, bootstrap_uri = start_cluster_from_template(tmp_path, template)
+
+Peers of a copy are restarted on fresh ports. Raft state keeps the p2p address
+of every peer, so addresses are rewritten in the copy before the restart.
+"""
+import json
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from consensus_tests.fixtures import create_collection
+from .utils import *
+
+RAFT_STATE_FILE = "storage/raft_state.json"
+
+# `setup(peer_api_uris)` prepares the content of a template, e.g. creates collections
+TemplateSetup = Callable[[List[str]], None]
+
+
+@dataclass
+class ClusterTemplate:
+    name: str
+    peer_dirs: List[Path]
+    # Collections created by the setup, checked to be active once a copy is started
+    collections: List[str] = field(default_factory=list)
+
+
+class ClusterTemplates:
+    """
+    Templates of the session, built on first use
+    """
+
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+        self.templates: Dict[str, ClusterTemplate] = {}
+
+    def get(self, name: str, num_peers: int, setup: Optional[TemplateSetup] = None) -> ClusterTemplate:
+        """
+        :param name: identifies the template, tests using the same name share the same cluster content
+        """
+        if name not in self.templates:
+            self.templates[name] = build_template(self.base_path / name, name, num_peers, setup)
+        return self.templates[name]
+
+
+def with_collection(collection_name="test_collection", **kwargs) -> TemplateSetup:
+    """
+    Setup creating a collection, `kwargs` are passed to `fixtures.create_collection`
+    """
+
+    def setup(peer_api_uris: List[str]):
+        create_collection(peer_api_uris[0], collection_name, **kwargs)
+        wait_collection_exists_and_active_on_all_peers(collection_name, peer_api_uris)
+
+    return setup
+
+
+def build_template(template_dir: Path, name: str, num_peers: int, setup: Optional[TemplateSetup]) -> ClusterTemplate:
+    template_dir.mkdir()
+    print(f"Building cluster template {name} with {num_peers} peers")
+    peer_api_uris, peer_dirs, _ = start_cluster(template_dir, num_peers, log_prefix=f"template_{name}")
+    template_processes = processes[-num_peers:]
+
+    if setup is not None:
+        setup(peer_api_uris)
+
+    # Every peer should have applied all of the committed operations before its storage is copied
+    commit = max(get_cluster_info(uri)["raft_info"]["commit"] for uri in peer_api_uris)
+    wait_for_all_peers(peer_api_uris, "/cluster", probes.consensus_applied(commit))
+    r = get_session().get(f"{peer_api_uris[0]}/collections")
+    assert_http_ok(r)
+    collections = [c["name"] for c in r.json()["result"]["collections"]]
+
+    for p in template_processes:
+        processes.remove(p)
+        # Waits for the process to be gone, so that storage is not modified while it is copied
+        kill_process_group(p)
+
+    return ClusterTemplate(name, peer_dirs, collections)
+
+
+def clone_folder(src: Path, dst: Path):
+    """
+    Copy-on-write clone where the file system supports it (btrfs, XFS), regular copy otherwise.
+    Hard links are not an option: peers modify WAL and segment files in place.
+    """
+    if sys.platform.startswith("linux"):
+        subprocess.run(["cp", "-a", "--reflink=auto", str(src), str(dst)], check=True)
+    else:
+        shutil.copytree(src, dst, symlinks=True)
+
+
+def rewrite_peer_addresses(peer_dir: Path, p2p_port_by_peer_id: Dict[int, int]):
+    raft_state_path = peer_dir / RAFT_STATE_FILE
+    with open(raft_state_path) as f:
+        raft_state = json.load(f)
+    raft_state["peer_address_by_id"] = {
+        peer_id: urlsplit(address)._replace(netloc=f"127.0.0.1:{p2p_port_by_peer_id[int(peer_id)]}").geturl()
+        for peer_id, address in raft_state["peer_address_by_id"].items()
+    }
+    with open(raft_state_path, "w") as f:
+        json.dump(raft_state, f)
+
+
+def get_this_peer_id(peer_dir: Path) -> int:
+    with open(peer_dir / RAFT_STATE_FILE) as f:
+        return json.load(f)["this_peer_id"]
+
+
+# Starts a peer with existing raft state and returns its api_uri
+def restart_peer_on_port(peer_dir: Path, log_file: str, p2p_port: int) -> str:
+    grpc_port = get_port()
+    http_port = get_port()
+    env = get_env(p2p_port, grpc_port, http_port)
+    log_file_name = log_file
+    log_file = open(get_peer_log_path(log_file), "w")
+    print(f"Starting peer from existing state, http: http://localhost:{http_port}/cluster, p2p: {p2p_port}")
+    # The uri matches the rewritten raft state, so the peer does not need to announce a new address
+    processes.append(
+        Popen([get_qdrant_exec(), "--uri", get_uri(p2p_port)], env=env, cwd=peer_dir, stderr=log_file,
+              start_new_session=True))
+    attach_sampler(log_file_name, get_uri(http_port), processes[-1].pid)
+    return get_uri(http_port)
+
+
+def start_cluster_from_template(tmp_path: Path, template: ClusterTemplate):
+    """
+    Start a cluster on a copy of the template storage.
+    Returns the same as `start_cluster`, `bootstrap_uri` is the p2p uri of the first peer.
+    """
+    assert_project_root()
+    peer_dirs = []
+    for i, template_dir in enumerate(template.peer_dirs):
+        peer_dir = tmp_path / f"peer{i}"
+        clone_folder(template_dir, peer_dir)
+        peer_dirs.append(peer_dir)
+
+    p2p_ports = [get_port() for _ in peer_dirs]
+    p2p_port_by_peer_id = {get_this_peer_id(peer_dir): port for peer_dir, port in zip(peer_dirs, p2p_ports)}
+    for peer_dir in peer_dirs:
+        rewrite_peer_addresses(peer_dir, p2p_port_by_peer_id)
+
+    # All peers must be up for a leader to be elected, start them at once
+    peer_api_uris = []
+    started = []
+    for i, (peer_dir, p2p_port) in enumerate(zip(peer_dirs, p2p_ports)):
+        log_file = f"peer_0_{i}.log"
+        peer_api_uris.append(restart_peer_on_port(peer_dir, log_file, p2p_port))
+        started.append((processes[-1], get_peer_log_path(log_file)))
+
+    with ThreadPoolExecutor(max_workers=len(started)) as executor:
+        for future in [executor.submit(wait_for_peer_log, process, log_path) for process, log_path in started]:
+            future.result()
+
+    wait_for(leader_is_defined, peer_api_uris[0])
+    wait_for_uniform_cluster_status(peer_api_uris, get_leader(peer_api_uris[0]))
+    for collection_name in template.collections:
+        wait_collection_exists_and_active_on_all_peers(collection_name, peer_api_uris)
+
+    return peer_api_uris, peer_dirs, get_uri(p2p_ports[0])
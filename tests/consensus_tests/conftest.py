@@ -0,0 +1,8 @@
+import pytest
+
+from .cluster_templates import ClusterTemplates
+
+
+@pytest.fixture(scope="session")
+def cluster_templates(tmp_path_factory) -> ClusterTemplates:
+    return ClusterTemplates(tmp_path_factory.mktemp("cluster_templates"))
@@ -1,35 +1,32 @@
-import random
-
-import requests
+import numpy as np
 
 from consensus_tests.assertions import assert_http_ok
+from consensus_tests.http_session import get_session
+from datagen import DatasetGenerator, PayloadField
 
 CITIES = ["London", "New York", "Paris", "Tokyo", "Berlin", "Rome", "Madrid", "Moscow"]
 
+rng = np.random.default_rng()
+
 
 def random_vector():
-    return [random.random() for _ in range(4)]
+    return rng.random(4).tolist()
 
 
 def upsert_random_points(peer_url, num, collection_name="test_collection", fail_on_error=True, offset=0, wait='true', ordering ='weak'):
     # Create points in first peer's collection
-    r_batch = requests.put(
-        f"{peer_url}/collections/{collection_name}/points?wait={wait}&ordering={ordering}", json={
-            "points": [
-                {
-                    "id": i + offset,
-                    "vector": random_vector(),
-                    "payload": {"city": random.choice(CITIES)}
-                } for i in range(num)
-            ]
-        })
+    generator = DatasetGenerator(4, [PayloadField("city", "keyword", values=CITIES)], seed=None, id_offset=offset)
+    r_batch = get_session().put(
+        f"{peer_url}/collections/{collection_name}/points?wait={wait}&ordering={ordering}",
+        data=generator.batch(0, num).to_json_bytes(),
+        headers={"Content-Type": "application/json"})
     if fail_on_error:
         assert_http_ok(r_batch)
 
 
 def create_collection(peer_url, collection="test_collection", shard_number=1, replication_factor=1, write_consistency_factor=1, timeout=10):
     # Create collection in peer_url
-    r_batch = requests.put(
+    r_batch = get_session().put(
         f"{peer_url}/collections/{collection}?timeout={timeout}", json={
             "vectors": {
                 "size": 4,
@@ -44,7 +41,7 @@ def create_collection(peer_url, collection="test_collection", shard_number=1, re
 
 def drop_collection(peer_url, collection="test_collection", timeout=10):
     # Delete collection in peer_url
-    r_delete = requests.delete(
+    r_delete = get_session().delete(
         f"{peer_url}/collections/{collection}?timeout={timeout}")
     assert_http_ok(r_delete)
 
@@ -64,6 +61,6 @@ def search(peer_url, vector, city, collection="test_collection"):
             ]
         }
     }
-    r_search = requests.post(f"{peer_url}/collections/{collection}/points/search", json=q)
+    r_search = get_session().post(f"{peer_url}/collections/{collection}/points/search", json=q)
     assert_http_ok(r_search)
     return r_search.json()["result"]
@@ -0,0 +1,62 @@
+"""
+Shared HTTP session used by the test helpers.
+
+Connections are kept alive and pooled per peer, instead of opening a new
+connection for every request. The session is re-created in forked processes,
+as pooled sockets can not be shared between processes.
+
+Configured with environment variables:
+
+* `QDRANT_HTTP_POOL_SIZE` - connections kept alive per peer
+* `QDRANT_HTTP_RETRIES` - retries of failed connections, disabled by default
+  as many tests expect requests to stopped peers to fail
+* `QDRANT_HTTP_BACKOFF` - backoff factor between retries, in seconds
+* `QDRANT_HTTP2` - use HTTP/2 in the asyncio probes (requires `httpx[http2]`),
+  `requests` only supports HTTP/1.1
+
+Counterpart of `openapi/tests/openapi_integration/helpers/http_session.py`,
+which can not import this module as the OpenAPI tests run in a container with
+only `openapi/tests` mounted. Keep `make_session` and `get_session` in sync.
+"""
+import os
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.environ.get("QDRANT_HTTP_POOL_SIZE", 16))
+RETRIES = int(os.environ.get("QDRANT_HTTP_RETRIES", 0))
+BACKOFF_FACTOR = float(os.environ.get("QDRANT_HTTP_BACKOFF", 0.1))
+HTTP2 = os.environ.get("QDRANT_HTTP2", "false").lower() in ("1", "true")
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+
+def make_session(pool_size: int = POOL_SIZE, retries: int = RETRIES,
+                 backoff_factor: float = BACKOFF_FACTOR) -> requests.Session:
+    # Only retry connection errors, responses with an error status are returned as is
+    retry = Retry(total=retries, connect=retries, read=False, status=0, backoff_factor=backoff_factor)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        _session = make_session()
+        _session_pid = os.getpid()
+    return _session
+
+
+def set_session(session: requests.Session):
+    """
+    Replace the session used by all helpers, e.g. to change the retry policy for a test.
+    """
+    global _session, _session_pid
+    _session = session
+    _session_pid = os.getpid()
@@ -0,0 +1,309 @@
+"""
+Timeline of raft and shard transfer phases, extracted from peer logs.
+
+Peers of the consensus tests log at DEBUG level into `consensus_test_logs/<test>/peer_*.log`.
+This module parses those logs into phases with their durations:
+
+* `leader_election` - a peer turning (pre-)candidate, until it knows the leader
+* `conf_change` - application of a raft configuration change entry on a peer
+* `collection_creation` - application of a collection creation entry on a peer
+* `consensus_operation` - application of any other collection meta operation entry on a peer
+* `shard_transfer` - from the start of a shard transfer to its finish or abort, for the whole cluster
+* `snapshot_recovery` - collection recovery from a snapshot on a peer, from the download
+  until its shards are activated or synchronized
+
+Usage:
+
+    python tests/consensus_tests/log_timeline.py consensus_test_logs/test_rejoin_cluster --output timeline.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# `[2023-05-02T10:48:09.574Z DEBUG storage::content_manager::toc] Creating collection test_collection`
+LOG_LINE_RE = re.compile(r"^\[(\S+)\s+([A-Z]+)\s+([^\]]*)\] (.*)$")
+
+SOFT_STATE_RE = re.compile(r"New soft state: SoftState \{ leader_id: (\d+), raft_state: (\w+) \}")
+APPLYING_ENTRY_RE = re.compile(r"^Applying committed entry with index (\d+)")
+APPLIED_OPERATION_RE = re.compile(r"^Successfully applied consensus operation entry\. Index: (\d+)")
+APPLIED_CONF_CHANGE_RE = re.compile(r"^Successfully applied configuration change entry\. Index: (\d+)")
+FAILED_OPERATION_RE = re.compile(r"^Failed to apply collection meta operation entry")
+CONF_CHANGE_RE = re.compile(r"^(Adding learner node|Removing node) (\d+)")
+CREATING_COLLECTION_RE = re.compile(r"^Creating collection (\S+)$")
+# `method` is only logged by peers which support other transfer methods than streaming records
+TRANSFER_START_RE = re.compile(
+    r"^Transfer shard Start\(ShardTransfer \{ shard_id: (\d+), from: (\d+), to: (\d+), sync: (\w+)"
+    r"(?:, method: [^}]*)? \}\) of (\S+)")
+TRANSFER_FINISH_RE = re.compile(
+    r"^Transfer shard Finish\(ShardTransfer \{ shard_id: (\d+), from: (\d+), to: (\d+), sync: \w+"
+    r"(?:, method: [^}]*)? \}\) of (\S+)")
+TRANSFER_ABORT_RE = re.compile(
+    r"^Transfer shard Abort \{ transfer: ShardTransferKey \{ shard_id: (\d+), from: (\d+), to: (\d+) \}.*\} of (\S+)")
+SNAPSHOT_DOWNLOAD_RE = re.compile(r"^Downloading snapshot from (\S+)")
+SNAPSHOT_RECOVERY_RE = re.compile(r"^Recovering collection (\S+) from snapshot")
+SHARD_RECOVERED_RE = re.compile(
+    r"^(?:Activating shard \d+ of collection|Running synchronization for shard \d+ of collection) (\S+)")
+
+CANDIDATE_ROLES = ("PreCandidate", "Candidate")
+NO_LEADER = 0
+
+
+@dataclass
+class LogLine:
+    peer: str
+    timestamp: datetime
+    level: str
+    module: str
+    message: str
+
+
+@dataclass
+class Phase:
+    name: str
+    start: datetime
+    # `None` if the phase did not complete before the end of the log
+    end: Optional[datetime] = None
+    # `None` for phases of the whole cluster
+    peer: Optional[str] = None
+    details: dict = field(default_factory=dict)
+
+    @property
+    def duration_sec(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return (self.end - self.start).total_seconds()
+
+    def to_json(self) -> dict:
+        return {
+            "phase": self.name,
+            "peer": self.peer,
+            "start": self.start.isoformat(),
+            "end": None if self.end is None else self.end.isoformat(),
+            "duration_sec": self.duration_sec,
+            **self.details,
+        }
+
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+
+
+def parse_log(path: str) -> Iterator[LogLine]:
+    """
+    Lines that do not start with a log header, e.g. continuations of multi-line messages, are skipped
+    """
+    peer = os.path.splitext(os.path.basename(path))[0]
+    with open(path, errors="replace") as f:
+        for line in f:
+            match = LOG_LINE_RE.match(line.rstrip("\n"))
+            if match is None:
+                continue
+            timestamp, level, module, message = match.groups()
+            try:
+                yield LogLine(peer, parse_timestamp(timestamp), level, module, message)
+            except ValueError:
+                continue
+
+
+def peer_phases(lines: Iterable[LogLine]) -> List[Phase]:
+    """
+    Phases of a single peer, from the lines of its log
+    """
+    phases = []
+    election: Optional[Phase] = None
+    # Entry being applied: index, start and what it does
+    applying: Optional[Phase] = None
+    recovery: Optional[Phase] = None
+
+    for line in lines:
+        message = line.message
+
+        match = SOFT_STATE_RE.search(message)
+        if match is not None:
+            leader_id, role = int(match.group(1)), match.group(2)
+            if role in CANDIDATE_ROLES and election is None:
+                election = Phase("leader_election", line.timestamp, peer=line.peer)
+                phases.append(election)
+            elif leader_id != NO_LEADER and election is not None:
+                election.end = line.timestamp
+                election.details = {"leader_id": leader_id, "role": role}
+                election = None
+            continue
+
+        match = APPLYING_ENTRY_RE.match(message)
+        if match is not None:
+            applying = Phase("consensus_operation", line.timestamp, peer=line.peer,
+                             details={"index": int(match.group(1))})
+            continue
+
+        if applying is not None:
+            match = CREATING_COLLECTION_RE.match(message)
+            if match is not None:
+                applying.name = "collection_creation"
+                applying.details["collection"] = match.group(1)
+                continue
+
+            match = CONF_CHANGE_RE.match(message)
+            if match is not None:
+                applying.details.setdefault("changes", []).append(f"{match.group(1)} {match.group(2)}")
+                continue
+
+            match = APPLIED_CONF_CHANGE_RE.match(message) or APPLIED_OPERATION_RE.match(message)
+            if match is not None and int(match.group(1)) == applying.details["index"]:
+                if APPLIED_CONF_CHANGE_RE.match(message):
+                    applying.name = "conf_change"
+                applying.end = line.timestamp
+                phases.append(applying)
+                applying = None
+                continue
+
+            if FAILED_OPERATION_RE.match(message):
+                applying.end = line.timestamp
+                applying.details["failed"] = True
+                phases.append(applying)
+                applying = None
+                continue
+
+        match = SNAPSHOT_DOWNLOAD_RE.match(message)
+        if match is not None:
+            recovery = Phase("snapshot_recovery", line.timestamp, peer=line.peer,
+                             details={"location": match.group(1)})
+            phases.append(recovery)
+            continue
+
+        if recovery is not None:
+            match = SNAPSHOT_RECOVERY_RE.match(message)
+            if match is not None:
+                recovery.details["collection"] = match.group(1)
+                continue
+
+            match = SHARD_RECOVERED_RE.match(message)
+            if match is not None and recovery.details.get("collection") == match.group(1):
+                # the last recovered shard ends the recovery
+                recovery.end = line.timestamp
+
+    return phases
+
+
+def transfer_phases(lines: Iterable[LogLine]) -> List[Phase]:
+    """
+    Shard transfers, from the lines of all peers. Transfer operations go through consensus,
+    so every peer logs them: a transfer starts and ends at the first peer applying the operation.
+
+    >>> def line(timestamp, message):
+    ...     return LogLine("peer_0_0", parse_timestamp(timestamp), "DEBUG", "storage::content_manager::toc", message)
+    >>> [phase] = transfer_phases([
+    ...     line("2023-05-02T10:48:09.000Z", "Transfer shard Start(ShardTransfer { shard_id: 0, from: 1, to: 2, "
+    ...                                      "sync: false, method: Some(Snapshot) }) of test_collection"),
+    ...     line("2023-05-02T10:48:11.500Z", "Transfer shard Finish(ShardTransfer { shard_id: 0, from: 1, to: 2, "
+    ...                                      "sync: false, method: None }) of test_collection"),
+    ... ])
+    >>> phase.duration_sec, phase.details["result"]
+    (2.5, 'finished')
+    """
+    transfers: Dict[tuple, Phase] = {}
+    phases = []
+    for line in sorted(lines, key=lambda line: line.timestamp):
+        match = TRANSFER_START_RE.match(line.message)
+        if match is not None:
+            shard_id, from_peer, to_peer, sync, collection = match.groups()
+            key = (collection, int(shard_id), int(from_peer), int(to_peer))
+            if key not in transfers:
+                transfers[key] = Phase("shard_transfer", line.timestamp, details={
+                    "collection": collection,
+                    "shard_id": int(shard_id),
+                    "from": int(from_peer),
+                    "to": int(to_peer),
+                    "sync": sync == "true",
+                })
+                phases.append(transfers[key])
+            continue
+
+        for result, regex in (("finished", TRANSFER_FINISH_RE), ("aborted", TRANSFER_ABORT_RE)):
+            match = regex.match(line.message)
+            if match is not None:
+                shard_id, from_peer, to_peer, collection = match.groups()
+                transfer = transfers.pop((collection, int(shard_id), int(from_peer), int(to_peer)), None)
+                if transfer is not None:
+                    transfer.end = line.timestamp
+                    transfer.details["result"] = result
+                break
+    return phases
+
+
+def summarize(phases: List[Phase]) -> Dict[str, dict]:
+    summary = {}
+    for phase in phases:
+        stats = summary.setdefault(phase.name, {"count": 0, "incomplete": 0, "total_sec": 0.0, "max_sec": 0.0})
+        if phase.duration_sec is None:
+            stats["incomplete"] += 1
+            continue
+        stats["count"] += 1
+        stats["total_sec"] += phase.duration_sec
+        stats["max_sec"] = max(stats["max_sec"], phase.duration_sec)
+    for stats in summary.values():
+        stats["mean_sec"] = stats["total_sec"] / stats["count"] if stats["count"] else None
+    return summary
+
+
+def find_logs(paths: List[str]) -> List[str]:
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(sorted(glob.glob(os.path.join(path, "*.log"))))
+        else:
+            logs.append(path)
+    return logs
+
+
+def build_timeline(log_paths: List[str]) -> dict:
+    phases = []
+    all_lines = []
+    for path in log_paths:
+        lines = list(parse_log(path))
+        phases.extend(peer_phases(lines))
+        all_lines.extend(lines)
+    phases.extend(transfer_phases(all_lines))
+    phases.sort(key=lambda phase: phase.start)
+    return {
+        "logs": log_paths,
+        "summary": summarize(phases),
+        "phases": [phase.to_json() for phase in phases],
+    }
+
+
+def write_timeline(log_folder: str, file_name: str = "timeline.json") -> str:
+    """
+    Write the timeline of all peer logs of a folder next to them
+    """
+    timeline = build_timeline(find_logs([log_folder]))
+    path = os.path.join(log_folder, file_name)
+    with open(path, "w") as f:
+        json.dump(timeline, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract durations of raft and shard transfer phases from peer logs")
+    parser.add_argument("paths", nargs="+", help="Peer log files, or folders of a test with peer logs")
+    parser.add_argument("--output", help="Write the timeline to this file instead of stdout")
+    parser.add_argument("--summary", action="store_true", help="Only output the per-phase summary")
+    args = parser.parse_args()
+
+    timeline = build_timeline(find_logs(args.paths))
+    if args.summary:
+        timeline = timeline["summary"]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(timeline, f, indent=2)
+    else:
+        print(json.dumps(timeline, indent=2))
+
+
+if __name__ == "__main__":
+    main()
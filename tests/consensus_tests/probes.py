@@ -0,0 +1,145 @@
+"""
+Asyncio based probes checking a predicate on all peers of a cluster at once.
+
+All peers are queried concurrently through a single pooled HTTP client, so a
+convergence check costs one round-trip whatever the size of the cluster, and
+retries reuse already open connections.
+"""
+import asyncio
+import json
+import time
+from typing import Callable, List, Optional
+
+import httpx
+
+from .assertions import assert_http_ok
+from .http_session import HTTP2
+
+REQUEST_TIMEOUT_SEC = 10
+
+# `predicate(peer_api_uri, result)` checks the `result` field of a peer response
+PeerPredicate = Callable[[str, dict], bool]
+
+
+def make_client(n_peers: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=REQUEST_TIMEOUT_SEC,
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=max(n_peers, 1), max_keepalive_connections=max(n_peers, 1)),
+    )
+
+
+async def fetch_result(client: httpx.AsyncClient, peer_api_uri: str, path: str) -> Optional[dict]:
+    """
+    :return: `result` of the peer response, `None` if the peer can not be contacted
+    """
+    try:
+        r = await client.get(f"{peer_api_uri}{path}")
+    except httpx.TransportError:
+        # the api is not yet available - caller needs to retry
+        print(f"Could not contact peer {peer_api_uri} to fetch {path}")
+        return None
+    assert_http_ok(r)
+    return r.json()["result"]
+
+
+async def fetch_all_results(client: httpx.AsyncClient, peer_api_uris: List[str], path: str) -> List[Optional[dict]]:
+    return await asyncio.gather(*(fetch_result(client, uri, path) for uri in peer_api_uris))
+
+
+async def check_on_all_peers(
+        client: httpx.AsyncClient,
+        peer_api_uris: List[str],
+        path: str,
+        predicate: PeerPredicate,
+) -> bool:
+    results = await fetch_all_results(client, peer_api_uris, path)
+    # evaluate every peer to report all of the mismatches at once
+    checks = [result is not None and predicate(uri, result) for uri, result in zip(peer_api_uris, results)]
+    return all(checks)
+
+
+async def wait_on_all_peers(
+        peer_api_uris: List[str],
+        path: str,
+        predicate: PeerPredicate,
+        timeout: float,
+        min_retry_interval: float,
+        max_retry_interval: float,
+):
+    async with make_client(len(peer_api_uris)) as client:
+        start = time.time()
+        retry_interval = min_retry_interval
+        while not await check_on_all_peers(client, peer_api_uris, path, predicate):
+            if time.time() - start > timeout:
+                raise Exception(
+                    f"Timeout waiting for {predicate.__name__} on {path} of all peers in {timeout} seconds")
+            await asyncio.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, max_retry_interval)
+
+
+def all_peers_satisfy(peer_api_uris: List[str], path: str, predicate: PeerPredicate) -> bool:
+    async def check() -> bool:
+        async with make_client(len(peer_api_uris)) as client:
+            return await check_on_all_peers(client, peer_api_uris, path, predicate)
+
+    return asyncio.run(check())
+
+
+def wait_all_peers_satisfy(
+        peer_api_uris: List[str],
+        path: str,
+        predicate: PeerPredicate,
+        timeout: float,
+        min_retry_interval: float,
+        max_retry_interval: float,
+):
+    asyncio.run(wait_on_all_peers(peer_api_uris, path, predicate, timeout, min_retry_interval, max_retry_interval))
+
+
+# Predicates
+
+def cluster_info_consistent(expected_leader: str, expected_size: int) -> PeerPredicate:
+    # for `/cluster`
+    def cluster_info_consistent(peer_api_uri: str, cluster_info: dict) -> bool:
+        leader = cluster_info["raft_info"]["leader"]
+        if leader != expected_leader:
+            print(f"Cluster leader invalid for peer {peer_api_uri} {leader}/{expected_leader}")
+            return False
+        size = len(cluster_info["peers"])
+        if size != expected_size:
+            print(f"Cluster size invalid for peer {peer_api_uri} {size}/{expected_size}")
+            return False
+        return True
+
+    return cluster_info_consistent
+
+
+def responds(peer_api_uri: str, result: dict) -> bool:
+    return True
+
+
+def collection_exists(collection_name: str) -> PeerPredicate:
+    # for `/collections`
+    def collection_exists(peer_api_uri: str, collections_info: dict) -> bool:
+        collections = collections_info["collections"]
+        if any(c["name"] == collection_name for c in collections):
+            return True
+        print(f"Collection '{collection_name}' does not exist on peer {peer_api_uri} "
+              f"found {json.dumps(collections, indent=4)}")
+        return False
+
+    return collection_exists
+
+
+def consensus_applied(min_commit: int) -> PeerPredicate:
+    # for `/cluster`
+    def consensus_applied(peer_api_uri: str, cluster_info: dict) -> bool:
+        raft_info = cluster_info["raft_info"]
+        if raft_info["commit"] < min_commit or raft_info["pending_operations"] > 0:
+            print(f"Consensus not applied on peer {peer_api_uri}: commit {raft_info['commit']}/{min_commit}, "
+                  f"{raft_info['pending_operations']} pending operations")
+            return False
+        return True
+
+    return consensus_applied
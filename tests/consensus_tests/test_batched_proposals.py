@@ -0,0 +1,61 @@
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .fixtures import create_collection, drop_collection
+from .http_session import get_session
+from .utils import *
+
+N_PEERS = 3
+N_COLLECTIONS = 30
+
+# Batching is disabled by default, for compatibility with older peers
+BATCHING_ENV = {
+    "QDRANT__CLUSTER__CONSENSUS__MAX_PROPOSAL_BATCH_SIZE": "100",
+    "QDRANT__CLUSTER__CONSENSUS__PROPOSAL_BATCH_WINDOW_MS": "100",
+}
+
+
+def get_commit_index(peer_api_uri: str) -> int:
+    return get_cluster_info(peer_api_uri)["raft_info"]["commit"]
+
+
+def test_batched_proposals(tmp_path: pathlib.Path):
+    assert_project_root()
+
+    peer_api_uris, _, _ = start_cluster(tmp_path, N_PEERS, extra_env=BATCHING_ENV)
+    # Each peer only batches the operations proposed through it
+    peer_uri = peer_api_uris[0]
+
+    collection_names = [f"test_collection_{i}" for i in range(N_COLLECTIONS)]
+    commit_before = get_commit_index(peer_uri)
+
+    def create(collection_name):
+        create_collection(peer_uri, collection=collection_name, timeout=30)
+
+    with ThreadPoolExecutor(max_workers=N_COLLECTIONS) as executor:
+        list(executor.map(create, collection_names))
+
+    # Every creation is an operation of its own, they are committed in fewer entries
+    commit_delta = get_commit_index(peer_uri) - commit_before
+    assert commit_delta < N_COLLECTIONS
+
+    # Each proposer got its own result, all collections are created on all peers
+    for collection_name in collection_names:
+        wait_collection_exists_and_active_on_all_peers(
+            collection_name=collection_name,
+            peer_api_uris=peer_api_uris
+        )
+
+    def drop(collection_name):
+        drop_collection(peer_uri, collection=collection_name, timeout=30)
+
+    with ThreadPoolExecutor(max_workers=N_COLLECTIONS) as executor:
+        list(executor.map(drop, collection_names))
+
+    def no_collections(peer_api_uri):
+        r = get_session().get(f"{peer_api_uri}/collections")
+        assert_http_ok(r)
+        return len(r.json()["result"]["collections"]) == 0
+
+    for uri in peer_api_uris:
+        wait_for(no_collections, uri)
@@ -0,0 +1,65 @@
+import json
+import pathlib
+
+from .fixtures import create_collection, drop_collection
+from .utils import *
+
+N_PEERS = 2
+# More operations than `cluster.consensus.compact_wal_entries`
+N_OPERATIONS = 130
+COLLECTION_NAME = "test_collection"
+
+
+def get_snapshot_index(peer_dir: pathlib.Path) -> int:
+    with open(peer_dir / "storage" / "raft_state.json") as f:
+        return json.load(f)["latest_snapshot_meta"]["index"]
+
+
+def list_collections(peer_api_uri: str) -> list:
+    r = get_session().get(f"{peer_api_uri}/collections")
+    assert_http_ok(r)
+    return [collection["name"] for collection in r.json()["result"]["collections"]]
+
+
+def test_consensus_compaction(tmp_path: pathlib.Path):
+    assert_project_root()
+
+    # Stable ports, the first peer is restarted later in the test
+    port_seed = get_port_seed(N_PEERS * 100)
+    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster(tmp_path, N_PEERS, port_seed=port_seed)
+
+    # Each operation is a separate consensus entry
+    for i in range(N_OPERATIONS // 2):
+        create_collection(peer_api_uris[0], collection=f"temp_collection_{i}")
+        drop_collection(peer_api_uris[0], collection=f"temp_collection_{i}")
+
+    create_collection(peer_api_uris[0], collection=COLLECTION_NAME)
+    wait_collection_exists_and_active_on_all_peers(collection_name=COLLECTION_NAME, peer_api_uris=peer_api_uris)
+
+    # WAL is compacted on tick, the snapshot metadata moves past the initial state
+    wait_for(lambda: get_snapshot_index(peer_dirs[0]) > 0)
+
+    # The log is compacted, new peer receives a snapshot of the current state
+    new_peer_dir = make_peer_folder(tmp_path, N_PEERS)
+    new_peer_uri = start_peer(new_peer_dir, f"peer_0_{N_PEERS}.log", bootstrap_uri)
+    wait_for_peer_online(new_peer_uri)
+    peer_api_uris.append(new_peer_uri)
+
+    wait_for_uniform_collection_existence(COLLECTION_NAME, peer_api_uris)
+    assert list_collections(new_peer_uri) == [COLLECTION_NAME]
+
+    # Restart the first peer over its compacted WAL
+    processes.pop(0).kill()
+    peer_api_uris.pop(0)
+    restarted_uri, _ = start_first_peer(peer_dirs[0], "peer_0_0_restarted.log", port=port_seed)
+    wait_for_peer_online(restarted_uri)
+    wait_peer_added(restarted_uri, expected_size=N_PEERS + 1)
+    peer_api_uris.append(restarted_uri)
+
+    assert list_collections(restarted_uri) == [COLLECTION_NAME]
+
+    # Consensus keeps working after compaction and restart
+    drop_collection(restarted_uri, collection=COLLECTION_NAME)
+
+    for uri in peer_api_uris:
+        wait_for(lambda peer_api_uri: len(list_collections(peer_api_uri)) == 0, uri)
@@ -0,0 +1,74 @@
+import os
+import pathlib
+import signal
+
+from .fixtures import create_collection, upsert_random_points, random_vector
+from .http_session import get_session
+from .utils import *
+
+N_PEERS = 3
+N_REPLICAS = 2
+N_POINTS = 100
+COLLECTION_NAME = "test_collection"
+REQUEST_TIMEOUT_SEC = 10
+# Hedged reads query the next replica after at most the default hedge delay of 100ms
+MAX_HEDGED_SEARCH_SEC = 2
+
+
+def search(peer_url, vector, consistency):
+    r = get_session().post(
+        f"{peer_url}/collections/{COLLECTION_NAME}/points/search?consistency={consistency}", json={
+            "vector": vector,
+            "limit": 10,
+        },
+        timeout=REQUEST_TIMEOUT_SEC
+    )
+    assert_http_ok(r)
+    return r.json()["result"]
+
+
+def test_hedged_reads(tmp_path: pathlib.Path):
+    assert_project_root()
+
+    peer_api_uris, _, _ = start_cluster(tmp_path, N_PEERS)
+
+    create_collection(peer_api_uris[0], shard_number=1, replication_factor=N_REPLICAS)
+    wait_collection_exists_and_active_on_all_peers(collection_name=COLLECTION_NAME, peer_api_uris=peer_api_uris)
+    upsert_random_points(peer_api_uris[0], N_POINTS)
+
+    # Hedged reads only query remote replicas, use the peer without a replica
+    remote_idx = next(
+        idx for idx, uri in enumerate(peer_api_uris)
+        if len(get_collection_cluster_info(uri, COLLECTION_NAME)["local_shards"]) == 0
+    )
+    remote_uri = peer_api_uris[remote_idx]
+
+    # Hedged reads return the same results as reading all replicas,
+    # while the latency of the replicas becomes known
+    for _ in range(20):
+        vector = random_vector()
+        hedged_result = search(remote_uri, vector, "hedged")
+        all_result = search(remote_uri, vector, "all")
+        assert [point["id"] for point in hedged_result] == [point["id"] for point in all_result]
+
+    r = get_session().post(
+        f"{remote_uri}/collections/{COLLECTION_NAME}/points/scroll?consistency=hedged", json={
+            "limit": N_POINTS,
+        }
+    )
+    assert_http_ok(r)
+    assert len(r.json()["result"]["points"]) == N_POINTS
+
+    # A replica which does not respond is hedged by the other one.
+    # `processes` is aligned with `peer_api_uris`.
+    replica_idx = next(idx for idx in range(N_PEERS) if idx != remote_idx)
+    stopped_pid = processes[replica_idx].pid
+    os.kill(stopped_pid, signal.SIGSTOP)
+    try:
+        # The stopped replica is queried first in some of the searches, depending on the latency order
+        for _ in range(10):
+            start = time.time()
+            search(remote_uri, random_vector(), "hedged")
+            assert time.time() - start < MAX_HEDGED_SEARCH_SEC
+    finally:
+        os.kill(stopped_pid, signal.SIGCONT)
@@ -65,12 +65,14 @@ def test_listener_node(tmp_path: pathlib.Path):
 
     peer_api_uris.pop()
 
+    # Both restarts of the last peer use the same address
+    restart_port = get_port_seed()
     peer_api_uris.append(
         start_peer(
             peer_dirs[-1],
             f"peer_0_{N_PEERS}_restart.log",
             bootstrap_uri,
-            port=20000,
+            port=restart_port,
             extra_env={
                 "QDRANT__STORAGE__NODE_TYPE": "Listener",
             }
@@ -95,7 +97,7 @@ def test_listener_node(tmp_path: pathlib.Path):
             peer_dirs[-1],
             f"peer_0_{N_PEERS}_restart_again.log",
             bootstrap_uri,
-            port=20000,
+            port=restart_port,
             extra_env={
                 "QDRANT__STORAGE__NODE_TYPE": "Normal",
             }
@@ -3,7 +3,8 @@ import multiprocessing
 import pathlib
 import random
 
-from .fixtures import create_collection, upsert_random_points
+from .cluster_templates import start_cluster_from_template, with_collection
+from .fixtures import upsert_random_points
 from .utils import *
 
 logging.basicConfig(level=logging.DEBUG)
@@ -41,13 +42,15 @@ def get_all_points(peer_url, collection_name):
     return res.json()["result"]
 
 
-def test_shard_consistency(tmp_path: pathlib.Path):
+def test_shard_consistency(tmp_path: pathlib.Path, cluster_templates):
     assert_project_root()
 
-    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster(tmp_path, N_PEERS)
-
-    create_collection(peer_api_uris[0], shard_number=N_SHARDS, replication_factor=N_REPLICAS)
-    wait_collection_exists_and_active_on_all_peers(collection_name="test_collection", peer_api_uris=peer_api_uris)
+    template = cluster_templates.get(
+        f"{N_PEERS}_peers_{N_SHARDS}_shards_{N_REPLICAS}_replicas",
+        N_PEERS,
+        setup=with_collection(COLLECTION_NAME, shard_number=N_SHARDS, replication_factor=N_REPLICAS),
+    )
+    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster_from_template(tmp_path, template)
 
     # upload points to the leader
     upload_processes = [
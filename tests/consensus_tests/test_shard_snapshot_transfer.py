@@ -0,0 +1,109 @@
+import multiprocessing
+import pathlib
+import random
+
+from .fixtures import create_collection, upsert_random_points
+from .http_session import get_session
+from .utils import *
+
+N_PEERS = 2
+N_POINTS = 1000
+# Points with known values inserted while the shard is transferred
+N_TRANSFER_POINTS = 100
+TRANSFER_BATCH_SIZE = 10
+COLLECTION_NAME = "test_collection"
+
+
+def update_points_in_loop(peer_url, collection_name):
+    limit = 5
+    while True:
+        # only overwrite existing points, the number of points must not change
+        offset = random.randint(0, N_POINTS - limit)
+        upsert_random_points(peer_url, limit, collection_name, offset=offset, wait='false')
+
+
+def run_update_points_in_background(peer_url, collection_name):
+    p = multiprocessing.Process(target=update_points_in_loop, args=(peer_url, collection_name))
+    p.start()
+    return p
+
+
+def transfer_point(point_id):
+    # Values are exactly representable as f32, `Dot` vectors are stored as is
+    return {
+        "id": point_id,
+        "vector": [float(point_id), 0.5, 0.25, -1.0],
+        "payload": {"city": f"city_{point_id}", "index": point_id},
+    }
+
+
+def upsert_transfer_points(peer_url):
+    point_ids = range(N_POINTS, N_POINTS + N_TRANSFER_POINTS)
+    for i in range(0, N_TRANSFER_POINTS, TRANSFER_BATCH_SIZE):
+        r = get_session().put(
+            f"{peer_url}/collections/{COLLECTION_NAME}/points?wait=true", json={
+                "points": [transfer_point(point_id) for point_id in point_ids[i:i + TRANSFER_BATCH_SIZE]],
+            })
+        assert_http_ok(r)
+
+
+def test_shard_snapshot_transfer(tmp_path: pathlib.Path):
+    assert_project_root()
+
+    peer_api_uris, _, _ = start_cluster(tmp_path, N_PEERS)
+
+    create_collection(peer_api_uris[0], shard_number=1, replication_factor=1)
+    wait_collection_exists_and_active_on_all_peers(collection_name=COLLECTION_NAME, peer_api_uris=peer_api_uris)
+    upsert_random_points(peer_api_uris[0], N_POINTS)
+
+    # Find the peer holding the shard
+    source_uri, target_uri = peer_api_uris
+    source_cluster_info = get_collection_cluster_info(source_uri, COLLECTION_NAME)
+    if len(source_cluster_info["local_shards"]) == 0:
+        source_uri, target_uri = target_uri, source_uri
+        source_cluster_info = get_collection_cluster_info(source_uri, COLLECTION_NAME)
+    target_cluster_info = get_collection_cluster_info(target_uri, COLLECTION_NAME)
+
+    # Updates during the transfer are queued and sent after the snapshot
+    upload_process = run_update_points_in_background(source_uri, COLLECTION_NAME)
+
+    # Move the shard with a snapshot
+    r = get_session().post(
+        f"{source_uri}/collections/{COLLECTION_NAME}/cluster", json={
+            "move_shard": {
+                "shard_id": 0,
+                "from_peer_id": source_cluster_info["peer_id"],
+                "to_peer_id": target_cluster_info["peer_id"],
+                "method": "snapshot",
+            }
+        })
+    assert_http_ok(r)
+
+    # Inserted while the shard is transferred, must be replayed on the target from the queue
+    upsert_transfer_points(source_uri)
+
+    wait_for_collection_shard_transfers_count(source_uri, COLLECTION_NAME, 0)
+    upload_process.kill()
+
+    assert check_collection_local_shards_count(source_uri, COLLECTION_NAME, 0)
+    assert check_collection_local_shards_count(target_uri, COLLECTION_NAME, 1)
+    wait_for_all_replicas_active(target_uri, COLLECTION_NAME)
+
+    r = get_session().post(
+        f"{target_uri}/collections/{COLLECTION_NAME}/points", json={
+            "ids": list(range(N_POINTS, N_POINTS + N_TRANSFER_POINTS)),
+            "with_payload": True,
+            "with_vector": True,
+        })
+    assert_http_ok(r)
+    points = sorted(r.json()["result"], key=lambda point: point["id"])
+    assert [point["id"] for point in points] == list(range(N_POINTS, N_POINTS + N_TRANSFER_POINTS))
+    for point in points:
+        expected = transfer_point(point["id"])
+        assert point["vector"] == expected["vector"]
+        assert point["payload"] == expected["payload"]
+
+    for uri in peer_api_uris:
+        r = get_session().post(f"{uri}/collections/{COLLECTION_NAME}/points/count", json={"exact": True})
+        assert_http_ok(r)
+        assert r.json()["result"]["count"] == N_POINTS + N_TRANSFER_POINTS
@@ -28,8 +28,7 @@ def run_update_points_in_background(peer_url, collection_name):
 def test_two_follower_nodes_down(tmp_path: pathlib.Path):
     assert_project_root()
 
-    # seed port to reuse the same port for the restarted nodes
-    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster(tmp_path, N_PEERS, 20000)
+    peer_api_uris, peer_dirs, bootstrap_uri = start_cluster(tmp_path, N_PEERS, port_seed=get_port_seed(N_PEERS * 100))
 
     create_collection(peer_api_uris[0], shard_number=N_SHARDS, replication_factor=N_REPLICA)
     wait_collection_exists_and_active_on_all_peers(
@@ -57,12 +56,12 @@ def test_two_follower_nodes_down(tmp_path: pathlib.Path):
     # Stop pushing points to the leader
     upload_process.kill()
 
-    # Restart third peer on same ports
-    new_url_3 = start_peer(peer_dirs[2], f"peer_{3}_restarted.log", bootstrap_uri, 20200)
+    # Restart third peer
+    new_url_3 = start_peer(peer_dirs[2], f"peer_{3}_restarted.log", bootstrap_uri, port=get_port_seed())
     peer_api_uris.append(new_url_3)
 
-    # Restart second peer on same ports
-    new_url_2 = start_peer(peer_dirs[1], f"peer_{2}_restarted.log", bootstrap_uri, 20100)
+    # Restart second peer
+    new_url_2 = start_peer(peer_dirs[1], f"peer_{2}_restarted.log", bootstrap_uri, port=get_port_seed())
     peer_api_uris.append(new_url_2)
 
     # Wait for peers to be online
@@ -1,35 +1,185 @@
+import atexit
 import json
 import os
 import shutil
+import signal
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import Popen
 import time
-from typing import Tuple, Callable, Dict, List, Optional
+from typing import Tuple, Callable, Dict, List, Optional, TYPE_CHECKING
 import requests
 import socket
 from contextlib import closing
 from pathlib import Path
 import pytest
 from .assertions import assert_http_ok
+from . import log_timeline, probes
+from .http_session import get_session
+
+if TYPE_CHECKING:
+    from telemetry_sampler import Sampler
+
+# Tests can run in parallel with pytest-xdist (`pytest -n auto`). Every worker gets its own block of ports
+# and its own log folder, so tests of different workers never compete for a port or a log file.
+# Blocks are kept below the ephemeral port range, which the OS assigns to outgoing connections.
+PORT_RANGE_START = int(os.environ.get("QDRANT_TEST_PORT_RANGE_START", 10000))
+MAX_PORTS_PER_WORKER = 1000
+LOG_ROOT = os.environ.get("QDRANT_TEST_LOG_DIR", "consensus_test_logs")
+# Write the timeline of raft and shard transfer phases next to the peer logs of every test, see `log_timeline`
+WRITE_TIMELINE = os.environ.get("QDRANT_TEST_TIMELINE", "false").lower() in ("1", "true")
+# Sample `/telemetry` and `/metrics` of every peer at this interval in seconds, disabled if 0, see `telemetry_sampler`
+SAMPLE_INTERVAL_SEC = float(os.environ.get("QDRANT_TEST_SAMPLE_INTERVAL", 0))
 
 # Tracks processes that need to be killed at the end of the test
 processes = []
 
+# Next port to try in the block of this worker
+_next_port: Optional[int] = None
+
+# Samples telemetry of the peers of the current test
+_sampler: Optional["Sampler"] = None
+
+
+def kill_process_group(p: Popen):
+    """
+    Peers are started in their own process group, kill the whole group and reap the process.
+    """
+    try:
+        os.killpg(p.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # already gone
+        pass
+    p.wait()
+
+
+def kill_all_processes():
+    while len(processes) > 0:
+        p = processes.pop(0)
+        print(f"Killing {p.pid}")
+        kill_process_group(p)
+
+
+# Peers do not receive the signals sent to the test runner, make sure they do not outlive it
+atexit.register(kill_all_processes)
+
 
 @pytest.fixture(autouse=True)
 def every_test():
     yield
     print()
-    while len(processes) > 0:
-        p = processes.pop(0)
-        print(f"Killing {p.pid}")
-        p.kill()
+    stop_sampler()
+    kill_all_processes()
+    if WRITE_TIMELINE:
+        log_folder = f"{get_log_root()}/{get_pytest_current_test_name()}"
+        if os.path.exists(log_folder):
+            print(f"Timeline written to {log_timeline.write_timeline(log_folder)}")
+
+
+def attach_sampler(log_file: str, api_uri: str, pid: int):
+    """
+    Sample the telemetry of a started peer until the end of the test, if enabled
+    """
+    global _sampler
+    if SAMPLE_INTERVAL_SEC <= 0:
+        return
+    if _sampler is None:
+        # Imported only when enabled, the sampler requires numpy
+        from telemetry_sampler import Sampler
+        _sampler = Sampler(SAMPLE_INTERVAL_SEC)
+        _sampler.start()
+    _sampler.attach(os.path.splitext(log_file)[0], api_uri, pid)
+
+
+def stop_sampler():
+    global _sampler
+    if _sampler is None:
+        return
+    sampler, _sampler = _sampler, None
+    sampler.stop()
+    path = f"{init_pytest_log_folder()}/telemetry.npz"
+    sampler.save(path)
+    print(sampler.summary())
+    print(f"Telemetry samples written to {path}")
+
+
+def get_worker_id() -> Optional[str]:
+    # Set by pytest-xdist in worker processes, e.g. `gw3`
+    return os.environ.get("PYTEST_XDIST_WORKER")
+
+
+def get_worker_index() -> int:
+    worker_id = get_worker_id()
+    if worker_id is None or not worker_id.startswith("gw"):
+        return 0
+    return int(worker_id[2:])
+
+
+def get_ephemeral_port_start() -> int:
+    try:
+        with open("/proc/sys/net/ipv4/ip_local_port_range") as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        # Linux default
+        return 32768
+
+
+def get_ports_per_worker() -> int:
+    if "QDRANT_TEST_PORTS_PER_WORKER" in os.environ:
+        return int(os.environ["QDRANT_TEST_PORTS_PER_WORKER"])
+    # Share the ports below the ephemeral range between all workers
+    worker_count = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+    available = get_ephemeral_port_start() - PORT_RANGE_START
+    return min(MAX_PORTS_PER_WORKER, available // max(worker_count, 1))
+
+
+def get_worker_port_range() -> range:
+    ports_per_worker = get_ports_per_worker()
+    start = PORT_RANGE_START + get_worker_index() * ports_per_worker
+    stop = start + ports_per_worker
+    ephemeral_start = get_ephemeral_port_start()
+    if ports_per_worker <= 0 or stop > ephemeral_start:
+        raise Exception(
+            f"Ports {start}-{stop - 1} of worker {get_worker_id()} are not below the ephemeral port range "
+            f"starting at {ephemeral_start}, use less workers or lower QDRANT_TEST_PORT_RANGE_START")
+    return range(start, stop)
+
+
+def port_is_free(port: int) -> bool:
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        try:
+            s.bind(('', port))
+            return True
+        except OSError:
+            return False
+
+
+def get_port_seed(span: int = 3) -> int:
+    """
+    Reserve `span` consecutive free ports from the block of this worker and return the first one.
+    Ports are handed out in order, a port is only reused once the whole block has been cycled through.
+
+    Use as `port` of `start_peer` (3 ports), or as `port_seed` of `start_cluster` (`num_peers * 100` ports).
+    """
+    global _next_port
+    ports = get_worker_port_range()
+    if span > len(ports):
+        raise Exception(f"Can not reserve {span} ports in a block of {len(ports)}")
+    if _next_port is None or _next_port not in ports:
+        _next_port = ports.start
+    for _ in range(len(ports)):
+        if _next_port + span > ports.stop:
+            _next_port = ports.start
+        seed = _next_port
+        busy_port = next((port for port in range(seed, seed + span) if not port_is_free(port)), None)
+        if busy_port is None:
+            _next_port = seed + span
+            return seed
+        _next_port = busy_port + 1
+    raise Exception(f"No {span} consecutive free ports in range {ports.start}-{ports.stop - 1}")
 
 
 def get_port() -> int:
-    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-        s.bind(('', 0))
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        return s.getsockname()[1]
+    return get_port_seed(1)
 
 
 def get_env(p2p_port: int, grpc_port: int, http_port: int) -> Dict[str, str]:
@@ -63,14 +213,23 @@ def get_pytest_current_test_name() -> str:
     return os.environ.get('PYTEST_CURRENT_TEST').split(':')[-1].split(' ')[0]
 
 
+def get_log_root() -> str:
+    worker_id = get_worker_id()
+    return LOG_ROOT if worker_id is None else f"{LOG_ROOT}/{worker_id}"
+
+
 def init_pytest_log_folder() -> str:
     test_name = get_pytest_current_test_name()
-    log_folder = f"consensus_test_logs/{test_name}"
+    log_folder = f"{get_log_root()}/{test_name}"
     if not os.path.exists(log_folder):
-        os.makedirs(log_folder)
+        os.makedirs(log_folder, exist_ok=True)
     return log_folder
 
 
+def get_peer_log_path(log_file: str) -> str:
+    return f"{init_pytest_log_folder()}/{log_file}"
+
+
 # Starts a peer and returns its api_uri
 def start_peer(peer_dir: Path, log_file: str, bootstrap_uri: str, port=None, extra_env=None) -> str:
     if extra_env is None:
@@ -82,35 +241,43 @@ def start_peer(peer_dir: Path, log_file: str, bootstrap_uri: str, port=None, ext
         **get_env(p2p_port, grpc_port, http_port),
         **extra_env
     }
-    test_log_folder = init_pytest_log_folder()
-    log_file = open(f"{test_log_folder}/{log_file}", "w")
+    log_file_name = log_file
+    log_file = open(get_peer_log_path(log_file), "w")
     print(f"Starting follower peer with bootstrap uri {bootstrap_uri},"
           f" http: http://localhost:{http_port}/cluster, p2p: {p2p_port}")
 
     this_peer_consensus_uri = get_uri(p2p_port)
     processes.append(
         Popen([get_qdrant_exec(), "--bootstrap", bootstrap_uri, "--uri", this_peer_consensus_uri], env=env,
-              cwd=peer_dir, stderr=log_file))
+              cwd=peer_dir, stderr=log_file, start_new_session=True))
+    attach_sampler(log_file_name, get_uri(http_port), processes[-1].pid)
     return get_uri(http_port)
 
 
 # Starts a peer and returns its api_uri and p2p_uri
-def start_first_peer(peer_dir: Path, log_file: str, port=None) -> Tuple[str, str]:
+def start_first_peer(peer_dir: Path, log_file: str, port=None, extra_env=None) -> Tuple[str, str]:
+    if extra_env is None:
+        extra_env = {}
     p2p_port = get_port() if port is None else port + 0
     grpc_port = get_port() if port is None else port + 1
     http_port = get_port() if port is None else port + 2
-    env = get_env(p2p_port, grpc_port, http_port)
-    test_log_folder = init_pytest_log_folder()
-    log_file = open(f"{test_log_folder}/{log_file}", "w")
+    env = {
+        **get_env(p2p_port, grpc_port, http_port),
+        **extra_env
+    }
+    log_file_name = log_file
+    log_file = open(get_peer_log_path(log_file), "w")
     bootstrap_uri = get_uri(p2p_port)
     print(f"\nStarting first peer with uri {bootstrap_uri},"
           f" http: http://localhost:{http_port}/cluster, p2p: {p2p_port}")
     processes.append(
-        Popen([get_qdrant_exec(), "--uri", bootstrap_uri], env=env, cwd=peer_dir, stderr=log_file))
+        Popen([get_qdrant_exec(), "--uri", bootstrap_uri], env=env, cwd=peer_dir, stderr=log_file,
+              start_new_session=True))
+    attach_sampler(log_file_name, get_uri(http_port), processes[-1].pid)
     return get_uri(http_port), bootstrap_uri
 
 
-def start_cluster(tmp_path, num_peers, port_seed=None):
+def start_cluster(tmp_path, num_peers, port_seed=None, log_prefix="peer_0", extra_env=None):
     assert_project_root()
     peer_dirs = make_peer_folders(tmp_path, num_peers)
 
@@ -118,18 +285,36 @@ def start_cluster(tmp_path, num_peers, port_seed=None):
     peer_api_uris = []
 
     # Start bootstrap
-    (bootstrap_api_uri, bootstrap_uri) = start_first_peer(peer_dirs[0], "peer_0_0.log", port=port_seed)
+    bootstrap_log_file = f"{log_prefix}_0.log"
+    (bootstrap_api_uri, bootstrap_uri) = start_first_peer(peer_dirs[0], bootstrap_log_file, port=port_seed,
+                                                          extra_env=extra_env)
     peer_api_uris.append(bootstrap_api_uri)
+    wait_for_peer_log(processes[-1], get_peer_log_path(bootstrap_log_file))
 
     # Wait for leader
     leader = wait_peer_added(bootstrap_api_uri)
 
+    # Start all other peers at once, they join the bootstrap peer concurrently.
+    # Processes are spawned in order, so `processes` stays aligned with `peer_api_uris`.
+    followers = []
     port = None
-    # Start other peers
     for i in range(1, len(peer_dirs)):
         if port_seed is not None:
             port = port_seed + i * 100
-        peer_api_uris.append(start_peer(peer_dirs[i], f"peer_0_{i}.log", bootstrap_uri, port=port))
+        log_file = f"{log_prefix}_{i}.log"
+        peer_api_uri = start_peer(peer_dirs[i], log_file, bootstrap_uri, port=port, extra_env=extra_env)
+        peer_api_uris.append(peer_api_uri)
+        followers.append((processes[-1], get_peer_log_path(log_file), peer_api_uri))
+
+    # Wait for every follower in parallel
+    if followers:
+        with ThreadPoolExecutor(max_workers=len(followers)) as executor:
+            futures = [
+                executor.submit(wait_for_peer_joined, process, log_path, peer_api_uri, leader)
+                for (process, log_path, peer_api_uri) in followers
+            ]
+            for future in futures:
+                future.result()
 
     # Wait for cluster
     wait_for_uniform_cluster_status(peer_api_uris, leader)
@@ -153,7 +338,7 @@ def make_peer_folders(base_path: Path, n_peers: int) -> List[Path]:
 
 
 def get_cluster_info(peer_api_uri: str) -> dict:
-    r = requests.get(f"{peer_api_uri}/cluster")
+    r = get_session().get(f"{peer_api_uri}/cluster")
     assert_http_ok(r)
     res = r.json()["result"]
     return res
@@ -184,14 +369,14 @@ def fetch_highest_peer_id(peer_api_uris: [str]) -> str:
 
 
 def get_collection_cluster_info(peer_api_uri: str, collection_name: str) -> dict:
-    r = requests.get(f"{peer_api_uri}/collections/{collection_name}/cluster")
+    r = get_session().get(f"{peer_api_uri}/collections/{collection_name}/cluster")
     assert_http_ok(r)
     res = r.json()["result"]
     return res
 
 
 def get_collection_info(peer_api_uri: str, collection_name: str) -> dict:
-    r = requests.get(f"{peer_api_uri}/collections/{collection_name}")
+    r = get_session().get(f"{peer_api_uri}/collections/{collection_name}")
     assert_http_ok(r)
     res = r.json()["result"]
     return res
@@ -202,14 +387,14 @@ def print_collection_cluster_info(peer_api_uri: str, collection_name: str):
 
 
 def get_leader(peer_api_uri: str) -> str:
-    r = requests.get(f"{peer_api_uri}/cluster")
+    r = get_session().get(f"{peer_api_uri}/cluster")
     assert_http_ok(r)
     return r.json()["result"]["raft_info"]["leader"]
 
 
 def check_leader(peer_api_uri: str, expected_leader: str) -> bool:
     try:
-        r = requests.get(f"{peer_api_uri}/cluster")
+        r = get_session().get(f"{peer_api_uri}/cluster")
         assert_http_ok(r)
         leader = r.json()["result"]["raft_info"]["leader"]
         correct_leader = leader == expected_leader
@@ -224,7 +409,7 @@ def check_leader(peer_api_uri: str, expected_leader: str) -> bool:
 
 def leader_is_defined(peer_api_uri: str) -> bool:
     try:
-        r = requests.get(f"{peer_api_uri}/cluster")
+        r = get_session().get(f"{peer_api_uri}/cluster")
         assert_http_ok(r)
         leader = r.json()["result"]["raft_info"]["leader"]
         return leader is not None
@@ -236,7 +421,7 @@ def leader_is_defined(peer_api_uri: str) -> bool:
 
 def check_cluster_size(peer_api_uri: str, expected_size: int) -> bool:
     try:
-        r = requests.get(f"{peer_api_uri}/cluster")
+        r = get_session().get(f"{peer_api_uri}/cluster")
         assert_http_ok(r)
         peers = r.json()["result"]["peers"]
         correct_size = len(peers) == expected_size
@@ -250,39 +435,17 @@ def check_cluster_size(peer_api_uri: str, expected_size: int) -> bool:
 
 
 def all_nodes_cluster_info_consistent(peer_api_uris: [str], expected_leader: str) -> bool:
-    expected_size = len(peer_api_uris)
-    for uri in peer_api_uris:
-        if check_leader(uri, expected_leader) and check_cluster_size(uri, expected_size):
-            continue
-        else:
-            return False
-    return True
+    predicate = probes.cluster_info_consistent(expected_leader, len(peer_api_uris))
+    return probes.all_peers_satisfy(peer_api_uris, "/cluster", predicate)
 
 
 def all_nodes_respond(peer_api_uris: [str]) -> bool:
-    for uri in peer_api_uris:
-        try:
-            r = requests.get(f"{uri}/collections")
-            assert_http_ok(r)
-        except requests.exceptions.ConnectionError:
-            print(f"Could not contact peer {uri} to fetch collections")
-            return False
-    return True
+    return probes.all_peers_satisfy(peer_api_uris, "/collections", probes.responds)
 
 
 def collection_exists_on_all_peers(collection_name: str, peer_api_uris: [str]) -> bool:
-    for uri in peer_api_uris:
-        r = requests.get(f"{uri}/collections")
-        assert_http_ok(r)
-        collections = r.json()["result"]["collections"]
-        filtered_collections = [c for c in collections if c['name'] == collection_name]
-        if len(filtered_collections) == 0:
-            print(
-                f"Collection '{collection_name}' does not exist on peer {uri} found {json.dumps(collections, indent=4)}")
-            return False
-        else:
-            continue
-    return True
+    predicate = probes.collection_exists(collection_name)
+    return probes.all_peers_satisfy(peer_api_uris, "/collections", predicate)
 
 
 def check_collection_local_shards_count(peer_api_uri: str, collection_name: str,
@@ -315,13 +478,18 @@ def check_some_replicas_not_active(peer_api_uri: str, collection_name: str) -> b
 
 
 def check_collection_cluster(peer_url, collection_name):
-    res = requests.get(f"{peer_url}/collections/{collection_name}/cluster", timeout=10)
+    res = get_session().get(f"{peer_url}/collections/{collection_name}/cluster", timeout=10)
     assert_http_ok(res)
     return res.json()["result"]['local_shards'][0]
 
 
 WAIT_TIME_SEC = 30
 RETRY_INTERVAL_SEC = 0.5
+MIN_RETRY_INTERVAL_SEC = 0.02
+LOG_POLL_INTERVAL_SEC = 0.01
+
+# Logged by a peer once its REST API accepts connections
+PEER_READY_LOG_LINE = "Qdrant HTTP listening on"
 
 
 def wait_peer_added(peer_api_uri: str, expected_size: int = 1) -> str:
@@ -346,9 +514,15 @@ def wait_for_all_replicas_active(peer_api_uri: str, collection_name: str):
         raise e
 
 
+def wait_for_all_peers(peer_api_uris: [str], path: str, predicate: probes.PeerPredicate, timeout=WAIT_TIME_SEC):
+    probes.wait_all_peers_satisfy(
+        peer_api_uris, path, predicate, timeout, MIN_RETRY_INTERVAL_SEC, RETRY_INTERVAL_SEC)
+
+
 def wait_for_uniform_cluster_status(peer_api_uris: [str], expected_leader: str):
     try:
-        wait_for(all_nodes_cluster_info_consistent, peer_api_uris, expected_leader)
+        predicate = probes.cluster_info_consistent(expected_leader, len(peer_api_uris))
+        wait_for_all_peers(peer_api_uris, "/cluster", predicate)
     except Exception as e:
         print_clusters_info(peer_api_uris)
         raise e
@@ -356,7 +530,7 @@ def wait_for_uniform_cluster_status(peer_api_uris: [str], expected_leader: str):
 
 def wait_all_peers_up(peer_api_uris: [str]):
     try:
-        wait_for(all_nodes_respond, peer_api_uris)
+        wait_for_all_peers(peer_api_uris, "/collections", probes.responds)
     except Exception as e:
         print_clusters_info(peer_api_uris)
         raise e
@@ -364,7 +538,7 @@ def wait_all_peers_up(peer_api_uris: [str]):
 
 def wait_for_uniform_collection_existence(collection_name: str, peer_api_uris: [str]):
     try:
-        wait_for(collection_exists_on_all_peers, collection_name, peer_api_uris)
+        wait_for_all_peers(peer_api_uris, "/collections", probes.collection_exists(collection_name))
     except Exception as e:
         print_clusters_info(peer_api_uris)
         raise e
@@ -389,18 +563,54 @@ def wait_for_collection_local_shards_count(peer_api_uri: str, collection_name: s
 
 def wait_for(condition: Callable[..., bool], *args):
     start = time.time()
+    # Exponential backoff: quick conditions are detected early, slow ones are not hammered
+    retry_interval = MIN_RETRY_INTERVAL_SEC
     while not condition(*args):
         elapsed = time.time() - start
         if elapsed > WAIT_TIME_SEC:
             raise Exception(
                 f"Timeout waiting for condition {condition.__name__} to be satisfied in {WAIT_TIME_SEC} seconds")
         else:
-            time.sleep(RETRY_INTERVAL_SEC)
+            time.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, RETRY_INTERVAL_SEC)
+
+
+def wait_for_peer_log(process: Popen, log_path: str, pattern: str = PEER_READY_LOG_LINE):
+    """
+    Follow the log of a peer until a line containing `pattern` is written.
+    Fails early if the peer process exits before that.
+    """
+    start = time.time()
+    with open(log_path) as log:
+        line = ""
+        while True:
+            line += log.readline()
+            if line.endswith("\n"):
+                if pattern in line:
+                    return
+                line = ""
+                continue
+            if process.poll() is not None:
+                raise Exception(
+                    f"Peer process {process.pid} exited with code {process.returncode} "
+                    f"before logging '{pattern}', see {log_path}")
+            if time.time() - start > WAIT_TIME_SEC:
+                raise Exception(f"Timeout waiting for '{pattern}' in {log_path} in {WAIT_TIME_SEC} seconds")
+            time.sleep(LOG_POLL_INTERVAL_SEC)
+
+
+def wait_for_peer_joined(process: Popen, log_path: str, peer_api_uri: str, expected_leader: str):
+    wait_for_peer_log(process, log_path)
+    try:
+        wait_for(check_leader, peer_api_uri, expected_leader)
+    except Exception as e:
+        print_clusters_info([peer_api_uri])
+        raise e
 
 
 def peer_is_online(peer_api_uri: str) -> bool:
     try:
-        r = requests.get(f"{peer_api_uri}")
+        r = get_session().get(f"{peer_api_uri}")
         return r.status_code == 200
     except:
         return False
@@ -428,24 +638,12 @@ def wait_collection_size(peer_api_uri: str, collection_name: str, expected_size:
 
 
 def wait_collection_on_all_peers(collection_name: str, peer_api_uris: [str], max_wait=30):
-    # Check that it exists on all peers
-    while True:
-        exists = True
-        for url in peer_api_uris:
-            r = requests.get(f"{url}/collections")
-            assert_http_ok(r)
-            collections = r.json()["result"]["collections"]
-            exists &= any(collection["name"] == collection_name for collection in collections)
-        if exists:
-            break
-        else:
-            # Wait until collection is created on all peers
-            # Consensus guarantees that collection will appear on majority of peers, but not on all of them
-            # So we need to wait a bit extra time
-            time.sleep(1)
-            max_wait -= 1
-        if max_wait <= 0:
-            raise Exception("Collection was not created on all peers in time")
+    # Consensus guarantees that collection will appear on majority of peers, but not on all of them
+    # So we need to wait a bit extra time
+    try:
+        wait_for_all_peers(peer_api_uris, "/collections", probes.collection_exists(collection_name), timeout=max_wait)
+    except Exception as e:
+        raise Exception("Collection was not created on all peers in time") from e
 
 
 def wait_collection_exists_and_active_on_all_peers(collection_name: str, peer_api_uris: [str], max_wait=30):
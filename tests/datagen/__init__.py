@@ -0,0 +1 @@
+from .generator import Batch, DatasetGenerator, PayloadField, random_vectors
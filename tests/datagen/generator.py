@@ -0,0 +1,285 @@
+"""
+Seeded, NumPy based generator of points to populate test collections.
+
+Vectors, ids and payload values are generated column-wise for a whole batch
+at once. Every batch has its own random generator derived from the dataset
+seed and the batch number, so batches are reproducible and can be generated
+in any order, e.g. from parallel processes.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    # serializes numpy arrays natively, an order of magnitude faster than `json` for vectors
+    import orjson
+except ImportError:
+    orjson = None
+
+PAYLOAD_TYPES = ("keyword", "integer", "float", "geo", "text")
+
+# Either the size of the default vector, or sizes of named vectors
+VectorsConfig = Union[int, Dict[str, int]]
+
+
+def random_vectors(rng: np.random.Generator, n: int, size: int, low: float = 0.0, high: float = 1.0) -> np.ndarray:
+    return rng.uniform(low, high, (n, size)).astype(np.float32)
+
+
+@dataclass
+class PayloadField:
+    """
+    :param name: payload key
+    :param type: one of `PAYLOAD_TYPES`
+    :param cardinality: number of distinct values of the field, `None` for unbounded
+        (keyword and text: size of the vocabulary, 10 by default)
+    :param values: explicit vocabulary of a keyword field
+    :param low: lower bound of integer and float values
+    :param high: upper bound (exclusive) of integer and float values
+    :param words: number of words of a text value
+    :param missing: probability for a point not to have the field
+    """
+    name: str
+    type: str
+    cardinality: Optional[int] = None
+    values: Optional[Sequence[str]] = None
+    low: float = 0
+    high: float = 1000
+    words: int = 5
+    missing: float = 0.0
+
+    def __post_init__(self):
+        if self.type not in PAYLOAD_TYPES:
+            raise ValueError(f"Unknown payload type '{self.type}', expected one of {PAYLOAD_TYPES}")
+
+    def vocabulary(self) -> np.ndarray:
+        if self.values is not None:
+            return np.array(self.values)
+        prefix = self.name if self.type == "keyword" else "word"
+        return np.array([f"{prefix}_{i}" for i in range(self.cardinality or 10)])
+
+    def generate(self, rng: np.random.Generator, n: int, pool_rng: np.random.Generator) -> list:
+        """
+        :param pool_rng: generator of the bounded set of values, identical for all batches
+        """
+        if self.type == "keyword":
+            vocabulary = self.vocabulary()
+            values = vocabulary[rng.integers(0, len(vocabulary), n)].tolist()
+        elif self.type == "text":
+            vocabulary = self.vocabulary()
+            words = vocabulary[rng.integers(0, len(vocabulary), (n, self.words))]
+            values = [" ".join(text) for text in words.tolist()]
+        elif self.type == "integer":
+            if self.cardinality is None:
+                values = rng.integers(int(self.low), int(self.high), n).tolist()
+            else:
+                pool = pool_rng.integers(int(self.low), int(self.high), self.cardinality)
+                values = pool[rng.integers(0, self.cardinality, n)].tolist()
+        elif self.type == "float":
+            if self.cardinality is None:
+                values = rng.uniform(self.low, self.high, n).tolist()
+            else:
+                pool = pool_rng.uniform(self.low, self.high, self.cardinality)
+                values = pool[rng.integers(0, self.cardinality, n)].tolist()
+        else:
+            if self.cardinality is None:
+                lat, lon = rng.uniform(-90, 90, n), rng.uniform(-180, 180, n)
+            else:
+                indices = rng.integers(0, self.cardinality, n)
+                lat = pool_rng.uniform(-90, 90, self.cardinality)[indices]
+                lon = pool_rng.uniform(-180, 180, self.cardinality)[indices]
+            values = [{"lat": la, "lon": lo} for la, lo in zip(lat.tolist(), lon.tolist())]
+
+        if self.missing > 0:
+            for i in np.flatnonzero(rng.random(n) < self.missing).tolist():
+                values[i] = None
+        return values
+
+
+@dataclass
+class Batch:
+    ids: np.ndarray
+    # one array per vector name, `""` for the default vector
+    vectors: Dict[str, np.ndarray]
+    payloads: List[dict] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def json_vectors(self) -> Union[list, Dict[str, list]]:
+        if list(self.vectors.keys()) == [""]:
+            return self.vectors[""].tolist()
+        return {name: vectors.tolist() for name, vectors in self.vectors.items()}
+
+    def to_json(self) -> dict:
+        """
+        Body of a `PUT /collections/{collection_name}/points` request, in the columnar batch format
+        """
+        batch = {"ids": self.ids.tolist(), "vectors": self.json_vectors()}
+        if self.payloads:
+            batch["payloads"] = self.payloads
+        return {"batch": batch}
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialized `to_json`, with `orjson` if it is installed
+        """
+        if orjson is None:
+            return json.dumps(self.to_json()).encode()
+        vectors = self.vectors[""] if list(self.vectors.keys()) == [""] else self.vectors
+        batch = {"ids": self.ids, "vectors": vectors}
+        if self.payloads:
+            batch["payloads"] = self.payloads
+        return orjson.dumps({"batch": batch}, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def to_points(self) -> List[dict]:
+        """
+        Points in the `PointStruct` format
+        """
+        columns = {name: vectors.tolist() for name, vectors in self.vectors.items()}
+        points = []
+        for i, point_id in enumerate(self.ids.tolist()):
+            if "" in columns:
+                vector = columns[""][i]
+            else:
+                vector = {name: column[i] for name, column in columns.items()}
+            point = {"id": point_id, "vector": vector}
+            if self.payloads:
+                point["payload"] = self.payloads[i]
+            points.append(point)
+        return points
+
+    def to_grpc(self, points_pb2, json_with_int_pb2) -> list:
+        """
+        Points as `PointStruct` messages, using the python modules generated from the gRPC protos
+        """
+        columns = {name: vectors.tolist() for name, vectors in self.vectors.items()}
+        points = []
+        for i, point_id in enumerate(self.ids.tolist()):
+            if "" in columns:
+                vectors = points_pb2.Vectors(vector=points_pb2.Vector(data=columns[""][i]))
+            else:
+                vectors = points_pb2.Vectors(vectors=points_pb2.NamedVectors(vectors={
+                    name: points_pb2.Vector(data=column[i]) for name, column in columns.items()
+                }))
+            payload = {}
+            if self.payloads:
+                payload = {key: to_grpc_value(json_with_int_pb2, value) for key, value in self.payloads[i].items()}
+            points.append(points_pb2.PointStruct(
+                id=points_pb2.PointId(num=point_id),
+                vectors=vectors,
+                payload=payload,
+            ))
+        return points
+
+
+def to_grpc_value(json_with_int_pb2, value):
+    if isinstance(value, str):
+        return json_with_int_pb2.Value(string_value=value)
+    if isinstance(value, bool):
+        return json_with_int_pb2.Value(bool_value=value)
+    if isinstance(value, int):
+        return json_with_int_pb2.Value(integer_value=value)
+    if isinstance(value, float):
+        return json_with_int_pb2.Value(double_value=value)
+    if isinstance(value, dict):
+        return json_with_int_pb2.Value(struct_value=json_with_int_pb2.Struct(
+            fields={k: to_grpc_value(json_with_int_pb2, v) for k, v in value.items()}
+        ))
+    if isinstance(value, list):
+        return json_with_int_pb2.Value(list_value=json_with_int_pb2.ListValue(
+            values=[to_grpc_value(json_with_int_pb2, v) for v in value]
+        ))
+    return json_with_int_pb2.Value(null_value=json_with_int_pb2.NULL_VALUE)
+
+
+class DatasetGenerator:
+    """
+    >>> generator = DatasetGenerator(4, [PayloadField("city", "keyword", values=["Berlin", "London"])], seed=42)
+    >>> batch = generator.batch(0, 3)
+    >>> batch.ids.tolist(), batch.vectors[""].shape
+    ([0, 1, 2], (3, 4))
+    >>> batch.to_points() == generator.batch(0, 3).to_points()
+    True
+    >>> sum(len(b) for b in generator.batches(10, 4)), [int(b.ids[0]) for b in generator.batches(10, 4)]
+    (10, [0, 4, 8])
+    """
+
+    def __init__(
+            self,
+            vectors: VectorsConfig,
+            payload_fields: Sequence[PayloadField] = (),
+            seed: Optional[int] = 42,
+            id_offset: int = 0,
+            vector_low: float = 0.0,
+            vector_high: float = 1.0,
+    ):
+        """
+        :param vectors: size of the default vector, or sizes of named vectors
+        :param seed: `None` for a random dataset
+        :param id_offset: id of the first point
+        """
+        self.vector_sizes = {"": vectors} if isinstance(vectors, int) else dict(vectors)
+        self.payload_fields = list(payload_fields)
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed
+        self.id_offset = id_offset
+        self.vector_low = vector_low
+        self.vector_high = vector_high
+
+    def rng(self, *key: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, *key])
+
+    def batch(self, number: int, batch_size: int, count: Optional[int] = None) -> Batch:
+        """
+        :param number: index of the batch, points of batch `number` start at `id_offset + number * batch_size`
+        :param count: number of points, if smaller than `batch_size` (last batch)
+        """
+        count = batch_size if count is None else count
+        rng = self.rng(0, number)
+        start = self.id_offset + number * batch_size
+        ids = np.arange(start, start + count, dtype=np.int64)
+        vectors = {
+            name: random_vectors(rng, count, size, self.vector_low, self.vector_high)
+            for name, size in self.vector_sizes.items()
+        }
+        payloads = []
+        if self.payload_fields:
+            columns = [
+                (payload_field.name, payload_field.generate(rng, count, self.rng(1, i)))
+                for i, payload_field in enumerate(self.payload_fields)
+            ]
+            payloads = [
+                {name: values[i] for name, values in columns if values[i] is not None}
+                for i in range(count)
+            ]
+        return Batch(ids=ids, vectors=vectors, payloads=payloads)
+
+    def batches(self, total: int, batch_size: int, first_batch: int = 0, step: int = 1) -> Iterator[Batch]:
+        """
+        Stream `total` points in batches. `first_batch` and `step` split the dataset between
+        parallel producers, e.g. producer `k` of `n` takes `first_batch=k, step=n`.
+        """
+        n_batches = (total + batch_size - 1) // batch_size
+        for number in range(first_batch, n_batches, step):
+            yield self.batch(number, batch_size, min(batch_size, total - number * batch_size))
+
+    def json_batches(self, total: int, batch_size: int, first_batch: int = 0, step: int = 1) -> Iterator[dict]:
+        for batch in self.batches(total, batch_size, first_batch, step):
+            yield batch.to_json()
+
+    def json_bytes_batches(self, total: int, batch_size: int, first_batch: int = 0, step: int = 1) -> Iterator[bytes]:
+        for batch in self.batches(total, batch_size, first_batch, step):
+            yield batch.to_json_bytes()
+
+    def grpc_batches(self, total: int, batch_size: int, points_pb2, json_with_int_pb2,
+                     first_batch: int = 0, step: int = 1) -> Iterator[list]:
+        for batch in self.batches(total, batch_size, first_batch, step):
+            yield batch.to_grpc(points_pb2, json_with_int_pb2)
+
+    def query_vectors(self, n: int, name: str = "") -> np.ndarray:
+        """
+        Vectors from the same distribution as the dataset, independent of the points
+        """
+        return random_vectors(self.rng(2), n, self.vector_sizes[name], self.vector_low, self.vector_high)
@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+
+set -euo pipefail
+
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+
+# All arguments are passed to the memory profile, see `--help`.
+# Paths are relative to the current directory, run from the project root to use `./target/release/qdrant`.
+PYTHONPATH="$DIR${PYTHONPATH:+:$PYTHONPATH}" python3 -m memory_profile "$@"
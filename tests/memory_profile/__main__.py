@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+from .suite import PAYLOADS, QUANTIZATION, Dataset, MemoryProfiler, format_profiles, storage_combinations
+
+DEFAULT_EXECUTABLE = "./target/release/qdrant"
+
+
+def bool_list(value: str) -> List[bool]:
+    values = []
+    for item in value.split(","):
+        if item not in ("true", "false"):
+            raise argparse.ArgumentTypeError(f"Expected a comma-separated list of true/false, got '{item}'")
+        values.append(item == "true")
+    return values
+
+
+def choice_list(choices):
+    def parse(value: str) -> List[str]:
+        values = value.split(",")
+        for item in values:
+            if item not in choices:
+                raise argparse.ArgumentTypeError(f"Unknown value '{item}', expected one of {', '.join(choices)}")
+        return values
+
+    return parse
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        "memory_profile",
+        description="Peak and steady memory of Qdrant for every combination of the storage options",
+    )
+    parser.add_argument("--qdrant", default=os.environ.get("QDRANT_EXEC", DEFAULT_EXECUTABLE),
+                        help="Qdrant executable, `QDRANT_EXEC` by default")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--distance", default="Cosine")
+    parser.add_argument("--payload", choices=list(PAYLOADS), default="small")
+    parser.add_argument("--on-disk", type=bool_list, default=[False, True], help="Vectors on disk, e.g. `false,true`")
+    parser.add_argument("--on-disk-payload", type=bool_list, default=[False, True])
+    parser.add_argument("--hnsw-on-disk", type=bool_list, default=[False, True])
+    parser.add_argument("--quantization", type=choice_list(list(QUANTIZATION)), default=list(QUANTIZATION),
+                        help="Scalar quantization, e.g. `none,always_ram`")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--parallel", type=int, default=4, help="Upload and search threads")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--settle-sec", type=float, default=10, help="Wait before measuring steady memory")
+    parser.add_argument("--interval", type=float, default=0.1, help="Sampling interval of the memory")
+    parser.add_argument("--work-dir", help="Folder of the temporary storages, the system default if not set")
+    parser.add_argument("--output", help="Write the profiles to a JSON file")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    dataset = Dataset(args.points, args.dim, args.payload, args.distance)
+    profiler = MemoryProfiler(args.qdrant, dataset, args.work_dir, args.settle_sec, args.batch_size, args.parallel,
+                              args.queries, args.interval)
+    combinations = storage_combinations(args.on_disk, args.on_disk_payload, args.hnsw_on_disk, args.quantization)
+
+    profiles = []
+    for i, options in enumerate(combinations):
+        print(f"[{i + 1}/{len(combinations)}] {options.name}", flush=True)
+        profiles.append(profiler.profile(options))
+        print(format_profiles(profiles[-1:]).splitlines()[-1], flush=True)
+
+    print()
+    print(format_profiles(profiles))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "dataset": dataset.__dict__,
+                "profiles": [profile.to_json() for profile in profiles],
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
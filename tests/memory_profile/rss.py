@@ -0,0 +1,121 @@
+"""
+Memory usage of a process from `/proc/<pid>/status`, without cgroups.
+
+Resident memory is split into anonymous memory (heap, the actual memory budget) and
+file-backed memory (pages of memory-mapped files, which the kernel can reclaim under pressure).
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Fields of `/proc/<pid>/status`, in kB
+STATUS_FIELDS = ("VmRSS", "VmHWM", "RssAnon", "RssFile")
+
+DEFAULT_INTERVAL_SEC = 0.1
+
+
+def read_status(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Memory fields of the process status in MB, `None` if the process is gone
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in STATUS_FIELDS:
+                    values[name] = int(value.split()[0]) / 1024
+    except OSError:
+        return None
+    return values
+
+
+def reset_peak(pid: int) -> bool:
+    """
+    Reset the high water mark `VmHWM` of the process, to measure the peak of the next phase only
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        # not permitted, or kernel older than 4.0: the sampled peak is used instead
+        return False
+
+
+@dataclass
+class RssSample:
+    time: float
+    rss_mb: float
+    anon_mb: float
+    file_mb: float
+
+
+class RssSampler:
+    """
+    Samples the memory of a process from a background thread
+    """
+
+    def __init__(self, pid: int, interval: float = DEFAULT_INTERVAL_SEC):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[RssSample] = []
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="rss-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            status = read_status(self.pid)
+            if status is None:
+                return
+            self.samples.append(RssSample(
+                time.time(), status.get("VmRSS", 0.0), status.get("RssAnon", 0.0), status.get("RssFile", 0.0)))
+            self.stop_event.wait(self.interval)
+
+    def window(self, start: float, end: Optional[float] = None) -> List[RssSample]:
+        end = time.time() if end is None else end
+        return [s for s in self.samples if start <= s.time <= end]
+
+    def peak(self, start: float, end: Optional[float] = None, peak_was_reset: bool = False) -> Dict[str, float]:
+        """
+        Highest sampled values, and the exact peak of the resident memory if the kernel kept it.
+
+        `VmHWM` covers the whole lifetime of the process since the last `reset_peak`,
+        it is only used if `peak_was_reset`, i.e. the reset at `start` succeeded.
+        """
+        samples = self.window(start, end)
+        peak = {
+            "rss_mb": max((s.rss_mb for s in samples), default=0.0),
+            "anon_mb": max((s.anon_mb for s in samples), default=0.0),
+            "file_mb": max((s.file_mb for s in samples), default=0.0),
+        }
+        status = read_status(self.pid) if peak_was_reset else None
+        if status is not None and "VmHWM" in status:
+            peak["rss_mb"] = max(peak["rss_mb"], status["VmHWM"])
+        return peak
+
+    def steady(self, start: float, end: Optional[float] = None) -> Dict[str, float]:
+        """
+        Median of the values sampled in the window
+        """
+        samples = self.window(start, end)
+        if not samples:
+            return {"rss_mb": 0.0, "anon_mb": 0.0, "file_mb": 0.0}
+        return {
+            "rss_mb": float(np.median([s.rss_mb for s in samples])),
+            "anon_mb": float(np.median([s.anon_mb for s in samples])),
+            "file_mb": float(np.median([s.file_mb for s in samples])),
+        }
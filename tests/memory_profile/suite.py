@@ -0,0 +1,304 @@
+"""
+Memory profile of a single Qdrant instance, for every combination of storage options.
+
+For every combination a fresh instance is started on an empty storage, and:
+
+1. the dataset is uploaded and indexed - peak memory of the load
+2. the instance settles - steady memory after the load
+3. the instance is restarted on the same storage - steady memory after loading from disk
+4. searches run - peak and steady memory while serving
+
+Steady values are reported per million points, over the memory of the empty instance.
+"""
+import itertools
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from datagen import DatasetGenerator, PayloadField
+from .rss import RssSampler, reset_peak
+
+COLLECTION_NAME = "memory_profile"
+START_TIMEOUT_SEC = 600
+INDEXING_TIMEOUT_SEC = 6 * 3600
+
+PAYLOADS = {
+    "none": [],
+    "small": [
+        PayloadField("city", "keyword", cardinality=100),
+        PayloadField("count", "integer", high=1_000_000),
+    ],
+    "large": [
+        PayloadField("city", "keyword", cardinality=100),
+        PayloadField("count", "integer", high=1_000_000),
+        PayloadField("price", "float"),
+        PayloadField("location", "geo"),
+        PayloadField("description", "text", cardinality=10_000, words=50),
+    ],
+}
+# Payload indexes created for every dataset with payload
+PAYLOAD_INDEXES = {"city": "keyword", "count": "integer"}
+
+QUANTIZATION = {
+    "none": None,
+    "always_ram": {"scalar": {"type": "int8", "always_ram": True}},
+    "on_disk": {"scalar": {"type": "int8", "always_ram": False}},
+}
+
+
+@dataclass
+class Dataset:
+    points: int = 1_000_000
+    dim: int = 128
+    payload: str = "small"
+    distance: str = "Cosine"
+
+    def generator(self) -> DatasetGenerator:
+        return DatasetGenerator(self.dim, PAYLOADS[self.payload], seed=42)
+
+
+@dataclass
+class StorageOptions:
+    vectors_on_disk: bool
+    on_disk_payload: bool
+    hnsw_on_disk: bool
+    quantization: str
+
+    @property
+    def name(self) -> str:
+        return (f"vectors_{'disk' if self.vectors_on_disk else 'ram'}"
+                f"-payload_{'disk' if self.on_disk_payload else 'ram'}"
+                f"-hnsw_{'disk' if self.hnsw_on_disk else 'ram'}"
+                f"-quantization_{self.quantization}")
+
+    def collection_config(self, dataset: Dataset) -> dict:
+        return {
+            "vectors": {"size": dataset.dim, "distance": dataset.distance, "on_disk": self.vectors_on_disk},
+            "on_disk_payload": self.on_disk_payload,
+            "hnsw_config": {"on_disk": self.hnsw_on_disk},
+            "quantization_config": QUANTIZATION[self.quantization],
+        }
+
+
+def storage_combinations(vectors_on_disk=(False, True), on_disk_payload=(False, True), hnsw_on_disk=(False, True),
+                         quantization=tuple(QUANTIZATION)) -> List[StorageOptions]:
+    return [
+        StorageOptions(*options)
+        for options in itertools.product(vectors_on_disk, on_disk_payload, hnsw_on_disk, quantization)
+    ]
+
+
+@dataclass
+class MemoryProfile:
+    options: StorageOptions
+    points: int
+    load_sec: float
+    empty: Dict[str, float]
+    load_peak: Dict[str, float]
+    after_load: Dict[str, float]
+    after_restart: Dict[str, float]
+    search_peak: Dict[str, float]
+    search: Dict[str, float]
+    # Steady memory over the empty instance, in MB per million points
+    per_million: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.per_million:
+            for phase in ("after_load", "after_restart", "search"):
+                for kind in ("rss_mb", "anon_mb"):
+                    used = getattr(self, phase)[kind] - self.empty[kind]
+                    self.per_million[f"{phase}_{kind}"] = used / self.points * 1_000_000
+
+    def to_json(self) -> dict:
+        result = asdict(self)
+        result["name"] = self.options.name
+        return result
+
+
+def free_port() -> int:
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class QdrantServer:
+    """
+    A single, non-clustered instance on its own storage
+    """
+
+    def __init__(self, executable: str, storage_dir: str, log_path: str):
+        self.executable = executable
+        self.storage_dir = storage_dir
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+        self.uri = ""
+
+    def start(self):
+        http_port, grpc_port = free_port(), free_port()
+        env = {
+            **os.environ,
+            "QDRANT__STORAGE__STORAGE_PATH": os.path.join(self.storage_dir, "storage"),
+            "QDRANT__STORAGE__SNAPSHOTS_PATH": os.path.join(self.storage_dir, "snapshots"),
+            "QDRANT__SERVICE__HTTP_PORT": str(http_port),
+            "QDRANT__SERVICE__GRPC_PORT": str(grpc_port),
+            "QDRANT__TELEMETRY_DISABLED": "true",
+        }
+        with open(self.log_path, "a") as log:
+            self.process = subprocess.Popen([self.executable], env=env, cwd=self.storage_dir, stderr=log,
+                                            start_new_session=True)
+        self.uri = f"http://127.0.0.1:{http_port}"
+
+        start = time.time()
+        while time.time() - start < START_TIMEOUT_SEC:
+            if self.process.poll() is not None:
+                raise Exception(f"Qdrant exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                if requests.get(f"{self.uri}/collections", timeout=1).ok:
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
+        raise Exception(f"Qdrant did not start in {START_TIMEOUT_SEC} seconds")
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+def wait_collection_green(uri: str, timeout: float = INDEXING_TIMEOUT_SEC):
+    start = time.time()
+    while time.time() - start < timeout:
+        r = requests.get(f"{uri}/collections/{COLLECTION_NAME}")
+        if r.ok and r.json()["result"]["status"] == "green":
+            return
+        time.sleep(1)
+    raise Exception(f"Collection {COLLECTION_NAME} is not green after {timeout} seconds")
+
+
+def load_dataset(uri: str, dataset: Dataset, options: StorageOptions, batch_size: int, parallel: int):
+    r = requests.put(f"{uri}/collections/{COLLECTION_NAME}", json=options.collection_config(dataset))
+    assert r.ok, r.text
+    if dataset.payload != "none":
+        for field_name, field_type in PAYLOAD_INDEXES.items():
+            r = requests.put(f"{uri}/collections/{COLLECTION_NAME}/index?wait=true",
+                             json={"field_name": field_name, "field_schema": field_type})
+            assert r.ok, r.text
+
+    generator = dataset.generator()
+
+    def upload(first_batch: int):
+        session = requests.Session()
+        for body in generator.json_bytes_batches(dataset.points, batch_size, first_batch, parallel):
+            r = session.put(f"{uri}/collections/{COLLECTION_NAME}/points?wait=true", data=body,
+                            headers={"Content-Type": "application/json"})
+            assert r.ok, r.text
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        for future in [executor.submit(upload, i) for i in range(parallel)]:
+            future.result()
+    wait_collection_green(uri)
+
+
+def run_searches(uri: str, dataset: Dataset, n_queries: int, parallel: int):
+    queries = dataset.generator().query_vectors(n_queries).tolist()
+
+    def search(offset: int):
+        session = requests.Session()
+        for vector in queries[offset::parallel]:
+            r = session.post(f"{uri}/collections/{COLLECTION_NAME}/points/search",
+                             json={"vector": vector, "limit": 10, "with_payload": True})
+            assert r.ok, r.text
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        for future in [executor.submit(search, i) for i in range(parallel)]:
+            future.result()
+
+
+class MemoryProfiler:
+    def __init__(self, executable: str, dataset: Dataset, work_dir: Optional[str] = None, settle_sec: float = 10,
+                 batch_size: int = 1000, parallel: int = 4, n_queries: int = 1000, interval: float = 0.1):
+        self.executable = executable
+        self.dataset = dataset
+        self.work_dir = work_dir
+        self.settle_sec = settle_sec
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.n_queries = n_queries
+        self.interval = interval
+
+    def settle(self, sampler: RssSampler) -> Dict[str, float]:
+        # the first half lets allocators and background tasks calm down, the second half is measured
+        time.sleep(self.settle_sec / 2)
+        start = time.time()
+        time.sleep(self.settle_sec / 2)
+        return sampler.steady(start)
+
+    def start(self, server: QdrantServer) -> RssSampler:
+        server.start()
+        sampler = RssSampler(server.process.pid, self.interval)
+        sampler.start()
+        return sampler
+
+    def profile(self, options: StorageOptions) -> MemoryProfile:
+        storage_dir = tempfile.mkdtemp(prefix=f"{options.name}-", dir=self.work_dir)
+        log_path = os.path.join(storage_dir, "qdrant.log")
+        server = QdrantServer(self.executable, storage_dir, log_path)
+        try:
+            sampler = self.start(server)
+            empty = self.settle(sampler)
+
+            peak_was_reset = reset_peak(server.process.pid)
+            start = time.time()
+            load_dataset(server.uri, self.dataset, options, self.batch_size, self.parallel)
+            load_sec = time.time() - start
+            load_peak = sampler.peak(start, peak_was_reset=peak_was_reset)
+            after_load = self.settle(sampler)
+
+            sampler.stop()
+            server.stop()
+            sampler = self.start(server)
+            wait_collection_green(server.uri)
+            after_restart = self.settle(sampler)
+
+            peak_was_reset = reset_peak(server.process.pid)
+            start = time.time()
+            run_searches(server.uri, self.dataset, self.n_queries, self.parallel)
+            search_peak = sampler.peak(start, peak_was_reset=peak_was_reset)
+            search = self.settle(sampler)
+            sampler.stop()
+        finally:
+            server.stop()
+
+        shutil.rmtree(storage_dir, ignore_errors=True)
+        return MemoryProfile(options, self.dataset.points, load_sec, empty, load_peak, after_load, after_restart,
+                             search_peak, search)
+
+
+def format_profiles(profiles: List[MemoryProfile]) -> str:
+    header = f"{'storage':<72} {'load s':>7} {'peak MB':>8} {'load MB/M':>10} {'restart MB/M':>12} " \
+             f"{'search MB/M':>11} {'anon MB/M':>9}"
+    lines = [header]
+    for p in profiles:
+        lines.append(
+            f"{p.options.name:<72} {p.load_sec:>7.1f} {p.load_peak['rss_mb']:>8.0f} "
+            f"{p.per_million['after_load_rss_mb']:>10.1f} {p.per_million['after_restart_rss_mb']:>12.1f} "
+            f"{p.per_million['search_rss_mb']:>11.1f} {p.per_million['search_anon_mb']:>9.1f}"
+        )
+    return "\n".join(lines)
@@ -6,6 +6,10 @@ QDRANT_HOST="localhost:6333"
 
 SCRIPT_DIR=$(realpath "$(dirname "$0")")
 
+# Points per collection of the scale mode of `populate_db.py`, 0 for the reference storage.
+# The scale mode writes `storage-scale.tar.bz2` and `scale-report.json` instead, they are not tracked.
+SCALE_POINTS=${SCALE_POINTS:-0}
+
 # Ensure current path is project root
 cd "$(dirname "$0")/../../"
 
@@ -37,7 +41,21 @@ until curl --output /dev/null --silent --get --fail http://$QDRANT_HOST/collecti
 done
 
 # run python script to populate db
-IMAGE_NAME=$(docker buildx build --load -q "${SCRIPT_DIR}/populate_db")
+IMAGE_NAME=$(docker buildx build --load -q -f "${SCRIPT_DIR}/populate_db/Dockerfile" "${SCRIPT_DIR}/..")
+
+if [ "$SCALE_POINTS" -gt 0 ]; then
+  # The storage is mounted to measure the size of the collections
+  docker run --rm \
+              -e QDRANT_HOST=host.docker.internal:6333 \
+              --add-host host.docker.internal:host-gateway \
+              -v "$PWD/storage:/storage:ro" \
+              -v "${SCRIPT_DIR}:/report" \
+              $IMAGE_NAME sh -c "python populate_db.py --scale $SCALE_POINTS --storage-path /storage --report /report/scale-report.json"
+
+  tar -cjvf "${SCRIPT_DIR}/storage-scale.tar.bz2" ./storage
+  exit 0
+fi
+
 docker run --rm \
             -e QDRANT_HOST=host.docker.internal:6333 \
             --add-host host.docker.internal:host-gateway \
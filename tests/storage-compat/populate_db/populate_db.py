@@ -1,28 +1,71 @@
-import requests
-import random
+import argparse
+import json
 import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import requests
+
+from datagen import DatasetGenerator, PayloadField, random_vectors
 
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "localhost:6333")
 
+CITIES = ["Berlin", "London", "Moscow", "Paris", "Tokyo", "New York"]
+
+# Storage variants of the scale mode, on top of `create_collection`
+SCALE_VARIANTS = {
+    "plain": {},
+    "on_disk_payload": {"on_disk_payload": True},
+    "memmap_vectors": {"optimizers_config": {"memmap_threshold_kb": 20000}},
+    "on_disk_vectors": {"vectors": {"on_disk": True}},
+    "hnsw_on_disk": {"hnsw_config": {"on_disk": True}},
+    "scalar_int8": {"quantization_config": {"scalar": {"type": "int8"}}},
+    "product_x16": {"quantization_config": {"product": {"compression": "x16"}}},
+}
+
+# Same kinds of payload as the hand-written points, with missing values
+SCALE_PAYLOAD = [
+    PayloadField("city", "keyword", values=CITIES, missing=0.2),
+    PayloadField("country", "keyword", cardinality=50, missing=0.5),
+    PayloadField("count", "integer", high=1_000_000, missing=0.2),
+    PayloadField("square", "float", missing=0.5),
+    PayloadField("coords", "geo", missing=0.5),
+]
+
+SCALE_SEED = 42
+INDEXING_TIMEOUT_SEC = 6 * 3600
+
 
 def drop_collection(name: str):
     # cleanup collection if it exists
     requests.delete(f"http://{QDRANT_HOST}/collections/{name}")
 
 
-def create_collection(name: str, quantization_config: dict = None):
+def merge_config(base: dict, overrides: dict) -> dict:
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def create_collection(name: str, quantization_config: dict = None, overrides: dict = None):
     # create collection with a lower `indexing_threshold_kb` to generate the HNSW index
+    config = {
+        "vectors": {"size": 256, "distance": "Dot"},
+        "optimizers_config": {
+            "default_segment_number": 2,
+            "indexing_threshold_kb": 10,
+        },
+        "quantization_config": quantization_config,
+    }
     response = requests.put(
         f"http://{QDRANT_HOST}/collections/{name}",
         headers={"Content-Type": "application/json"},
-        json={
-            "vectors": {"size": 256, "distance": "Dot"},
-            "optimizers_config": {
-                "default_segment_number": 2,
-                "indexing_threshold_kb": 10,
-            },
-            "quantization_config": quantization_config,
-        },
+        json=merge_config(config, overrides or {}),
     )
     assert response.ok
 
@@ -42,12 +85,12 @@ def create_payload_indexes(name: str):
     assert response.ok
 
 
-def rand_vec(dims: int = 256):
-    return [(random.random() * 20) - 10 for _ in range(dims)]
+def rand_vec(rng: np.random.Generator, dims: int = 256):
+    return random_vectors(rng, 1, dims, low=-10, high=10)[0].tolist()
 
 
 def upload_points(name: str):
-    random.seed(42)
+    rng = np.random.default_rng(42)
 
     response = requests.put(
         f"http://{QDRANT_HOST}/collections/{name}/points?wait=true",
@@ -56,7 +99,7 @@ def upload_points(name: str):
             "points": [
                 {
                     "id": 1,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {
                         "city": "Berlin",
                         "country": "Germany",
@@ -67,469 +110,469 @@ def upload_points(name: str):
                 },
                 {
                     "id": 2,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 3,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 4,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 5,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 8,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 9,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 10,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 11,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 12,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 13,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 14,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 15,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 16,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 17,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 18,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 19,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 20,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 21,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 22,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 23,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 24,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 25,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 26,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 27,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 28,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 29,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 30,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 31,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 32,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 33,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 34,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 35,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 36,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 37,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 38,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 39,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 40,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 41,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 42,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 43,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 44,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 45,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 46,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 47,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 48,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 49,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 50,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 51,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 52,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 53,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 54,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 55,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 56,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 57,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 58,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 59,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 60,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 61,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 62,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 63,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 64,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 65,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 66,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 67,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 68,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 69,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 70,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 71,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 72,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 73,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 74,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 75,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 76,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 77,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 78,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 79,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 80,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 81,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 82,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 83,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 84,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 85,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 86,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 87,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 88,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 89,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 90,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 91,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 92,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 93,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": 94,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": 95,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
                 {
                     "id": 96,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                 },
                 {
                     "id": 97,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "London"]},
                 },
                 {
                     "id": 98,
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["Berlin", "Moscow"]},
                 },
                 {
                     "id": "98a9a4b1-4ef2-46fb-8315-a97d874fe1d7",
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"city": ["London", "Moscow"]},
                 },
                 {
                     "id": "f0e09527-b096-42a8-94e9-ea94d342b925",
-                    "vector": rand_vec(),
+                    "vector": rand_vec(rng),
                     "payload": {"count": [0]},
                 },
             ]
@@ -562,7 +605,136 @@ def populate_collection(name: str, quantization_config: dict = None):
     basic_retrieve(name)
 
 
-if __name__ == "__main__":
+def scale_generator() -> DatasetGenerator:
+    return DatasetGenerator(256, SCALE_PAYLOAD, seed=SCALE_SEED, vector_low=-10, vector_high=10)
+
+
+def upload_scale_batches(name: str, total: int, batch_size: int, first_batch: int, step: int):
+    """
+    Upload every `step`-th batch of the seeded dataset, starting from `first_batch`
+    """
+    session = requests.Session()
+    for body in scale_generator().json_bytes_batches(total, batch_size, first_batch, step):
+        response = session.put(
+            f"http://{QDRANT_HOST}/collections/{name}/points?wait=true",
+            headers={"Content-Type": "application/json"},
+            data=body,
+        )
+        assert response.ok, response.text
+
+
+def wait_collection_green(name: str):
+    start = time.time()
+    while time.time() - start < INDEXING_TIMEOUT_SEC:
+        response = requests.get(f"http://{QDRANT_HOST}/collections/{name}")
+        assert response.ok
+        if response.json()["result"]["status"] == "green":
+            return
+        time.sleep(1)
+    raise Exception(f"Collection {name} is not indexed after {INDEXING_TIMEOUT_SEC} seconds")
+
+
+def folder_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, file))
+        for root, _, files in os.walk(path)
+        for file in files
+    )
+
+
+def populate_scale_collection(name: str, variant: dict, points: int, batch_size: int, parallel: int,
+                              storage_path: str = None) -> dict:
+    """
+    Stream `points` seeded points into a new collection from `parallel` processes
+    :param storage_path: storage folder of the server, to measure the size of the collection
+    :return: load statistics of the collection
+    """
+    drop_collection(name)
+    create_collection(name, overrides=variant)
+    create_payload_indexes(name)
+
+    start = time.time()
+    with Pool(parallel) as pool:
+        pool.starmap(upload_scale_batches, [(name, points, batch_size, i, parallel) for i in range(parallel)])
+    upload_sec = time.time() - start
+    wait_collection_green(name)
+    indexing_sec = time.time() - start - upload_sec
+
+    response = requests.get(f"http://{QDRANT_HOST}/collections/{name}")
+    assert response.ok
+    assert response.json()["result"]["points_count"] == points
+    basic_retrieve(name)
+
+    stats = {
+        "points": points,
+        "upload_sec": upload_sec,
+        "indexing_sec": indexing_sec,
+        "points_per_sec": points / upload_sec,
+    }
+    if storage_path is not None:
+        stats["disk_bytes"] = folder_size(os.path.join(storage_path, "collections", name))
+    return stats
+
+
+def verify_scale_collections(report: dict):
+    """
+    Check the collections of a scale report after an upgrade: every point is there and can be searched
+    """
+    generator = scale_generator()
+    for name, stats in report["collections"].items():
+        response = requests.get(f"http://{QDRANT_HOST}/collections/{name}")
+        assert response.ok, response.text
+        assert response.json()["result"]["points_count"] == stats["points"], name
+
+        basic_retrieve(name)
+        response = requests.post(
+            f"http://{QDRANT_HOST}/collections/{name}/points/search",
+            json={
+                "vector": generator.query_vectors(1)[0].tolist(),
+                "limit": 10,
+                "filter": {"must": [{"key": "city", "match": {"value": "Berlin"}}]},
+            },
+        )
+        assert response.ok, response.text
+        assert len(response.json()["result"]) == 10, name
+        print(f"{name}: {stats['points']} points verified")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Populate Qdrant with collections of every storage variant")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="Points per collection of the scale mode, the small hand-written collections if 0")
+    parser.add_argument("--variants", default=",".join(SCALE_VARIANTS),
+                        help=f"Comma separated storage variants of the scale mode, from {list(SCALE_VARIANTS)}")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Points per upload request")
+    parser.add_argument("--parallel", type=int, default=os.cpu_count(), help="Uploading processes")
+    parser.add_argument("--storage-path", help="Storage folder of the server, to measure the collection sizes")
+    parser.add_argument("--report", help="Write load time and size of the scale collections to this JSON file")
+    parser.add_argument("--verify", metavar="REPORT",
+                        help="Instead of populating, check the collections of a scale report, e.g. after an upgrade")
+    args = parser.parse_args()
+    for variant in args.variants.split(","):
+        if variant not in SCALE_VARIANTS:
+            parser.error(f"Unknown variant '{variant}', expected one of {list(SCALE_VARIANTS)}")
+    return args
+
+
+def populate_scale(args: argparse.Namespace):
+    report = {"points": args.scale, "seed": SCALE_SEED, "collections": {}}
+    for variant in args.variants.split(","):
+        name = f"scale_{variant}"
+        stats = populate_scale_collection(
+            name, SCALE_VARIANTS[variant], args.scale, args.batch_size, args.parallel, args.storage_path)
+        report["collections"][name] = stats
+        size = f", {stats['disk_bytes'] / 2 ** 20:.0f} MB on disk" if "disk_bytes" in stats else ""
+        print(f"{name}: {args.scale} points uploaded in {stats['upload_sec']:.1f}s "
+              f"({stats['points_per_sec']:.0f} points/s), indexed in {stats['indexing_sec']:.1f}s{size}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def populate_small():
     # Create collection
     populate_collection("test_collection")
     populate_collection("test_collection_scalar_int8", {"scalar": {"type": "int8"}})
@@ -578,3 +750,16 @@ if __name__ == "__main__":
     populate_collection(
         "test_collection_product_x8", {"product": {"compression": "x8"}}
     )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.verify:
+        start = time.time()
+        with open(args.verify) as f:
+            verify_scale_collections(json.load(f))
+        print(f"Verified in {time.time() - start:.1f}s")
+    elif args.scale > 0:
+        populate_scale(args)
+    else:
+        populate_small()
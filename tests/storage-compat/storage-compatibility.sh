@@ -8,6 +8,13 @@ cd "$(dirname "$0")/../../"
 
 QDRANT_HOST='localhost:6333'
 
+# Storage to upgrade, e.g. the `storage-scale.tar.bz2` of `SCALE_POINTS=1000000 gen_storage_compat_data.sh`
+STORAGE_ARCHIVE=${STORAGE_ARCHIVE:-./tests/storage-compat/storage.tar.bz2}
+# Report of the scale mode of `populate_db.py`, to verify the collections of a scale storage
+SCALE_REPORT=${SCALE_REPORT:-}
+# Seconds to wait for the storage to load, big collections take longer
+BOOT_TIMEOUT=${BOOT_TIMEOUT:-30}
+
 # Build
 cargo build
 
@@ -15,25 +22,30 @@ cargo build
 git lfs pull
 
 # Uncompress snapshot storage
-tar -xvjf ./tests/storage-compat/storage.tar.bz2
+tar -xvjf "$STORAGE_ARCHIVE"
 
 # Test it boots up fine with the old storage
+BOOT_START=$SECONDS
 ./target/debug/qdrant & PID=$!
 
 sleep 1
 
 declare retry=0
 until curl --output /dev/null --silent --get --fail http://$QDRANT_HOST/collections; do
-  if ((retry++ < 30)); then
+  if ((retry++ < BOOT_TIMEOUT)); then
       printf 'waiting for server to start...'
       sleep 1
   else
-      echo "Collections failed to load in ~30 seconds" >&2
+      echo "Collections failed to load in ~$BOOT_TIMEOUT seconds" >&2
       exit 2
   fi
 done
 
-echo "server ready to serve traffic"
+echo "server ready to serve traffic, storage loaded in $((SECONDS - BOOT_START)) seconds"
+
+if [ -n "$SCALE_REPORT" ]; then
+  PYTHONPATH=./tests python3 ./tests/storage-compat/populate_db/populate_db.py --verify "$SCALE_REPORT"
+fi
 
 echo "server is going down"
 kill -9 $PID
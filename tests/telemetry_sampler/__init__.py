@@ -0,0 +1 @@
+from .sampler import Sampler, Target, format_summary, load
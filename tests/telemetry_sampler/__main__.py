@@ -0,0 +1,70 @@
+"""
+Sample the telemetry of a running Qdrant instance, e.g. during a test run.
+Run from the `tests` directory:
+
+    # sample until interrupted
+    python -m telemetry_sampler --output telemetry.npz
+
+    # sample while a command runs
+    python -m telemetry_sampler --output telemetry.npz -- ./tests/openapi_integration_test.sh
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+from .sampler import DEFAULT_INTERVAL_SEC, Sampler, format_summary, load
+
+
+def normalize_uri(uri: str) -> str:
+    # `QDRANT_HOST` is `host:port` in some of the test scripts
+    return uri if "://" in uri else f"http://{uri}"
+
+
+def main():
+    parser = argparse.ArgumentParser("telemetry_sampler", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", action="append",
+                        help="REST API of a peer, can be repeated. Defaults to QDRANT_HOST or http://localhost:6333")
+    parser.add_argument("--pid", type=int, action="append", default=[],
+                        help="Process of the peer with the same position, to sample its memory usage")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SEC, help="Seconds between samples")
+    parser.add_argument("--output", help="Columnar .npz file with all samples")
+    parser.add_argument("--summary-of", help="Only print the summary of a file written before")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Command to sample, after `--`")
+    args = parser.parse_args()
+
+    if args.summary_of:
+        data = load(args.summary_of)
+        print(format_summary(data["peer_names"], data["series_names"], data["peer"], data["series"], data["value"]))
+        return
+
+    uris = args.uri or [os.environ.get("QDRANT_HOST", "http://localhost:6333")]
+    sampler = Sampler(args.interval)
+    for i, uri in enumerate(uris):
+        pid = args.pid[i] if i < len(args.pid) else None
+        sampler.attach(f"peer_{i}", normalize_uri(uri), pid)
+    sampler.start()
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    return_code = 0
+    if command:
+        return_code = subprocess.call(command)
+    else:
+        stopped = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stopped.set())
+        print(f"Sampling {', '.join(uris)} every {args.interval}s, interrupt to stop", file=sys.stderr)
+        stopped.wait()
+
+    sampler.stop()
+    if args.output:
+        sampler.save(args.output)
+    print(sampler.summary())
+    sys.exit(return_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Background sampler of `/telemetry` and `/metrics` of Qdrant peers.
+
+Every interval, each attached peer is scraped and the values of interest are
+flattened into named series:
+
+* `rest:<method endpoint>:<status>:{count,avg_ms,max_ms}` - REST response statistics
+* `grpc:<endpoint>:{count,avg_ms,max_ms}` - gRPC response statistics
+* `optimizer:<collection>/<shard>:{count,avg_ms,max_ms}` - optimization durations of local shards
+* `segments:<collection>/<shard>` - number of segments of local shards
+* `metrics:<name>{<labels>}` - cluster and collection gauges of `/metrics`
+* `rss_mb` - resident memory of the peer process, if its pid is known
+
+Durations are averages over the recent operations, as kept by the peer.
+Samples are stored in a columnar `.npz` file, with one row per peer, series and time.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+DEFAULT_INTERVAL_SEC = 1.0
+REQUEST_TIMEOUT_SEC = 2.0
+
+# Series already covered by `/telemetry`, in more detail
+SKIPPED_METRICS = ("app_info", "rest_", "grpc_")
+
+# `cluster_commit{peer_id="123"} 42`
+METRIC_LINE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{[^}]*\})?)\s+(\S+)$")
+
+
+@dataclass
+class Target:
+    name: str
+    api_uri: str
+    # Process of a local peer, to read its memory usage
+    pid: Optional[int] = None
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        # peer is gone, or not on Linux
+        pass
+    return None
+
+
+def duration_series(prefix: str, stats: dict) -> Dict[str, float]:
+    series = {f"{prefix}:count": stats.get("count", 0)}
+    if stats.get("avg_duration_micros") is not None:
+        series[f"{prefix}:avg_ms"] = stats["avg_duration_micros"] / 1000
+    if stats.get("max_duration_micros") is not None:
+        series[f"{prefix}:max_ms"] = stats["max_duration_micros"] / 1000
+    return series
+
+
+def telemetry_series(telemetry: dict) -> Dict[str, float]:
+    """
+    Flatten the interesting parts of a `/telemetry?details_level=2` result
+    """
+    series = {}
+    requests_telemetry = telemetry.get("requests", {})
+    for endpoint, responses in requests_telemetry.get("rest", {}).get("responses", {}).items():
+        for status, stats in responses.items():
+            series.update(duration_series(f"rest:{endpoint}:{status}", stats))
+    for endpoint, stats in requests_telemetry.get("grpc", {}).get("responses", {}).items():
+        series.update(duration_series(f"grpc:{endpoint}", stats))
+
+    for collection in telemetry.get("collections", {}).get("collections") or []:
+        # Only full collection telemetry has shards
+        for shard in collection.get("shards", []):
+            local = shard.get("local")
+            if local is None:
+                continue
+            key = f"{collection['id']}/{shard['id']}"
+            series.update(duration_series(f"optimizer:{key}", local["optimizations"]["optimizations"]))
+            series[f"segments:{key}"] = len(local["segments"])
+    return series
+
+
+def metrics_series(metrics: str) -> Dict[str, float]:
+    """
+    Parse the Prometheus text format of `/metrics`
+    """
+    series = {}
+    for line in metrics.splitlines():
+        if line.startswith("#"):
+            continue
+        match = METRIC_LINE_RE.match(line.strip())
+        if match is None or match.group(1).startswith(SKIPPED_METRICS):
+            continue
+        try:
+            series[f"metrics:{match.group(1)}"] = float(match.group(2))
+        except ValueError:
+            continue
+    return series
+
+
+class Sampler:
+    """
+    Scrapes all targets every `interval` seconds from a background thread.
+    Targets can be attached while it is running, e.g. when a peer is (re)started.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SEC):
+        self.interval = interval
+        self.targets: List[Target] = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        # Columns of the samples
+        self.times: List[float] = []
+        self.peers: List[int] = []
+        self.series: List[int] = []
+        self.values: List[float] = []
+        self.peer_names: Dict[str, int] = {}
+        self.series_names: Dict[str, int] = {}
+
+    def attach(self, name: str, api_uri: str, pid: Optional[int] = None):
+        with self.lock:
+            self.targets.append(Target(name, api_uri, pid))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="telemetry-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop sampling, after a last sample of all targets
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        session = requests.Session()
+        while True:
+            started = time.time()
+            with self.lock:
+                targets = list(self.targets)
+            for target in targets:
+                self.record(target.name, started, self.scrape(session, target))
+            # always take a last sample when stopped, so short runs are covered too
+            if self.stop_event.wait(max(0.0, self.interval - (time.time() - started))):
+                with self.lock:
+                    targets = list(self.targets)
+                for target in targets:
+                    self.record(target.name, time.time(), self.scrape(session, target))
+                return
+
+    def scrape(self, session: requests.Session, target: Target) -> Dict[str, float]:
+        series = {}
+        try:
+            r = session.get(f"{target.api_uri}/telemetry", params={"details_level": 2}, timeout=REQUEST_TIMEOUT_SEC)
+            if r.ok:
+                series.update(telemetry_series(r.json()["result"]))
+            r = session.get(f"{target.api_uri}/metrics", timeout=REQUEST_TIMEOUT_SEC)
+            if r.ok:
+                series.update(metrics_series(r.text))
+        except requests.exceptions.RequestException:
+            # peer is down, e.g. killed by the test
+            pass
+        if target.pid is not None:
+            rss = read_rss_mb(target.pid)
+            if rss is not None:
+                series["rss_mb"] = rss
+        return series
+
+    def record(self, peer: str, timestamp: float, series: Dict[str, float]):
+        peer_index = self.peer_names.setdefault(peer, len(self.peer_names))
+        for name, value in series.items():
+            self.times.append(timestamp)
+            self.peers.append(peer_index)
+            self.series.append(self.series_names.setdefault(name, len(self.series_names)))
+            self.values.append(value)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            time=np.array(self.times, dtype=np.float64),
+            peer=np.array(self.peers, dtype=np.uint16),
+            series=np.array(self.series, dtype=np.uint32),
+            value=np.array(self.values, dtype=np.float64),
+            peer_names=np.array(list(self.peer_names), dtype=str),
+            series_names=np.array(list(self.series_names), dtype=str),
+        )
+
+    def samples(self, peer: str, series: str) -> List[Tuple[float, float]]:
+        """
+        `(time, value)` of a series of a peer
+        """
+        peer_index = self.peer_names.get(peer)
+        series_index = self.series_names.get(series)
+        return [
+            (t, v) for t, p, s, v in zip(self.times, self.peers, self.series, self.values)
+            if p == peer_index and s == series_index
+        ]
+
+    def summary(self) -> str:
+        return format_summary(self.peer_names, self.series_names, self.peers, self.series, self.values)
+
+
+def load(path: str) -> dict:
+    """
+    Columns of a file written by `Sampler.save`
+    """
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def format_summary(peer_names, series_names, peers, series, values) -> str:
+    """
+    Per peer: peak memory, and per series the last count and the worst average and max durations
+    """
+    peer_names = list(peer_names)
+    series_names = list(series_names)
+    last: Dict[Tuple[int, int], float] = {}
+    peak: Dict[Tuple[int, int], float] = {}
+    for p, s, v in zip(peers, series, values):
+        key = (int(p), int(s))
+        last[key] = v
+        peak[key] = max(peak.get(key, v), v)
+
+    lines = []
+    for peer_index, peer in enumerate(peer_names):
+        lines.append(f"{peer}:")
+        rss = peak.get((peer_index, series_names.index("rss_mb"))) if "rss_mb" in series_names else None
+        if rss is not None:
+            lines.append(f"  peak RSS: {rss:.1f} MB")
+
+        # operation -> (count, worst avg, worst max)
+        operations: Dict[str, List[Optional[float]]] = {}
+        for (p, s), value in last.items():
+            if p != peer_index:
+                continue
+            name = series_names[s]
+            operation, _, stat = name.rpartition(":")
+            if stat == "count" and value > 0:
+                operations.setdefault(operation, [None, None, None])[0] = value
+        for (p, s), value in peak.items():
+            name = series_names[s]
+            operation, _, stat = name.rpartition(":")
+            if p != peer_index or operation not in operations:
+                continue
+            if stat == "avg_ms":
+                operations[operation][1] = value
+            elif stat == "max_ms":
+                operations[operation][2] = value
+        for operation, (count, avg_ms, max_ms) in sorted(operations.items(), key=lambda item: -item[1][0]):
+            avg = "-" if avg_ms is None else f"{avg_ms:.2f}"
+            worst = "-" if max_ms is None else f"{max_ms:.2f}"
+            lines.append(f"  {operation:<70} count: {int(count):>8} avg ms (peak): {avg:>9} max ms: {worst:>9}")
+
+        segments = [value for (p, s), value in peak.items() if p == peer_index and series_names[s].startswith("segments:")]
+        if segments:
+            lines.append(f"  max segments per shard: {int(max(segments))}")
+    return "\n".join(lines)